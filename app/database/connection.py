@@ -5,6 +5,8 @@ from contextlib import asynccontextmanager
 
 import asyncpg
 
+_SCHEMA_LOCK_ID = 0x57475F424F54  # "WG_BOT"
+
 
 class Database:
     """Thin asyncpg wrapper used across repositories."""
@@ -78,14 +80,69 @@ class Database:
             details JSONB,
             created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
         );
+
+        CREATE TABLE IF NOT EXISTS broadcast_jobs (
+            id BIGSERIAL PRIMARY KEY,
+            created_by BIGINT NOT NULL,
+            audience TEXT NOT NULL,
+            message_text TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            cursor_telegram_id BIGINT NOT NULL DEFAULT 0,
+            sent_count INTEGER NOT NULL DEFAULT 0,
+            failed_count INTEGER NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_until TIMESTAMPTZ,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            started_at TIMESTAMPTZ,
+            finished_at TIMESTAMPTZ
+        );
+
+        CREATE TABLE IF NOT EXISTS ip_reservations (
+            ip_address INET PRIMARY KEY,
+            peer_id TEXT NOT NULL,
+            public_key TEXT NOT NULL,
+            telegram_id BIGINT,
+            comment TEXT NOT NULL DEFAULT '',
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+
+        CREATE TABLE IF NOT EXISTS wireguard_configs_archive (
+            id BIGINT PRIMARY KEY,
+            user_id BIGINT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            telegram_id BIGINT,
+            public_key TEXT NOT NULL,
+            ip_address INET NOT NULL,
+            mikrotik_peer_id TEXT,
+            origin TEXT NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL,
+            deactivated_at TIMESTAMPTZ,
+            archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+
+        CREATE TABLE IF NOT EXISTS broadcast_failures (
+            job_id BIGINT NOT NULL REFERENCES broadcast_jobs(id) ON DELETE CASCADE,
+            telegram_id BIGINT NOT NULL,
+            reason TEXT NOT NULL,
+            details TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (job_id, telegram_id)
+        );
         """
 
         alter_sql = """
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
         ALTER TABLE users ADD COLUMN IF NOT EXISTS access_status TEXT NOT NULL DEFAULT 'pending';
         ALTER TABLE users ADD COLUMN IF NOT EXISTS pin_verified BOOLEAN NOT NULL DEFAULT FALSE;
         ALTER TABLE users ADD COLUMN IF NOT EXISTS last_seen TIMESTAMPTZ;
         ALTER TABLE wireguard_configs ADD COLUMN IF NOT EXISTS mikrotik_peer_id TEXT;
         ALTER TABLE wireguard_configs ADD COLUMN IF NOT EXISTS telegram_id BIGINT;
+        ALTER TABLE wireguard_configs ADD COLUMN IF NOT EXISTS document_file_id TEXT;
+        ALTER TABLE wireguard_configs ADD COLUMN IF NOT EXISTS qr_file_id TEXT;
+        ALTER TABLE wireguard_configs ADD COLUMN IF NOT EXISTS origin TEXT NOT NULL DEFAULT 'bot';
+        ALTER TABLE wireguard_configs ADD COLUMN IF NOT EXISTS deactivated_at TIMESTAMPTZ;
+        ALTER TABLE wireguard_configs_archive ADD COLUMN IF NOT EXISTS deactivated_at TIMESTAMPTZ;
+        ALTER TABLE subscriptions ADD COLUMN IF NOT EXISTS reminded_at TIMESTAMPTZ;
 
         UPDATE wireguard_configs cfg
         SET telegram_id = u.telegram_id
@@ -98,7 +155,7 @@ class Database:
             WHERE is_active
         )
         UPDATE wireguard_configs AS cfg
-        SET is_active = FALSE
+        SET is_active = FALSE, deactivated_at = NOW()
         FROM ranked_active AS ra
         WHERE cfg.id = ra.id
           AND ra.row_num > 1;
@@ -109,11 +166,16 @@ class Database:
             WHERE is_active
         )
         UPDATE wireguard_configs AS cfg
-        SET is_active = FALSE
+        SET is_active = FALSE, deactivated_at = NOW()
         FROM ranked_user AS ru
         WHERE cfg.id = ru.id
           AND ru.row_num > 1;
 
+        -- Rows deactivated before the column existed: start their retention now.
+        UPDATE wireguard_configs
+        SET deactivated_at = NOW()
+        WHERE NOT is_active AND deactivated_at IS NULL;
+
         CREATE UNIQUE INDEX IF NOT EXISTS uq_wireguard_configs_ip_active
             ON wireguard_configs (ip_address)
             WHERE is_active;
@@ -121,11 +183,52 @@ class Database:
         CREATE UNIQUE INDEX IF NOT EXISTS uq_wireguard_configs_user_active
             ON wireguard_configs (user_id)
             WHERE is_active;
+
+        CREATE INDEX IF NOT EXISTS ix_wireguard_configs_user_created
+            ON wireguard_configs (user_id, created_at DESC);
+
+        DROP INDEX IF EXISTS ix_wireguard_configs_inactive_created;
+
+        CREATE INDEX IF NOT EXISTS ix_wireguard_configs_inactive_deactivated
+            ON wireguard_configs (deactivated_at)
+            WHERE NOT is_active;
+
+        CREATE INDEX IF NOT EXISTS ix_wireguard_configs_archive_user
+            ON wireguard_configs_archive (user_id, created_at DESC);
+
+        CREATE INDEX IF NOT EXISTS ix_users_updated_page
+            ON users (updated_at DESC, telegram_id DESC);
+
+        CREATE INDEX IF NOT EXISTS ix_users_pending_page
+            ON users (created_at DESC, telegram_id DESC)
+            WHERE access_status = 'pending';
+
+        CREATE INDEX IF NOT EXISTS ix_logs_created_page
+            ON logs (created_at DESC, id DESC);
+
+        CREATE INDEX IF NOT EXISTS ix_users_username_trgm
+            ON users USING GIN (username gin_trgm_ops);
+
+        CREATE INDEX IF NOT EXISTS ix_users_full_name_trgm
+            ON users USING GIN (full_name gin_trgm_ops);
+
+        CREATE INDEX IF NOT EXISTS ix_subscriptions_status_expires
+            ON subscriptions (status, expires_at);
+
+        CREATE INDEX IF NOT EXISTS ix_subscriptions_user_expires
+            ON subscriptions (user_id, expires_at DESC);
+
+        CREATE INDEX IF NOT EXISTS ix_broadcast_jobs_unfinished
+            ON broadcast_jobs (id)
+            WHERE status IN ('pending', 'running');
         """
 
         async with self.pool.acquire() as conn:
-            await conn.execute(schema_sql)
-            await conn.execute(alter_sql)
+            # Serialize bootstrap between webhook workers and replicas starting together.
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock($1)", _SCHEMA_LOCK_ID)
+                await conn.execute(schema_sql)
+                await conn.execute(alter_sql)
 
     @asynccontextmanager
     async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
@@ -1,7 +1,12 @@
 """Repositories package exports."""
 
+from app.database.repositories.broadcasts import BROADCAST_AUDIENCES, BroadcastJob, BroadcastsRepository
+from app.database.repositories.exports import EXPORT_DATASETS, ExportsRepository
 from app.database.repositories.logs import LogsRepository
-from app.database.repositories.users import User, UsersRepository
+from app.database.repositories.pagination import Page, PageCursor
+from app.database.repositories.peer_import import ImportedPeer, PeerImportRepository, PeerImportSummary
+from app.database.repositories.subscriptions import Subscription, SubscriptionsRepository
+from app.database.repositories.users import User, UsersRepository, UserUpsertResult, parse_telegram_id
 from app.database.repositories.wireguard_configs import (
     DuplicateIPAddressError,
     WireGuardConfigsRepository,
@@ -10,7 +15,21 @@ from app.database.repositories.wireguard_configs import (
 __all__ = [
     "User",
     "UsersRepository",
+    "UserUpsertResult",
     "LogsRepository",
+    "BroadcastJob",
+    "BroadcastsRepository",
+    "BROADCAST_AUDIENCES",
+    "ExportsRepository",
+    "EXPORT_DATASETS",
+    "Subscription",
+    "SubscriptionsRepository",
     "WireGuardConfigsRepository",
     "DuplicateIPAddressError",
+    "ImportedPeer",
+    "PeerImportRepository",
+    "PeerImportSummary",
+    "Page",
+    "PageCursor",
+    "parse_telegram_id",
 ]
@@ -0,0 +1,214 @@
+"""Repository for broadcast jobs, their recipients and delivery failures."""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import asyncpg
+
+BROADCAST_AUDIENCES = ("all", "approved")
+
+_JOB_COLUMNS = """
+id, created_by, audience, message_text, status, cursor_telegram_id,
+sent_count, failed_count, created_at, started_at, finished_at
+"""
+
+_AUDIENCE_FILTERS = {
+    "all": "is_active AND access_status <> 'blocked'",
+    "approved": "is_active AND access_status = 'approved'",
+}
+
+
+@dataclass(slots=True)
+class BroadcastJob:
+    id: int
+    created_by: int
+    audience: str
+    message_text: str
+    status: str
+    cursor_telegram_id: int
+    sent_count: int
+    failed_count: int
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in {"done", "cancelled"}
+
+
+class BroadcastsRepository:
+    """Data access methods for broadcast_jobs and broadcast_failures.
+
+    A running job is owned through a lease (``lease_owner``/``lease_until``) that is
+    renewed with every progress checkpoint; when an instance dies, another one can
+    claim the job after the lease expires and continue from ``cursor_telegram_id``.
+    """
+
+    def __init__(self, pool: asyncpg.Pool) -> None:
+        self._pool = pool
+
+    async def create(self, created_by: int, audience: str, message_text: str) -> BroadcastJob:
+        if audience not in _AUDIENCE_FILTERS:
+            raise ValueError(f"Unknown broadcast audience: {audience}")
+        query = f"""
+        INSERT INTO broadcast_jobs (created_by, audience, message_text)
+        VALUES ($1, $2, $3)
+        RETURNING {_JOB_COLUMNS}
+        """
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow(query, created_by, audience, message_text)
+        return BroadcastJob(**dict(row))
+
+    async def get(self, job_id: int) -> BroadcastJob | None:
+        query = f"SELECT {_JOB_COLUMNS} FROM broadcast_jobs WHERE id = $1"
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow(query, job_id)
+        return BroadcastJob(**dict(row)) if row is not None else None
+
+    async def list_recent(self, limit: int = 5) -> list[BroadcastJob]:
+        query = f"SELECT {_JOB_COLUMNS} FROM broadcast_jobs ORDER BY id DESC LIMIT $1"
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(query, limit)
+        return [BroadcastJob(**dict(row)) for row in rows]
+
+    async def list_unfinished_ids(self) -> list[int]:
+        query = "SELECT id FROM broadcast_jobs WHERE status IN ('pending', 'running') ORDER BY id"
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(query)
+        return [int(row["id"]) for row in rows]
+
+    async def claim(self, job_id: int, owner: str, lease_seconds: int) -> BroadcastJob | None:
+        """Take or renew the job lease; None if finished or leased by someone else."""
+
+        query = f"""
+        UPDATE broadcast_jobs
+        SET status = 'running',
+            lease_owner = $2,
+            lease_until = NOW() + $3::int * INTERVAL '1 second',
+            started_at = COALESCE(started_at, NOW())
+        WHERE id = $1
+          AND status IN ('pending', 'running')
+          AND (lease_owner IS NULL OR lease_owner = $2 OR lease_until < NOW())
+        RETURNING {_JOB_COLUMNS}
+        """
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow(query, job_id, owner, lease_seconds)
+        return BroadcastJob(**dict(row)) if row is not None else None
+
+    async def count_recipients(self, audience: str) -> int:
+        query = f"SELECT COUNT(*) FROM users WHERE {_AUDIENCE_FILTERS[audience]}"
+        async with self._pool.acquire() as conn:
+            return int(await conn.fetchval(query))
+
+    async def next_recipients(self, audience: str, after_telegram_id: int, limit: int) -> list[int]:
+        """Stream recipients in telegram_id order (keyset over the unique index)."""
+
+        query = f"""
+        SELECT telegram_id
+        FROM users
+        WHERE {_AUDIENCE_FILTERS[audience]} AND telegram_id > $1
+        ORDER BY telegram_id
+        LIMIT $2
+        """
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(query, after_telegram_id, limit)
+        return [int(row["telegram_id"]) for row in rows]
+
+    async def save_progress(
+        self,
+        job_id: int,
+        owner: str,
+        lease_seconds: int,
+        cursor_telegram_id: int,
+        sent: int,
+        failures: list[tuple[int, str, str]],
+    ) -> str | None:
+        """Checkpoint a processed batch and renew the lease; return the job status.
+
+        Returns None when the lease was lost to another instance.
+        """
+
+        update_query = """
+        UPDATE broadcast_jobs
+        SET cursor_telegram_id = $3,
+            sent_count = sent_count + $4,
+            failed_count = failed_count + $5,
+            lease_until = NOW() + $6::int * INTERVAL '1 second'
+        WHERE id = $1 AND lease_owner = $2
+        RETURNING status
+        """
+        failures_query = """
+        INSERT INTO broadcast_failures (job_id, telegram_id, reason, details)
+        SELECT $1, f.telegram_id, f.reason, f.details
+        FROM unnest($2::bigint[], $3::text[], $4::text[]) AS f(telegram_id, reason, details)
+        ON CONFLICT (job_id, telegram_id) DO NOTHING
+        """
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                status = await conn.fetchval(
+                    update_query, job_id, owner, cursor_telegram_id, sent, len(failures), lease_seconds
+                )
+                if status is not None and failures:
+                    await conn.execute(
+                        failures_query,
+                        job_id,
+                        [telegram_id for telegram_id, _, _ in failures],
+                        [reason for _, reason, _ in failures],
+                        [details for _, _, details in failures],
+                    )
+        return status
+
+    async def finish(self, job_id: int, owner: str) -> BroadcastJob | None:
+        query = f"""
+        UPDATE broadcast_jobs
+        SET status = CASE WHEN status = 'cancelled' THEN status ELSE 'done' END,
+            finished_at = NOW(),
+            lease_owner = NULL,
+            lease_until = NULL
+        WHERE id = $1 AND lease_owner = $2
+        RETURNING {_JOB_COLUMNS}
+        """
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow(query, job_id, owner)
+        return BroadcastJob(**dict(row)) if row is not None else None
+
+    async def release(self, job_id: int, owner: str) -> None:
+        """Give up the lease on shutdown so another instance can resume at once."""
+
+        query = "UPDATE broadcast_jobs SET lease_until = NOW() WHERE id = $1 AND lease_owner = $2"
+        async with self._pool.acquire() as conn:
+            await conn.execute(query, job_id, owner)
+
+    async def cancel(self, job_id: int) -> bool:
+        """Mark the job cancelled; a job nobody holds a live lease on is finished right away.
+
+        A leased job is finished by its runner at the next checkpoint. Unleased jobs
+        have no runner and cancelled jobs are never resumed, so nobody else would
+        set ``finished_at``.
+        """
+
+        query = """
+        UPDATE broadcast_jobs
+        SET status = 'cancelled',
+            finished_at = CASE
+                WHEN lease_owner IS NULL OR lease_until IS NULL OR lease_until < NOW() THEN NOW()
+                ELSE finished_at
+            END
+        WHERE id = $1 AND status IN ('pending', 'running')
+        """
+        async with self._pool.acquire() as conn:
+            result = await conn.execute(query, job_id)
+        return result.endswith(" 1")
+
+    async def failure_summary(self, job_id: int) -> dict[str, int]:
+        query = """
+        SELECT reason, COUNT(*) AS total
+        FROM broadcast_failures
+        WHERE job_id = $1
+        GROUP BY reason
+        ORDER BY total DESC
+        """
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(query, job_id)
+        return {row["reason"]: int(row["total"]) for row in rows}
@@ -0,0 +1,66 @@
+"""Streaming reads for admin exports; rows never materialize as Python lists."""
+
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+import asyncpg
+
+EXPORT_DATASETS = ("users", "configs", "audit")
+
+# Key material is only exported as .conf files (see ``stream_config_files``).
+_EXPORT_QUERIES = {
+    "users": """
+        SELECT id, telegram_id, username, full_name, role, access_status, is_active, created_at, last_seen
+        FROM users
+        ORDER BY id
+    """,
+    "configs": """
+        SELECT id, user_id, telegram_id, host(ip_address) AS ip_address, public_key, mikrotik_peer_id, created_at
+        FROM wireguard_configs
+        WHERE is_active
+        ORDER BY id
+    """,
+    "audit": """
+        SELECT id, user_id, event_type, details, created_at
+        FROM logs
+        ORDER BY id
+    """,
+}
+
+
+class ExportsRepository:
+    """Server-side streaming of export datasets.
+
+    CSV goes through ``COPY ... TO STDOUT`` and arrives as raw chunks; row-wise
+    formats use a cursor inside a read-only transaction fetching ``prefetch`` rows
+    per round trip.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, *, prefetch: int = 1000) -> None:
+        self._pool = pool
+        self._prefetch = prefetch
+
+    async def copy_csv(self, dataset: str, sink: Callable[[bytes], Awaitable[None]]) -> int:
+        """Stream ``dataset`` as CSV with a header into ``sink``; return the row count."""
+
+        query = _EXPORT_QUERIES[dataset]
+        async with self._pool.acquire() as conn:
+            status = await conn.copy_from_query(query, output=sink, format="csv", header=True)
+        return int(status.split()[-1])
+
+    def stream(self, dataset: str) -> AsyncIterator[asyncpg.Record]:
+        return self._cursor(_EXPORT_QUERIES[dataset])
+
+    def stream_config_files(self) -> AsyncIterator[asyncpg.Record]:
+        query = """
+        SELECT id, telegram_id, config_text
+        FROM wireguard_configs
+        WHERE is_active AND origin = 'bot'
+        ORDER BY id
+        """
+        return self._cursor(query)
+
+    async def _cursor(self, query: str) -> AsyncIterator[asyncpg.Record]:
+        async with self._pool.acquire() as conn:
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
+                async for row in conn.cursor(query, prefetch=self._prefetch):
+                    yield row
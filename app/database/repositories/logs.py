@@ -4,6 +4,8 @@ import json
 
 import asyncpg
 
+from app.database.repositories.pagination import Page, PageCursor, fetch_keyset_page
+
 
 class LogsRepository:
     """Data access methods for logs table."""
@@ -30,3 +32,23 @@ class LogsRepository:
         """
         async with self._pool.acquire() as conn:
             return await conn.fetch(query, limit)
+
+    async def list_page(
+        self,
+        cursor: PageCursor | None = None,
+        *,
+        backward: bool = False,
+        limit: int = 20,
+    ) -> Page:
+        """Return audit events, newest first, using keyset pagination."""
+
+        return await fetch_keyset_page(
+            self._pool,
+            columns="id, user_id, event_type, details, created_at",
+            table="logs",
+            sort_column="created_at",
+            key_column="id",
+            cursor=cursor,
+            backward=backward,
+            limit=limit,
+        )
@@ -0,0 +1,92 @@
+"""Keyset (cursor) pagination helpers shared by repositories."""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import asyncpg
+
+
+@dataclass(slots=True, frozen=True)
+class PageCursor:
+    """Position in a list ordered by ``(sort_value DESC, key DESC)``."""
+
+    sort_value: datetime
+    key: int
+
+    def encode(self) -> str:
+        """Return compact form suitable for Telegram callback data (<64 bytes)."""
+
+        micros = int(self.sort_value.timestamp()) * 1_000_000 + self.sort_value.microsecond
+        return f"{micros}.{self.key}"
+
+    @classmethod
+    def decode(cls, raw: str) -> "PageCursor":
+        micros_raw, key_raw = raw.split(".", 1)
+        seconds, micros = divmod(int(micros_raw), 1_000_000)
+        sort_value = datetime.fromtimestamp(seconds, tz=timezone.utc).replace(microsecond=micros)
+        return cls(sort_value=sort_value, key=int(key_raw))
+
+
+@dataclass(slots=True)
+class Page:
+    """One page of rows with cursors for neighbouring pages."""
+
+    rows: list[asyncpg.Record] = field(default_factory=list)
+    has_prev: bool = False
+    has_next: bool = False
+    first: PageCursor | None = None
+    last: PageCursor | None = None
+
+
+async def fetch_keyset_page(
+    pool: asyncpg.Pool,
+    *,
+    columns: str,
+    table: str,
+    sort_column: str,
+    key_column: str,
+    cursor: PageCursor | None,
+    backward: bool = False,
+    where: str = "TRUE",
+    limit: int = 20,
+) -> Page:
+    """Fetch a page relative to cursor using a ``(sort, key)`` row comparison.
+
+    Forward pages go to older rows (after ``cursor``), backward pages go to newer rows
+    (before ``cursor``). One extra row is requested to detect whether more pages exist.
+    Column/table names are trusted identifiers supplied by repositories.
+    """
+
+    conditions = [f"({where})"]
+    args: list[object] = []
+    if cursor is not None:
+        operator = ">" if backward else "<"
+        conditions.append(f"({sort_column}, {key_column}) {operator} ($1, $2)")
+        args.extend([cursor.sort_value, cursor.key])
+    order = "ASC" if backward else "DESC"
+    args.append(limit + 1)
+
+    query = f"""
+    SELECT {columns}, {sort_column} AS _page_sort, {key_column} AS _page_key
+    FROM {table}
+    WHERE {" AND ".join(conditions)}
+    ORDER BY {sort_column} {order}, {key_column} {order}
+    LIMIT ${len(args)}
+    """
+    async with pool.acquire() as conn:
+        rows = list(await conn.fetch(query, *args))
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backward:
+        rows.reverse()
+
+    page = Page(
+        rows=rows,
+        has_prev=has_more if backward else cursor is not None,
+        has_next=True if backward else has_more,
+    )
+    if rows:
+        page.first = PageCursor(sort_value=rows[0]["_page_sort"], key=int(rows[0]["_page_key"]))
+        page.last = PageCursor(sort_value=rows[-1]["_page_sort"], key=int(rows[-1]["_page_key"]))
+    return page
@@ -0,0 +1,139 @@
+"""Bulk adoption of router peers that were created outside the bot."""
+
+from dataclasses import dataclass
+
+import asyncpg
+
+
+@dataclass(slots=True, frozen=True)
+class ImportedPeer:
+    peer_id: str
+    public_key: str
+    ip_address: str
+    telegram_id: int | None
+    comment: str
+
+
+@dataclass(slots=True)
+class PeerImportSummary:
+    peers: int
+    adopted: int
+    reserved: int
+    released: int
+    applied: bool
+    skipped: int = 0
+
+
+_STAGING_COLUMNS = ("peer_id", "public_key", "ip_address", "telegram_id", "comment")
+
+
+class PeerImportRepository:
+    """Load a router peer snapshot with COPY and reconcile it in a few set-based statements.
+
+    Peers whose comment names a known user without an active config become
+    ``wireguard_configs`` rows with ``origin = 'imported'`` (no key material: the
+    user reissues to get a working config). Every other peer that the bot does not
+    own goes to ``ip_reservations`` so the allocator never hands out its address.
+    Reservations are a mirror of the router: a re-import drops the ones whose peer
+    is gone.
+    """
+
+    def __init__(self, pool: asyncpg.Pool) -> None:
+        self._pool = pool
+
+    async def import_peers(self, peers: list[ImportedPeer], *, apply: bool) -> PeerImportSummary:
+        async with self._pool.acquire() as conn:
+            transaction = conn.transaction()
+            await transaction.start()
+            try:
+                summary = await self._reconcile(conn, peers)
+            except BaseException:
+                await transaction.rollback()
+                raise
+            if apply:
+                await transaction.commit()
+            else:
+                await transaction.rollback()
+        summary.applied = apply
+        return summary
+
+    async def _reconcile(self, conn: asyncpg.Connection, peers: list[ImportedPeer]) -> PeerImportSummary:
+        # Same lock as allocate_and_create: no IP can be handed out mid-import.
+        await conn.execute("LOCK TABLE wireguard_configs IN SHARE ROW EXCLUSIVE MODE")
+        await conn.execute(
+            """
+            CREATE TEMP TABLE peer_import_staging (
+                peer_id TEXT NOT NULL,
+                public_key TEXT NOT NULL,
+                ip_address INET NOT NULL,
+                telegram_id BIGINT,
+                comment TEXT NOT NULL
+            ) ON COMMIT DROP
+            """
+        )
+        await conn.copy_records_to_table(
+            "peer_import_staging",
+            records=[(p.peer_id, p.public_key, p.ip_address, p.telegram_id, p.comment) for p in peers],
+            columns=_STAGING_COLUMNS,
+        )
+
+        adopted = await conn.fetchval(
+            """
+            WITH candidates AS (
+                SELECT DISTINCT ON (u.id) u.id AS user_id, s.*
+                FROM peer_import_staging s
+                JOIN users u ON u.telegram_id = s.telegram_id
+                WHERE NOT EXISTS (
+                    SELECT 1
+                    FROM wireguard_configs c
+                    WHERE c.is_active
+                      AND (c.user_id = u.id OR c.ip_address = s.ip_address
+                           OR c.public_key = s.public_key OR c.mikrotik_peer_id = s.peer_id)
+                )
+                ORDER BY u.id, s.peer_id
+            ), inserted AS (
+                INSERT INTO wireguard_configs
+                    (user_id, telegram_id, private_key, public_key, preshared_key, ip_address,
+                     config_text, mikrotik_peer_id, origin, is_active)
+                SELECT user_id, telegram_id, '', public_key, '', ip_address, '', peer_id, 'imported', TRUE
+                FROM candidates
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM inserted
+            """
+        )
+
+        released = await conn.execute(
+            """
+            DELETE FROM ip_reservations r
+            WHERE NOT EXISTS (SELECT 1 FROM peer_import_staging s WHERE s.ip_address = r.ip_address)
+               OR EXISTS (SELECT 1 FROM wireguard_configs c WHERE c.is_active AND c.ip_address = r.ip_address)
+            """
+        )
+        reserved = await conn.execute(
+            """
+            INSERT INTO ip_reservations (ip_address, peer_id, public_key, telegram_id, comment)
+            SELECT s.ip_address, s.peer_id, s.public_key, s.telegram_id, s.comment
+            FROM peer_import_staging s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM wireguard_configs c WHERE c.is_active AND c.ip_address = s.ip_address
+            )
+            ON CONFLICT (ip_address) DO UPDATE
+            SET peer_id = EXCLUDED.peer_id,
+                public_key = EXCLUDED.public_key,
+                telegram_id = EXCLUDED.telegram_id,
+                comment = EXCLUDED.comment,
+                updated_at = NOW()
+            """
+        )
+        return PeerImportSummary(
+            peers=len(peers),
+            adopted=int(adopted),
+            reserved=_affected(reserved),
+            released=_affected(released),
+            applied=False,
+        )
+
+
+def _affected(status: str) -> int:
+    return int(status.split()[-1])
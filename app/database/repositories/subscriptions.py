@@ -0,0 +1,137 @@
+"""Repository for user subscriptions and their expiry sweeps."""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import asyncpg
+
+_SUBSCRIPTION_COLUMNS = "s.id, s.user_id, u.telegram_id, s.plan_name, s.starts_at, s.expires_at, s.status"
+
+
+@dataclass(slots=True)
+class Subscription:
+    id: int
+    user_id: int
+    telegram_id: int
+    plan_name: str
+    starts_at: datetime
+    expires_at: datetime
+    status: str
+
+
+class SubscriptionsRepository:
+    """Data access for the subscriptions table.
+
+    A user has at most one ``active`` subscription: granting extends it. Sweeps
+    only touch rows that are due, found through ``(status, expires_at)``, and claim
+    them with ``FOR UPDATE SKIP LOCKED`` so replicas never process a row twice.
+    """
+
+    def __init__(self, pool: asyncpg.Pool) -> None:
+        self._pool = pool
+
+    async def grant(self, telegram_id: int, days: int, plan_name: str = "basic") -> Subscription | None:
+        """Extend the active subscription by ``days`` (from now if lapsed) or start one."""
+
+        extend_query = f"""
+        UPDATE subscriptions AS s
+        SET expires_at = GREATEST(s.expires_at, NOW()) + $2::int * INTERVAL '1 day',
+            plan_name = $3,
+            reminded_at = NULL
+        FROM users AS u
+        WHERE u.id = s.user_id AND u.telegram_id = $1 AND s.status = 'active'
+        RETURNING {_SUBSCRIPTION_COLUMNS}
+        """
+        insert_query = f"""
+        WITH inserted AS (
+            INSERT INTO subscriptions (user_id, plan_name, expires_at)
+            SELECT id, $3, NOW() + $2::int * INTERVAL '1 day'
+            FROM users
+            WHERE telegram_id = $1
+            RETURNING *
+        )
+        SELECT {_SUBSCRIPTION_COLUMNS}
+        FROM inserted AS s
+        JOIN users AS u ON u.id = s.user_id
+        """
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                # Serialize grants per user so two admins cannot create two active rows.
+                locked = await conn.fetchval("SELECT id FROM users WHERE telegram_id = $1 FOR UPDATE", telegram_id)
+                if locked is None:
+                    return None
+                row = await conn.fetchrow(extend_query, telegram_id, days, plan_name)
+                if row is None:
+                    row = await conn.fetchrow(insert_query, telegram_id, days, plan_name)
+        return Subscription(**dict(row)) if row is not None else None
+
+    async def get_latest(self, user_id: int) -> Subscription | None:
+        query = f"""
+        SELECT {_SUBSCRIPTION_COLUMNS}
+        FROM subscriptions AS s
+        JOIN users AS u ON u.id = s.user_id
+        WHERE s.user_id = $1
+        ORDER BY s.expires_at DESC
+        LIMIT 1
+        """
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow(query, user_id)
+        return Subscription(**dict(row)) if row is not None else None
+
+    async def upcoming(self, until: datetime, limit: int) -> list[tuple[datetime, int]]:
+        """Earliest active expirations up to ``until`` as (expires_at, id)."""
+
+        query = """
+        SELECT expires_at, id
+        FROM subscriptions
+        WHERE status = 'active' AND expires_at <= $1
+        ORDER BY expires_at
+        LIMIT $2
+        """
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(query, until, limit)
+        return [(row["expires_at"], int(row["id"])) for row in rows]
+
+    async def claim_expired(self, limit: int) -> list[Subscription]:
+        """Mark up to ``limit`` lapsed subscriptions expired and return them."""
+
+        query = f"""
+        WITH due AS (
+            SELECT id
+            FROM subscriptions
+            WHERE status = 'active' AND expires_at <= NOW()
+            ORDER BY expires_at
+            LIMIT $1
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE subscriptions AS s
+        SET status = 'expired'
+        FROM due, users AS u
+        WHERE s.id = due.id AND u.id = s.user_id
+        RETURNING {_SUBSCRIPTION_COLUMNS}
+        """
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(query, limit)
+        return [Subscription(**dict(row)) for row in rows]
+
+    async def claim_reminders(self, until: datetime, limit: int) -> list[Subscription]:
+        """Mark up to ``limit`` subscriptions expiring before ``until`` as reminded and return them."""
+
+        query = f"""
+        WITH due AS (
+            SELECT id
+            FROM subscriptions
+            WHERE status = 'active' AND expires_at <= $1 AND reminded_at IS NULL
+            ORDER BY expires_at
+            LIMIT $2
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE subscriptions AS s
+        SET reminded_at = NOW()
+        FROM due, users AS u
+        WHERE s.id = due.id AND u.id = s.user_id
+        RETURNING {_SUBSCRIPTION_COLUMNS}
+        """
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(query, until, limit)
+        return [Subscription(**dict(row)) for row in rows]
@@ -1,9 +1,12 @@
 """Repository for users table."""
 
 from dataclasses import dataclass
+from datetime import datetime
 
 import asyncpg
 
+from app.database.repositories.pagination import Page, PageCursor, fetch_keyset_page
+
 
 @dataclass(slots=True)
 class User:
@@ -18,6 +21,32 @@ class User:
     access_status: str
 
 
+@dataclass(slots=True)
+class UserUpsertResult:
+    user: User
+    created: bool
+    previous_role: str | None
+
+    @property
+    def role_changed(self) -> bool:
+        return not self.created and self.previous_role is not None and self.previous_role != self.user.role
+
+
+_BIGINT_LIMIT = 2**63
+
+
+def parse_telegram_id(raw: str) -> int | None:
+    """Return ``raw`` as a telegram id if it is ASCII digits within the BIGINT range."""
+
+    if not (raw.isascii() and raw.isdigit()):
+        return None
+    value = int(raw)
+    return value if value < _BIGINT_LIMIT else None
+
+
+_USER_COLUMNS = ("id", "telegram_id", "username", "full_name", "role", "pin_hash", "pin_verified", "is_active", "access_status")
+
+
 class UsersRepository:
     """Data access methods for users."""
 
@@ -55,6 +84,60 @@ class UsersRepository:
             row = await conn.fetchrow(query, telegram_id, username, full_name, role, pin_hash, pin_verified, access_status)
         return User(**dict(row))
 
+    async def upsert_seen(
+        self,
+        telegram_id: int,
+        username: str | None,
+        full_name: str | None,
+        role: str,
+        pin_hash: str,
+        access_status: str,
+        last_seen: datetime,
+    ) -> UserUpsertResult:
+        """Create user or sync their role in a single round trip.
+
+        ``pin_hash``, ``access_status`` and ``last_seen`` only apply when the row is
+        created. An existing row is only rewritten when its role changes, so a
+        repeated /start does not produce a new row version.
+        """
+
+        query = """
+        WITH previous AS (
+            SELECT id, telegram_id, username, full_name, role, pin_hash, pin_verified, is_active, access_status
+            FROM users
+            WHERE telegram_id = $1
+        ),
+        upserted AS (
+            INSERT INTO users (telegram_id, username, full_name, role, pin_hash, access_status, last_seen)
+            VALUES ($1, $2, $3, $4, $5, $6, $7)
+            ON CONFLICT (telegram_id) DO UPDATE
+            SET role = EXCLUDED.role,
+                updated_at = NOW()
+            WHERE users.role IS DISTINCT FROM EXCLUDED.role
+            RETURNING id, telegram_id, username, full_name, role, pin_hash, pin_verified, is_active, access_status,
+                      (xmax = 0) AS created
+        )
+        SELECT upserted.*, (SELECT role FROM previous) AS previous_role
+        FROM upserted
+        UNION ALL
+        SELECT previous.*, FALSE AS created, previous.role AS previous_role
+        FROM previous
+        WHERE NOT EXISTS (SELECT 1 FROM upserted)
+        """
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow(query, telegram_id, username, full_name, role, pin_hash, access_status, last_seen)
+        if row is None:
+            # Inserted concurrently after this statement's snapshot, with the same role.
+            user = await self.get_by_telegram_id(telegram_id)
+            if user is None:
+                raise RuntimeError(f"User {telegram_id} vanished during upsert")
+            return UserUpsertResult(user=user, created=False, previous_role=user.role)
+        return UserUpsertResult(
+            user=User(**{column: row[column] for column in _USER_COLUMNS}),
+            created=bool(row["created"]),
+            previous_role=row["previous_role"],
+        )
+
     async def mark_pin_verified(self, telegram_id: int, verified: bool = True) -> None:
         query = "UPDATE users SET pin_verified = $2, updated_at = NOW(), last_seen = NOW() WHERE telegram_id = $1"
         async with self._pool.acquire() as conn:
@@ -65,6 +148,23 @@ class UsersRepository:
         async with self._pool.acquire() as conn:
             await conn.execute(query, telegram_id)
 
+    async def touch_last_seen_many(self, telegram_ids: list[int], seen_at: list[datetime]) -> None:
+        """Apply a batch of last-seen timestamps in one statement.
+
+        ``updated_at`` is left alone: it is indexed for admin pagination, and skipping it
+        keeps these writes eligible for HOT updates.
+        """
+
+        query = """
+        UPDATE users AS u
+        SET last_seen = v.seen_at
+        FROM unnest($1::bigint[], $2::timestamptz[]) AS v(telegram_id, seen_at)
+        WHERE u.telegram_id = v.telegram_id
+          AND (u.last_seen IS NULL OR u.last_seen < v.seen_at)
+        """
+        async with self._pool.acquire() as conn:
+            await conn.execute(query, telegram_ids, seen_at)
+
     async def set_role(self, telegram_id: int, role: str) -> None:
         query = "UPDATE users SET role = $2, updated_at = NOW() WHERE telegram_id = $1"
         async with self._pool.acquire() as conn:
@@ -75,6 +175,41 @@ class UsersRepository:
         async with self._pool.acquire() as conn:
             await conn.execute(query, telegram_id, access_status)
 
+    async def set_access_status_many(self, telegram_ids: list[int], access_status: str) -> tuple[list[int], list[int]]:
+        """Set the status for all existing targets in one statement.
+
+        Returns (changed, unchanged) telegram ids; ids missing from both are unknown.
+        """
+
+        query = """
+        WITH targets AS (
+            SELECT id, telegram_id, access_status
+            FROM users
+            WHERE telegram_id = ANY($1::bigint[])
+            FOR UPDATE
+        ), updated AS (
+            UPDATE users AS u
+            SET access_status = $2, updated_at = NOW()
+            FROM targets AS t
+            WHERE u.id = t.id AND t.access_status <> $2
+            RETURNING u.telegram_id
+        )
+        SELECT t.telegram_id, upd.telegram_id IS NOT NULL AS changed
+        FROM targets AS t
+        LEFT JOIN updated AS upd ON upd.telegram_id = t.telegram_id
+        ORDER BY t.telegram_id
+        """
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(query, telegram_ids, access_status)
+        changed = [int(row["telegram_id"]) for row in rows if row["changed"]]
+        unchanged = [int(row["telegram_id"]) for row in rows if not row["changed"]]
+        return changed, unchanged
+
+    async def get_latest_pin_hash(self) -> str | None:
+        query = "SELECT pin_hash FROM users ORDER BY id DESC LIMIT 1"
+        async with self._pool.acquire() as conn:
+            return await conn.fetchval(query)
+
     async def list_pending(self) -> list[asyncpg.Record]:
         query = """
         SELECT telegram_id, username, full_name, created_at
@@ -95,16 +230,107 @@ class UsersRepository:
         async with self._pool.acquire() as conn:
             return await conn.fetch(query, limit)
 
+    async def list_page(
+        self,
+        cursor: PageCursor | None = None,
+        *,
+        backward: bool = False,
+        limit: int = 20,
+    ) -> Page:
+        """Return users ordered by last update using keyset pagination."""
+
+        return await fetch_keyset_page(
+            self._pool,
+            columns="telegram_id, username, full_name, role, access_status, last_seen",
+            table="users",
+            sort_column="updated_at",
+            key_column="telegram_id",
+            cursor=cursor,
+            backward=backward,
+            limit=limit,
+        )
+
+    async def list_pending_page(
+        self,
+        cursor: PageCursor | None = None,
+        *,
+        backward: bool = False,
+        limit: int = 10,
+    ) -> Page:
+        """Return pending access requests, newest first, using keyset pagination."""
+
+        return await fetch_keyset_page(
+            self._pool,
+            columns="telegram_id, username, full_name, created_at",
+            table="users",
+            sort_column="created_at",
+            key_column="telegram_id",
+            where="access_status = 'pending'",
+            cursor=cursor,
+            backward=backward,
+            limit=limit,
+        )
+
+    async def list_pending_ids_from(self, cursor: PageCursor, limit: int = 10) -> list[int]:
+        """Telegram ids of the pending page that starts at ``cursor`` (inclusive)."""
+
+        query = """
+        SELECT telegram_id
+        FROM users
+        WHERE access_status = 'pending' AND (created_at, telegram_id) <= ($1, $2)
+        ORDER BY created_at DESC, telegram_id DESC
+        LIMIT $3
+        """
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(query, cursor.sort_value, cursor.key, limit)
+        return [int(row["telegram_id"]) for row in rows]
+
+    async def count_pending(self) -> int:
+        query = "SELECT COUNT(*) FROM users WHERE access_status = 'pending'"
+        async with self._pool.acquire() as conn:
+            return int(await conn.fetchval(query))
+
     async def search(self, query_text: str, limit: int = 20) -> list[asyncpg.Record]:
+        """Find users by exact Telegram ID or fuzzy username/full name match.
+
+        Numeric input is tried as a ``telegram_id`` first (unique index lookup). Text
+        lookups rely on ``pg_trgm`` GIN indexes and are ranked by similarity.
+        """
+
+        needle = query_text.strip().lstrip("@")
+        if not needle:
+            return []
+
+        telegram_id = parse_telegram_id(needle)
+        if telegram_id is not None:
+            exact_query = """
+            SELECT telegram_id, username, full_name, role, access_status, last_seen
+            FROM users
+            WHERE telegram_id = $1
+            """
+            async with self._pool.acquire() as conn:
+                row = await conn.fetchrow(exact_query, telegram_id)
+            if row is not None:
+                return [row]
+
         query = """
         SELECT telegram_id, username, full_name, role, access_status, last_seen
         FROM users
-        WHERE CAST(telegram_id AS TEXT) ILIKE $1
-           OR COALESCE(username, '') ILIKE $1
-           OR COALESCE(full_name, '') ILIKE $1
-        ORDER BY updated_at DESC
-        LIMIT $2
+        WHERE username ILIKE $2
+           OR full_name ILIKE $2
+           OR username % $1
+           OR full_name % $1
+        ORDER BY GREATEST(
+                     similarity(COALESCE(username, ''), $1),
+                     similarity(COALESCE(full_name, ''), $1)
+                 ) DESC,
+                 updated_at DESC
+        LIMIT $3
         """
-        pattern = f"%{query_text}%"
+        pattern = f"%{_escape_like(needle)}%"
         async with self._pool.acquire() as conn:
-            return await conn.fetch(query, pattern, limit)
+            return await conn.fetch(query, needle, pattern, limit)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
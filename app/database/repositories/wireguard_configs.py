@@ -1,6 +1,7 @@
 """Repository for wireguard_configs table."""
 
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable
+from datetime import datetime
 
 import asyncpg
 
@@ -20,7 +21,7 @@ class WireGuardConfigsRepository:
     async def get_active_for_user(self, user_id: int) -> asyncpg.Record | None:
         query = """
         SELECT id, user_id, telegram_id, private_key, public_key, preshared_key, host(ip_address) AS ip_address,
-               config_text, mikrotik_peer_id, is_active, created_at
+               config_text, mikrotik_peer_id, document_file_id, qr_file_id, origin, is_active, created_at
         FROM wireguard_configs
         WHERE user_id = $1 AND is_active
         ORDER BY created_at DESC
@@ -58,7 +59,10 @@ class WireGuardConfigsRepository:
                             str(existing["preshared_key"]),
                         )
 
-                    rows = await conn.fetch("SELECT host(ip_address) AS ip FROM wireguard_configs WHERE is_active")
+                    rows = await conn.fetch(
+                        "SELECT host(ip_address) AS ip FROM wireguard_configs WHERE is_active "
+                        "UNION ALL SELECT host(ip_address) FROM ip_reservations"
+                    )
                     used_ips = {row["ip"] for row in rows}
                     ip_address = allocate_next_ip(network_cidr, used_ips)
                     private_key, public_key, preshared_key, config_text = profile_builder(ip_address)
@@ -107,7 +111,11 @@ class WireGuardConfigsRepository:
                 old_peer_id = current["mikrotik_peer_id"]
                 private_key, public_key, preshared_key, config_text = profile_builder(ip_address)
 
-                await conn.execute("UPDATE wireguard_configs SET is_active = FALSE WHERE user_id = $1 AND is_active", user_id)
+                await conn.execute(
+                    "UPDATE wireguard_configs SET is_active = FALSE, deactivated_at = NOW() "
+                    "WHERE user_id = $1 AND is_active",
+                    user_id,
+                )
                 row = await conn.fetchrow(
                     """
                     INSERT INTO wireguard_configs
@@ -126,11 +134,145 @@ class WireGuardConfigsRepository:
                 )
                 return int(row["id"]), ip_address, config_text, public_key, preshared_key, old_peer_id
 
+    async def revoke_for_telegram_ids(
+        self, telegram_ids: list[int], remove_peers: Callable[[list[str]], Awaitable[bool]]
+    ) -> tuple[list[tuple[int, str | None]], int]:
+        """Deactivate active configs of all given users once their router peers are gone.
+
+        See ``_revoke`` for the ordering and the return value.
+        """
+
+        query = """
+        SELECT cfg.id, u.telegram_id, cfg.mikrotik_peer_id
+        FROM wireguard_configs AS cfg
+        JOIN users AS u ON u.id = cfg.user_id
+        WHERE u.telegram_id = ANY($1::bigint[]) AND cfg.is_active
+        FOR UPDATE OF cfg
+        """
+        return await self._revoke(query, (telegram_ids,), remove_peers)
+
+    async def revoke_idle_peers(
+        self,
+        peer_ids: list[str],
+        created_before: datetime,
+        remove_peers: Callable[[list[str]], Awaitable[bool]],
+    ) -> tuple[list[tuple[int, str | None]], int]:
+        """Deactivate bot-issued configs bound to ``peer_ids`` and issued before ``created_before``.
+
+        The age check keeps freshly (re)issued configs whose client has not connected yet.
+        """
+
+        query = """
+        SELECT cfg.id, u.telegram_id, cfg.mikrotik_peer_id
+        FROM wireguard_configs AS cfg
+        JOIN users AS u ON u.id = cfg.user_id
+        WHERE cfg.is_active
+          AND cfg.origin = 'bot'
+          AND cfg.mikrotik_peer_id = ANY($1::text[])
+          AND cfg.created_at < $2
+        FOR UPDATE OF cfg
+        """
+        return await self._revoke(query, (peer_ids, created_before), remove_peers)
+
+    async def list_pending_revocation(self, limit: int) -> list[int]:
+        """Telegram ids of blocked or lapsed users that still hold an active config.
+
+        A lapsed user has subscriptions but none of them active. These are left
+        behind when the router was unreachable during a block or an expiry.
+        """
+
+        query = """
+        SELECT u.telegram_id
+        FROM wireguard_configs AS cfg
+        JOIN users AS u ON u.id = cfg.user_id
+        WHERE cfg.is_active
+          AND (
+            u.access_status = 'blocked'
+            OR (
+                EXISTS (SELECT 1 FROM subscriptions AS s WHERE s.user_id = u.id)
+                AND NOT EXISTS (SELECT 1 FROM subscriptions AS s WHERE s.user_id = u.id AND s.status = 'active')
+            )
+          )
+        LIMIT $1
+        """
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(query, limit)
+        return [int(row["telegram_id"]) for row in rows]
+
+    async def _revoke(
+        self, select_query: str, args: tuple, remove_peers: Callable[[list[str]], Awaitable[bool]]
+    ) -> tuple[list[tuple[int, str | None]], int]:
+        """Lock the selected configs, remove their peers, then deactivate what is safe to free.
+
+        ``remove_peers`` runs while the rows are locked and reports whether the peers
+        are gone. When it fails, configs bound to a peer stay active: the router still
+        holds their address, so it must not go back to the allocator. Returns
+        (telegram_id, peer id) per deactivated config and the number of configs kept.
+        """
+
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                rows = await conn.fetch(select_query, *args)
+                peer_ids = [row["mikrotik_peer_id"] for row in rows if row["mikrotik_peer_id"]]
+                gone = await remove_peers(peer_ids) if peer_ids else True
+                revoked = [row for row in rows if gone or not row["mikrotik_peer_id"]]
+                if revoked:
+                    await conn.execute(
+                        "UPDATE wireguard_configs SET is_active = FALSE, deactivated_at = NOW() "
+                        "WHERE id = ANY($1::bigint[])",
+                        [row["id"] for row in revoked],
+                    )
+        return [(int(row["telegram_id"]), row["mikrotik_peer_id"]) for row in revoked], len(rows) - len(revoked)
+
+    async def archive_inactive(self, deactivated_before: datetime, limit: int) -> int:
+        """Move up to ``limit`` configs deactivated before ``deactivated_before`` to the archive.
+
+        Keys and ``config_text`` are dropped on the way; one statement per batch.
+        """
+
+        query = """
+        WITH moved AS (
+            DELETE FROM wireguard_configs
+            WHERE id IN (
+                SELECT id
+                FROM wireguard_configs
+                WHERE NOT is_active AND deactivated_at < $1
+                ORDER BY deactivated_at
+                LIMIT $2
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, user_id, telegram_id, public_key, ip_address, mikrotik_peer_id, origin,
+                      created_at, deactivated_at
+        )
+        INSERT INTO wireguard_configs_archive
+            (id, user_id, telegram_id, public_key, ip_address, mikrotik_peer_id, origin, created_at, deactivated_at)
+        SELECT id, user_id, telegram_id, public_key, ip_address, mikrotik_peer_id, origin, created_at, deactivated_at
+        FROM moved
+        ON CONFLICT (id) DO NOTHING
+        """
+        async with self._pool.acquire() as conn:
+            status = await conn.execute(query, deactivated_before, limit)
+        return int(status.split()[-1])
+
     async def attach_mikrotik_peer(self, config_id: int, peer_id: str | None) -> None:
         query = "UPDATE wireguard_configs SET mikrotik_peer_id = $2 WHERE id = $1"
         async with self._pool.acquire() as conn:
             await conn.execute(query, config_id, peer_id)
 
+    async def set_document_file_id(self, config_id: int, file_id: str) -> None:
+        """Remember Telegram file_id of the uploaded .conf so later sends skip the upload."""
+
+        query = "UPDATE wireguard_configs SET document_file_id = $2 WHERE id = $1"
+        async with self._pool.acquire() as conn:
+            await conn.execute(query, config_id, file_id)
+
+    async def set_qr_file_id(self, config_id: int, file_id: str) -> None:
+        """Remember Telegram file_id of the uploaded QR photo."""
+
+        query = "UPDATE wireguard_configs SET qr_file_id = $2 WHERE id = $1"
+        async with self._pool.acquire() as conn:
+            await conn.execute(query, config_id, file_id)
+
     async def list_for_user(self, user_id: int) -> list[asyncpg.Record]:
         query = """
         SELECT id, host(ip_address) AS ip_address, is_active, created_at
@@ -4,24 +4,72 @@ from aiogram import Dispatcher
 
 from app.handlers.admin_menu import router as admin_menu_router
 from app.handlers.auth import router as auth_router
+from app.handlers.broadcast import router as broadcast_router
 from app.handlers.connections import router as connections_router
 from app.handlers.fallback import router as fallback_router
 from app.handlers.menu import router as menu_router
-from app.handlers.middlewares import AuthRequiredMiddleware
+from app.handlers.middlewares import (
+    AdmissionMiddleware,
+    AuthRequiredMiddleware,
+    RateLimitMiddleware,
+    ThrottlingMiddleware,
+    UpdateDedupMiddleware,
+    UpdateScheduler,
+)
+from app.services.last_seen import LastSeenTracker
+from app.utils.rate_limit import RateLimiter
 from app.utils.session import SessionManager
 
 
-def register_routers(dp: Dispatcher, session_manager: SessionManager) -> None:
+def register_routers(
+    dp: Dispatcher,
+    session_manager: SessionManager,
+    last_seen_tracker: LastSeenTracker | None = None,
+    rate_limiter: RateLimiter | None = None,
+    throttling: ThrottlingMiddleware | None = None,
+    update_dedup: UpdateDedupMiddleware | None = None,
+    scheduler: UpdateScheduler | None = None,
+    admission: AdmissionMiddleware | None = None,
+) -> None:
     """Include all command routers in dispatcher and apply middlewares."""
 
-    auth_required = AuthRequiredMiddleware(session_manager=session_manager)
+    routers = (
+        auth_router,
+        menu_router,
+        connections_router,
+        admin_menu_router,
+        broadcast_router,
+        fallback_router,
+    )
+
+    if update_dedup is not None:
+        dp.update.outer_middleware(update_dedup)
+
+    if throttling is not None:
+        dp.message.outer_middleware(throttling)
+        dp.callback_query.outer_middleware(throttling)
+
+    auth_required = AuthRequiredMiddleware(session_manager=session_manager, last_seen_tracker=last_seen_tracker)
     menu_router.message.middleware(auth_required)
     connections_router.message.middleware(auth_required)
+    connections_router.callback_query.middleware(auth_required)
     admin_menu_router.message.middleware(auth_required)
     admin_menu_router.callback_query.middleware(auth_required)
+    broadcast_router.message.middleware(auth_required)
+    broadcast_router.callback_query.middleware(auth_required)
+
+    if rate_limiter is not None:
+        rate_limit = RateLimitMiddleware(limiter=rate_limiter)
+        connections_router.message.middleware(rate_limit)
+        connections_router.callback_query.middleware(rate_limit)
+
+    # Last in the chain: rejected requests never wait, and queued provisioning
+    # jobs do not hold a global handler slot while waiting for admission.
+    if admission is not None:
+        connections_router.message.middleware(admission)
+        connections_router.callback_query.middleware(admission)
+    if scheduler is not None:
+        scheduler.setup(dp, routers)
 
-    dp.include_router(auth_router)
-    dp.include_router(menu_router)
-    dp.include_router(connections_router)
-    dp.include_router(admin_menu_router)
-    dp.include_router(fallback_router)
+    for router in routers:
+        dp.include_router(router)
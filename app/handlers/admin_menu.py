@@ -1,16 +1,46 @@
 """Admin menu handlers for reply keyboard admin actions."""
 
+import html
+
 from aiogram import F, Router
-from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import Command, CommandObject
+from aiogram.types import CallbackQuery, FSInputFile, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
-from app.database.repositories import LogsRepository, UsersRepository
+from app.database.repositories import (
+    EXPORT_DATASETS,
+    LogsRepository,
+    Page,
+    PageCursor,
+    SubscriptionsRepository,
+    UsersRepository,
+    parse_telegram_id,
+)
 from app.handlers.connections import run_mikrotik_test
-from app.services.mikrotik_service import MikroTikService
+from app.services.access_admin import AccessAdminService, format_bulk_result
+from app.services.export import EXPORT_FORMATS, ExportService
+from app.services.mikrotik_service import MikroTikClientError, MikroTikService
+from app.services.peer_import import PeerImportService
+from app.services.subscriptions import SubscriptionExpiryService, subscription_lapsed
+from app.ui.keyboards import pager_keyboard
 from app.ui.labels import BTN_AUDIT, BTN_MIKROTIK, BTN_REQUESTS, BTN_SETTINGS, BTN_USERS
+from app.utils.concurrency import handler_priority
+from app.utils.logging_compat import get_logger
+from app.utils.metrics import metrics
 
 router = Router(name="admin_menu")
+logger = get_logger(__name__)
 
 _ADMIN_ONLY_MESSAGE = "Доступно только администраторам"
+_PAGE_SIZE = 20
+_REQUESTS_PAGE_SIZE = 10
+_METRICS_TEXT_LIMIT = 3500
+_MAX_SUBSCRIPTION_DAYS = 3650
+_TELEGRAM_UPLOAD_LIMIT = 50 * 1024 * 1024
+_EXPORT_USAGE = (
+    "Использование: /export <users|configs|audit> [csv|jsonl|zip]\n"
+    "zip — архив .conf файлов активных конфигов (только superadmin)."
+)
 
 
 def _is_admin(role: str) -> bool:
@@ -25,72 +55,164 @@ async def mikrotik_from_menu(message: Message, session_role: str, mikrotik_servi
     await run_mikrotik_test(message, session_role, mikrotik_service)
 
 
-@router.message(F.text == BTN_AUDIT)
-async def audit_from_menu(message: Message, session_role: str, logs_repo: LogsRepository) -> None:
-    if not _is_admin(session_role):
-        await message.answer(_ADMIN_ONLY_MESSAGE)
-        return
+def _user_line(row) -> str:
+    username = html.escape(row["username"] or "-")
+    return f"• {row['telegram_id']} | @{username} | {row['role']} | {row['access_status']}"
+
+
+def _page_cursors(page: Page) -> tuple[str | None, str | None]:
+    prev_cursor = page.first.encode() if page.has_prev and page.first is not None else None
+    next_cursor = page.last.encode() if page.has_next and page.last is not None else None
+    return prev_cursor, next_cursor
 
-    rows = await logs_repo.list_recent(limit=20)
-    if not rows:
-        await message.answer("Журнал пока пуст.")
-        return
 
-    lines = ["🧾 Последние 20 событий:"]
-    for row in rows:
+def _render_audit_page(page: Page) -> tuple[str, InlineKeyboardMarkup | None]:
+    if not page.rows:
+        return "Журнал пока пуст.", None
+    lines = ["🧾 Журнал событий:"]
+    for row in page.rows:
         lines.append(
-            f"• #{row['id']} | {row['event_type']} | user_id={row['user_id'] or '-'} | {row['created_at']}"
+            f"• #{row['id']} | {html.escape(row['event_type'])} | user_id={row['user_id'] or '-'} | {row['created_at']}"
         )
-    await message.answer("\n".join(lines))
+    return "\n".join(lines), pager_keyboard("audit", *_page_cursors(page))
 
 
-@router.message(F.text == BTN_REQUESTS)
-async def requests_from_menu(message: Message, session_role: str, users_repo: UsersRepository) -> None:
-    if not _is_admin(session_role):
-        await message.answer(_ADMIN_ONLY_MESSAGE)
-        return
+def _render_users_page(page: Page) -> tuple[str, InlineKeyboardMarkup | None]:
+    if not page.rows:
+        return "Пользователи не найдены.", None
+    lines = ["👥 Пользователи:"]
+    lines.extend(_user_line(row) for row in page.rows)
+    return "\n".join(lines), pager_keyboard("users", *_page_cursors(page))
 
-    pending = await users_repo.list_pending()
-    if not pending:
-        await message.answer("Нет заявок в статусе pending.")
-        return
 
-    await message.answer(f"Найдено заявок: {len(pending)}")
-    for row in pending:
+def _render_requests_page(page: Page, total: int) -> tuple[str, InlineKeyboardMarkup | None]:
+    if not page.rows:
+        return "Нет заявок в статусе pending.", None
+    lines = [f"🧑‍💼 Заявки (всего: {total})"]
+    buttons: list[list[InlineKeyboardButton]] = []
+    for row in page.rows:
         telegram_id = int(row["telegram_id"])
-        username = row["username"] or "(без username)"
-        full_name = row["full_name"] or "(без имени)"
-        kb = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(text="✅ Approve", callback_data=f"admin:approve:{telegram_id}"),
-                    InlineKeyboardButton(text="⛔ Reject", callback_data=f"admin:reject:{telegram_id}"),
-                ]
+        username = html.escape(row["username"] or "(без username)")
+        full_name = html.escape(row["full_name"] or "(без имени)")
+        lines.append(f"• {telegram_id} | {username} | {full_name}")
+        buttons.append(
+            [
+                InlineKeyboardButton(text=f"✅ {telegram_id}", callback_data=f"admin:approve:{telegram_id}"),
+                InlineKeyboardButton(text=f"⛔ {telegram_id}", callback_data=f"admin:reject:{telegram_id}"),
             ]
         )
-        await message.answer(
-            f"🧑‍💼 Заявка\nID: {telegram_id}\nUsername: {username}\nИмя: {full_name}",
-            reply_markup=kb,
+    if len(page.rows) > 1 and page.first is not None:
+        start = page.first.encode()
+        buttons.append(
+            [
+                InlineKeyboardButton(
+                    text=f"✅ Все на странице ({len(page.rows)})", callback_data=f"admin:bulk:approve:{start}"
+                ),
+                InlineKeyboardButton(text="⛔ Отклонить все", callback_data=f"admin:bulk:reject:{start}"),
+            ]
         )
+    return "\n".join(lines), pager_keyboard("requests", *_page_cursors(page), buttons)
+
+
+async def _build_page(
+    section: str,
+    users_repo: UsersRepository,
+    logs_repo: LogsRepository,
+    cursor: PageCursor | None = None,
+    *,
+    backward: bool = False,
+) -> tuple[str, InlineKeyboardMarkup | None]:
+    if section == "audit":
+        page = await logs_repo.list_page(cursor, backward=backward, limit=_PAGE_SIZE)
+        if not page.rows and cursor is not None:
+            page = await logs_repo.list_page(limit=_PAGE_SIZE)
+        return _render_audit_page(page)
+
+    if section == "users":
+        page = await users_repo.list_page(cursor, backward=backward, limit=_PAGE_SIZE)
+        if not page.rows and cursor is not None:
+            page = await users_repo.list_page(limit=_PAGE_SIZE)
+        return _render_users_page(page)
+
+    page = await users_repo.list_pending_page(cursor, backward=backward, limit=_REQUESTS_PAGE_SIZE)
+    if not page.rows and cursor is not None:
+        page = await users_repo.list_pending_page(limit=_REQUESTS_PAGE_SIZE)
+    total = await users_repo.count_pending() if page.rows else 0
+    return _render_requests_page(page, total)
+
+
+@router.message(F.text == BTN_AUDIT)
+async def audit_from_menu(
+    message: Message,
+    session_role: str,
+    users_repo: UsersRepository,
+    logs_repo: LogsRepository,
+) -> None:
+    if not _is_admin(session_role):
+        await message.answer(_ADMIN_ONLY_MESSAGE)
+        return
+
+    text, keyboard = await _build_page("audit", users_repo, logs_repo)
+    await message.answer(text, reply_markup=keyboard)
+
+
+@router.message(F.text == BTN_REQUESTS)
+async def requests_from_menu(
+    message: Message,
+    session_role: str,
+    users_repo: UsersRepository,
+    logs_repo: LogsRepository,
+) -> None:
+    if not _is_admin(session_role):
+        await message.answer(_ADMIN_ONLY_MESSAGE)
+        return
+
+    text, keyboard = await _build_page("requests", users_repo, logs_repo)
+    await message.answer(text, reply_markup=keyboard)
 
 
 @router.message(F.text == BTN_USERS)
-async def users_from_menu(message: Message, session_role: str, users_repo: UsersRepository) -> None:
+async def users_from_menu(
+    message: Message,
+    session_role: str,
+    users_repo: UsersRepository,
+    logs_repo: LogsRepository,
+) -> None:
     if not _is_admin(session_role):
         await message.answer(_ADMIN_ONLY_MESSAGE)
         return
 
-    rows = await users_repo.list_recent(limit=20)
-    if not rows:
-        await message.answer("Пользователи не найдены.")
+    text, keyboard = await _build_page("users", users_repo, logs_repo)
+    await message.answer(text, reply_markup=keyboard)
+
+
+@router.callback_query(F.data.regexp(r"^page:(users|audit|requests):(next|prev):\d+\.\d+$"))
+async def turn_page(
+    callback: CallbackQuery,
+    session_role: str,
+    users_repo: UsersRepository,
+    logs_repo: LogsRepository,
+) -> None:
+    if callback.data is None:
+        return
+    if not _is_admin(session_role):
+        await callback.answer(_ADMIN_ONLY_MESSAGE, show_alert=True)
         return
 
-    lines = ["👥 Последние пользователи:"]
-    for row in rows:
-        lines.append(
-            f"• {row['telegram_id']} | @{row['username'] or '-'} | {row['role']} | {row['access_status']}"
-        )
-    await message.answer("\n".join(lines))
+    _, section, direction, raw_cursor = callback.data.split(":", 3)
+    text, keyboard = await _build_page(
+        section,
+        users_repo,
+        logs_repo,
+        PageCursor.decode(raw_cursor),
+        backward=direction == "prev",
+    )
+    if callback.message is not None:
+        try:
+            await callback.message.edit_text(text, reply_markup=keyboard)
+        except TelegramBadRequest:
+            logger.info("Admin page was not modified", section=section)
+    await callback.answer()
 
 
 @router.message(F.text.regexp(r"^/users\s+.+"))
@@ -108,13 +230,132 @@ async def users_search(message: Message, session_role: str, users_repo: UsersRep
         return
 
     lines = [f"🔎 Найдено: {len(rows)}"]
-    for row in rows:
-        lines.append(
-            f"• {row['telegram_id']} | @{row['username'] or '-'} | {row['role']} | {row['access_status']}"
-        )
+    lines.extend(_user_line(row) for row in rows)
     await message.answer("\n".join(lines))
 
 
+@router.message(Command("metrics"))
+async def metrics_command(message: Message, session_role: str) -> None:
+    if not _is_admin(session_role):
+        await message.answer(_ADMIN_ONLY_MESSAGE)
+        return
+
+    rendered = metrics.render_text() or "Метрики пока не собраны."
+    await message.answer(f"<pre>{html.escape(rendered[:_METRICS_TEXT_LIMIT])}</pre>")
+
+
+@router.message(Command("export"))
+@handler_priority("low")
+async def export_command(
+    message: Message,
+    command: CommandObject,
+    session_role: str,
+    export_service: ExportService,
+) -> None:
+    if not _is_admin(session_role):
+        await message.answer(_ADMIN_ONLY_MESSAGE)
+        return
+
+    args = (command.args or "").lower().split()
+    dataset = args[0] if args else ""
+    fmt = args[1] if len(args) > 1 else "csv"
+    if dataset not in EXPORT_DATASETS or fmt not in EXPORT_FORMATS or (fmt == "zip" and dataset != "configs"):
+        await message.answer(html.escape(_EXPORT_USAGE))
+        return
+    if fmt == "zip" and session_role != "superadmin":
+        await message.answer("Выгрузка ключей доступна только superadmin.")
+        return
+
+    await message.answer("⏳ Готовлю выгрузку…")
+    result = await export_service.export(dataset, fmt)
+    try:
+        if result.size_bytes > _TELEGRAM_UPLOAD_LIMIT:
+            await message.answer(
+                f"Файл слишком большой для Telegram ({result.size_bytes // (1024 * 1024)} МБ). "
+                "Выгрузи данные напрямую из базы."
+            )
+            return
+        await message.answer_document(
+            FSInputFile(result.path, filename=result.filename),
+            caption=f"📦 {dataset}: {result.rows} строк",
+        )
+    finally:
+        result.path.unlink(missing_ok=True)
+
+
+@router.message(Command("import_peers"))
+@handler_priority("low")
+async def import_peers_command(
+    message: Message,
+    command: CommandObject,
+    session_role: str,
+    peer_import_service: PeerImportService,
+) -> None:
+    if session_role != "superadmin":
+        await message.answer("Импорт пиров доступен только superadmin.")
+        return
+
+    apply = (command.args or "").strip().lower() == "apply"
+    try:
+        summary = await peer_import_service.run(apply=apply)
+    except MikroTikClientError:
+        logger.exception("Peer import failed")
+        await message.answer("Не удалось получить список пиров с MikroTik.")
+        return
+
+    footer = "✅ Изменения применены." if apply else "Это предпросмотр. Чтобы применить: /import_peers apply"
+    await message.answer(
+        f"📥 Импорт пиров MikroTik\n"
+        f"Пиров в сети бота: {summary.peers} (пропущено: {summary.skipped})\n"
+        f"Привязано к пользователям: {summary.adopted}\n"
+        f"Зарезервировано IP: {summary.reserved}\n"
+        f"Снято резервов: {summary.released}\n\n"
+        f"{footer}"
+    )
+
+
+@router.message(Command("sub"))
+async def subscription_command(
+    message: Message,
+    command: CommandObject,
+    session_role: str,
+    users_repo: UsersRepository,
+    subscriptions_repo: SubscriptionsRepository,
+    subscription_service: SubscriptionExpiryService,
+) -> None:
+    if not _is_admin(session_role):
+        await message.answer(_ADMIN_ONLY_MESSAGE)
+        return
+
+    args = (command.args or "").split()
+    parsed = [parse_telegram_id(arg) for arg in args]
+    if not args or len(args) > 2 or None in parsed:
+        await message.answer("Использование: /sub [telegram_id] — статус, /sub [telegram_id] [дней] — продлить")
+        return
+    telegram_id = int(args[0])
+
+    if len(args) == 2:
+        days = int(args[1])
+        if not 1 <= days <= _MAX_SUBSCRIPTION_DAYS:
+            await message.answer(f"Срок должен быть от 1 до {_MAX_SUBSCRIPTION_DAYS} дней.")
+            return
+        subscription = await subscriptions_repo.grant(telegram_id, days)
+        if subscription is None:
+            await message.answer("Пользователь не найден.")
+            return
+        subscription_service.schedule(subscription)
+        await message.answer(f"✅ Подписка {telegram_id} активна до {subscription.expires_at:%d.%m.%Y %H:%M} UTC")
+        return
+
+    user = await users_repo.get_by_telegram_id(telegram_id)
+    subscription = await subscriptions_repo.get_latest(user.id) if user is not None else None
+    if subscription is None:
+        await message.answer("Подписки нет: доступ не ограничен сроком.")
+        return
+    state = "истекла" if subscription_lapsed(subscription) else "активна"
+    await message.answer(f"Подписка {telegram_id} {state}, срок: {subscription.expires_at:%d.%m.%Y %H:%M} UTC")
+
+
 @router.message(F.text == BTN_SETTINGS)
 async def settings_from_menu(message: Message, session_role: str) -> None:
     if session_role != "superadmin":
@@ -124,19 +365,37 @@ async def settings_from_menu(message: Message, session_role: str) -> None:
 
 
 @router.callback_query(F.data.regexp(r"^admin:(approve|reject):\d+$"))
-async def process_request_action(callback: CallbackQuery, session_role: str, users_repo: UsersRepository) -> None:
-    if callback.data is None:
+@router.callback_query(F.data.regexp(r"^admin:bulk:(approve|reject):\d+\.\d+$"))
+async def process_request_action(
+    callback: CallbackQuery,
+    session_role: str,
+    users_repo: UsersRepository,
+    access_admin_service: AccessAdminService,
+) -> None:
+    if callback.data is None or callback.from_user is None:
         return
     if not _is_admin(session_role):
         await callback.answer(_ADMIN_ONLY_MESSAGE, show_alert=True)
         return
 
-    action, telegram_id_raw = callback.data.split(":")[1:]
-    target_telegram_id = int(telegram_id_raw)
-    new_status = "approved" if action == "approve" else "blocked"
-    await users_repo.set_access_status(target_telegram_id, new_status)
+    parts = callback.data.split(":")
+    if parts[1] == "bulk":
+        action = parts[2]
+        # Reload the page from its first row: requests handled since then drop out.
+        targets = await users_repo.list_pending_ids_from(PageCursor.decode(parts[3]), limit=_REQUESTS_PAGE_SIZE)
+    else:
+        action = parts[1]
+        targets = [int(parts[2])]
+    if not targets:
+        await callback.answer("Список заявок пуст.", show_alert=True)
+        return
 
+    result = await access_admin_service.apply(
+        callback.from_user.id,
+        targets,
+        "approved" if action == "approve" else "blocked",
+        bot=callback.bot,
+    )
     if callback.message is not None:
-        text_status = "одобрена" if action == "approve" else "отклонена"
-        await callback.message.answer(f"Заявка {target_telegram_id} {text_status}.")
+        await callback.message.answer(format_bulk_result(result))
     await callback.answer("Готово")
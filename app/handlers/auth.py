@@ -1,17 +1,20 @@
 """Authentication handlers with PIN and RBAC-aware menus."""
 
 from aiogram import F, Router
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message
 
-from app.database.repositories import UsersRepository
+from app.database.repositories import parse_telegram_id
+from app.services.access_admin import ACCESS_ACTIONS, AccessAdminService, format_bulk_result
 from app.services.auth_service import AuthService
+from app.services.last_seen import LastSeenTracker
 from app.ui import texts
 from app.ui.keyboards import main_menu
 from app.ui.labels import BTN_LOGIN
 from app.utils.logging_compat import get_logger
+from app.utils.outbound import fire_and_forget
 
 router = Router(name="auth")
 logger = get_logger(__name__)
@@ -29,32 +32,37 @@ async def _notify_admins_about_pending(message: Message, auth_service: AuthServi
     if message.bot is None or message.from_user is None:
         return
 
+    username = f"@{message.from_user.username}" if message.from_user.username else "(нет username)"
+    text = (
+        "🔔 Запрос доступа к VPN\n"
+        f"👤 Имя: {message.from_user.full_name}\n"
+        f"🔗 Username: {username}\n"
+        f"🆔 Telegram ID: {message.from_user.id}\n\n"
+        f"Для выдачи: /approve {message.from_user.id}\n"
+        f"Для блокировки: /block {message.from_user.id}"
+    )
     for admin_id in auth_service.admin_ids | auth_service.superadmin_ids:
         if admin_id == message.from_user.id:
             continue
-        username = f"@{message.from_user.username}" if message.from_user.username else "(нет username)"
-        await message.bot.send_message(
-            admin_id,
-            "🔔 Запрос доступа к VPN\n"
-            f"👤 Имя: {message.from_user.full_name}\n"
-            f"🔗 Username: {username}\n"
-            f"🆔 Telegram ID: {message.from_user.id}\n\n"
-            f"Для выдачи: /approve {message.from_user.id}\n"
-            f"Для блокировки: /block {message.from_user.id}",
-        )
-
-
-async def _show_main_menu(message: Message, state: FSMContext, auth_service: AuthService) -> None:
+        fire_and_forget(message.bot.send_message(admin_id, text), f"pending-notice:{admin_id}")
+
+
+async def _show_main_menu(
+    message: Message,
+    state: FSMContext,
+    auth_service: AuthService,
+    last_seen_tracker: LastSeenTracker,
+) -> None:
     if message.from_user is None:
         return
 
-    user = await auth_service.register_if_absent(
+    last_seen_tracker.touch(message.from_user.id)
+
+    user = await auth_service.register_or_refresh(
         telegram_id=message.from_user.id,
         username=message.from_user.username,
         full_name=message.from_user.full_name,
     )
-    user = await auth_service.sync_user_role(user)
-    await auth_service.users_repo.touch_last_seen(message.from_user.id)
 
     if not user.pin_verified:
         await state.set_state(AuthStates.waiting_for_pin)
@@ -62,7 +70,7 @@ async def _show_main_menu(message: Message, state: FSMContext, auth_service: Aut
         return
 
     await state.clear()
-    await auth_service.sessions.create_session(user.telegram_id, user.role)
+    await auth_service.start_session(user)
     await message.answer(
         f"Вы вошли как: {user.role.upper()}\nВыбери действие в меню 👇",
         reply_markup=main_menu(user.role),
@@ -70,13 +78,23 @@ async def _show_main_menu(message: Message, state: FSMContext, auth_service: Aut
 
 
 @router.message(Command("start"))
-async def cmd_start(message: Message, state: FSMContext, auth_service: AuthService) -> None:
-    await _show_main_menu(message, state, auth_service)
+async def cmd_start(
+    message: Message,
+    state: FSMContext,
+    auth_service: AuthService,
+    last_seen_tracker: LastSeenTracker,
+) -> None:
+    await _show_main_menu(message, state, auth_service, last_seen_tracker)
 
 
 @router.message(Command("menu"))
-async def cmd_menu(message: Message, state: FSMContext, auth_service: AuthService) -> None:
-    await _show_main_menu(message, state, auth_service)
+async def cmd_menu(
+    message: Message,
+    state: FSMContext,
+    auth_service: AuthService,
+    last_seen_tracker: LastSeenTracker,
+) -> None:
+    await _show_main_menu(message, state, auth_service, last_seen_tracker)
 
 
 @router.message(Command("login"))
@@ -96,15 +114,14 @@ async def process_pin(message: Message, state: FSMContext, auth_service: AuthSer
     if message.from_user is None or message.text is None:
         return
 
-    user = await auth_service.register_if_absent(
+    user = await auth_service.register_or_refresh(
         telegram_id=message.from_user.id,
         username=message.from_user.username,
         full_name=message.from_user.full_name,
     )
-    user = await auth_service.sync_user_role(user)
 
-    pin_ok, user = await auth_service.check_pin(message.from_user.id, message.text.strip())
-    if not pin_ok or user is None:
+    pin_ok = await auth_service.check_user_pin(user, message.text.strip())
+    if not pin_ok:
         await message.answer(texts.PIN_INVALID)
         return
 
@@ -124,41 +141,37 @@ async def process_pin(message: Message, state: FSMContext, auth_service: AuthSer
     await message.answer(texts.PIN_APPROVED, reply_markup=main_menu(user.role))
 
 
-@router.message(Command("approve"))
-async def cmd_approve(message: Message, users_repo: UsersRepository, auth_service: AuthService) -> None:
-    if message.from_user is None or message.text is None:
-        return
-    if auth_service.resolve_role(message.from_user.id) not in {"admin", "superadmin"}:
-        await message.answer("Команда только для админа.")
-        return
-    parts = message.text.split(maxsplit=1)
-    if len(parts) < 2 or not parts[1].isdigit():
-        await message.answer("Использование: /approve [telegram_id]")
-        return
-    target = int(parts[1])
-    await users_repo.set_access_status(target, "approved")
-    await message.answer(f"✅ Доступ выдан: {target}")
-    try:
-        await message.bot.send_message(target, texts.PIN_APPROVED)
-    except Exception:  # noqa: BLE001
-        logger.warning("Failed to notify approved user", telegram_id=target)
+def _parse_targets(args: str | None) -> list[int] | None:
+    targets: list[int] = []
+    for token in (args or "").replace(",", " ").split():
+        telegram_id = parse_telegram_id(token)
+        if telegram_id is None:
+            return None
+        targets.append(telegram_id)
+    return targets or None
 
 
-@router.message(Command("block"))
-async def cmd_block(message: Message, users_repo: UsersRepository, auth_service: AuthService) -> None:
-    if message.from_user is None or message.text is None:
+@router.message(Command("approve", "block"))
+async def cmd_set_access(
+    message: Message,
+    command: CommandObject,
+    auth_service: AuthService,
+    access_admin_service: AccessAdminService,
+) -> None:
+    if message.from_user is None:
         return
     if auth_service.resolve_role(message.from_user.id) not in {"admin", "superadmin"}:
         await message.answer("Команда только для админа.")
         return
-    parts = message.text.split(maxsplit=1)
-    if len(parts) < 2 or not parts[1].isdigit():
-        await message.answer("Использование: /block [telegram_id]")
+    targets = _parse_targets(command.args)
+    if targets is None:
+        await message.answer(f"Использование: /{command.command} [telegram_id] [telegram_id ...]")
         return
-    target = int(parts[1])
-    await users_repo.set_access_status(target, "blocked")
-    await message.answer(f"⛔ Пользователь заблокирован: {target}")
-    try:
-        await message.bot.send_message(target, "⛔ Доступ к VPN заблокирован администратором.")
-    except Exception:  # noqa: BLE001
-        logger.warning("Failed to notify blocked user", telegram_id=target)
+
+    result = await access_admin_service.apply(
+        message.from_user.id,
+        targets,
+        ACCESS_ACTIONS[command.command],
+        bot=message.bot,
+    )
+    await message.answer(format_bulk_result(result))
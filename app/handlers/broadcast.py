@@ -0,0 +1,141 @@
+"""Admin broadcast flow: compose text, pick audience, start and stop jobs."""
+
+import html
+
+from aiogram import F, Router
+from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import CallbackQuery, Message
+
+from app.database.repositories import BROADCAST_AUDIENCES, BroadcastJob, BroadcastsRepository
+from app.services.broadcast import BroadcastService
+from app.ui.keyboards import broadcast_audience_keyboard, broadcast_jobs_keyboard
+from app.ui.labels import BTN_BROADCAST
+
+router = Router(name="broadcast")
+
+_ADMIN_ONLY_MESSAGE = "Доступно только администраторам"
+_MAX_TEXT_LENGTH = 4000
+_STATUS_LABELS = {"pending": "в очереди", "running": "идёт", "done": "завершена", "cancelled": "отменена"}
+
+
+class BroadcastStates(StatesGroup):
+    waiting_for_text = State()
+    waiting_for_audience = State()
+
+
+def _is_admin(role: str) -> bool:
+    return role in {"admin", "superadmin"}
+
+
+def _job_line(job: BroadcastJob) -> str:
+    return (
+        f"• #{job.id} | {_STATUS_LABELS.get(job.status, job.status)} | {job.audience} | "
+        f"✅ {job.sent_count} ⚠️ {job.failed_count}"
+    )
+
+
+@router.message(F.text == BTN_BROADCAST)
+async def broadcast_menu(
+    message: Message,
+    state: FSMContext,
+    session_role: str,
+    broadcasts_repo: BroadcastsRepository,
+) -> None:
+    if not _is_admin(session_role):
+        await message.answer(_ADMIN_ONLY_MESSAGE)
+        return
+
+    jobs = await broadcasts_repo.list_recent()
+    if jobs:
+        lines = ["📣 Последние рассылки:"]
+        lines.extend(_job_line(job) for job in jobs)
+        running = [job.id for job in jobs if not job.is_finished]
+        await message.answer("\n".join(lines), reply_markup=broadcast_jobs_keyboard(running))
+
+    await state.set_state(BroadcastStates.waiting_for_text)
+    await message.answer("✍️ Отправь текст рассылки одним сообщением или /cancel для отмены.")
+
+
+@router.message(BroadcastStates.waiting_for_text, Command("cancel"))
+@router.message(BroadcastStates.waiting_for_audience, Command("cancel"))
+async def broadcast_cancel_compose(message: Message, state: FSMContext) -> None:
+    await state.clear()
+    await message.answer("Рассылка отменена.")
+
+
+@router.message(BroadcastStates.waiting_for_text, F.text)
+async def broadcast_text(
+    message: Message,
+    state: FSMContext,
+    session_role: str,
+    broadcasts_repo: BroadcastsRepository,
+) -> None:
+    if message.text is None:
+        return
+    if not _is_admin(session_role):
+        await state.clear()
+        await message.answer(_ADMIN_ONLY_MESSAGE)
+        return
+    if len(message.text) > _MAX_TEXT_LENGTH:
+        await message.answer(f"Текст слишком длинный (максимум {_MAX_TEXT_LENGTH} символов).")
+        return
+
+    await state.update_data(broadcast_text=message.text)
+    await state.set_state(BroadcastStates.waiting_for_audience)
+    counts = {audience: await broadcasts_repo.count_recipients(audience) for audience in BROADCAST_AUDIENCES}
+    await message.answer(
+        f"Предпросмотр:\n\n{html.escape(message.text)}\n\nКому отправить?",
+        reply_markup=broadcast_audience_keyboard(counts),
+    )
+
+
+@router.callback_query(BroadcastStates.waiting_for_audience, F.data.regexp(r"^broadcast:send:(all|approved)$"))
+async def broadcast_start(
+    callback: CallbackQuery,
+    state: FSMContext,
+    session_role: str,
+    broadcast_service: BroadcastService,
+) -> None:
+    if callback.data is None or callback.from_user is None:
+        return
+    if not _is_admin(session_role):
+        await callback.answer(_ADMIN_ONLY_MESSAGE, show_alert=True)
+        return
+
+    text = (await state.get_data()).get("broadcast_text")
+    await state.clear()
+    if not text:
+        await callback.answer("Черновик рассылки устарел, начни заново.", show_alert=True)
+        return
+
+    audience = callback.data.rsplit(":", 1)[1]
+    job = await broadcast_service.start(callback.from_user.id, audience, text)
+    if callback.message is not None:
+        await callback.message.edit_text(
+            f"📣 Рассылка #{job.id} запущена. Итог пришлю отдельным сообщением.",
+            reply_markup=broadcast_jobs_keyboard([job.id]),
+        )
+    await callback.answer()
+
+
+@router.callback_query(F.data == "broadcast:abort")
+async def broadcast_abort(callback: CallbackQuery, state: FSMContext) -> None:
+    await state.clear()
+    if callback.message is not None:
+        await callback.message.edit_text("Рассылка отменена.")
+    await callback.answer()
+
+
+@router.callback_query(F.data.regexp(r"^broadcast:stop:\d+$"))
+async def broadcast_stop(callback: CallbackQuery, session_role: str, broadcast_service: BroadcastService) -> None:
+    if callback.data is None:
+        return
+    if not _is_admin(session_role):
+        await callback.answer(_ADMIN_ONLY_MESSAGE, show_alert=True)
+        return
+
+    job_id = int(callback.data.rsplit(":", 1)[1])
+    stopped = await broadcast_service.cancel(job_id)
+    await callback.answer(f"Рассылка #{job_id} остановлена." if stopped else "Рассылка уже завершена.")
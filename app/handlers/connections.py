@@ -1,27 +1,39 @@
 """Handlers for creating and viewing user WireGuard connections."""
 
-import io
+from typing import Any
 
 from aiogram import F, Router
 from aiogram.filters import Command
-from aiogram.types import CallbackQuery, Message
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile, CallbackQuery, Message
 
 from app.database.repositories import (
     DuplicateIPAddressError,
     LogsRepository,
+    SubscriptionsRepository,
     UsersRepository,
     WireGuardConfigsRepository,
 )
 from app.services.mikrotik_service import MikroTikClientError, MikroTikService
-from app.services.wireguard_service import WireGuardCredentials, WireGuardService
+from app.services.qr_service import QrService
+from app.services.subscriptions import subscription_lapsed
+from app.services.wireguard_service import WireGuardService
 from app.ui import texts
 from app.ui.keyboards import reissue_confirm_keyboard
 from app.ui.labels import BTN_REISSUE, BTN_STATUS, BTN_VPN_REQUEST
+from app.utils.admission import admission
+from app.utils.concurrency import handler_priority
+from app.utils.idempotency import SingleFlight, SingleFlightBusy
 from app.utils.logging_compat import get_logger
+from app.utils.metrics import metrics
+from app.utils.rate_limit import rate_limited
+from app.utils.session import SessionInfo
 
 router = Router(name="connections")
 logger = get_logger(__name__)
 
+_CAPTION_LIMIT = 1024
+
 
 async def _ensure_peer(
     user_id: int,
@@ -32,6 +44,7 @@ async def _ensure_peer(
     preshared_key: str,
     mikrotik_service: MikroTikService,
     logs_repo: LogsRepository,
+    existing_peer_id: str | None = None,
 ) -> str | None:
     try:
         action, peer_id = await mikrotik_service.ensure_wireguard_peer(
@@ -40,6 +53,7 @@ async def _ensure_peer(
             public_key=public_key,
             ip_address=ip_address,
             preshared_key=preshared_key,
+            peer_id=existing_peer_id,
         )
         await logs_repo.add(
             event_type=f"mikrotik_peer_{action}",
@@ -57,18 +71,156 @@ async def _ensure_peer(
         return None
 
 
-async def _send_config(message: Message, telegram_id: int, config_text: str) -> None:
-    await message.answer(texts.VPN_FILE_READY)
-    filename = f"wg_{telegram_id}_{abs(hash(config_text)) % 100000}.conf"
-    file_bytes = io.BytesIO(config_text.encode("utf-8"))
-    file_bytes.name = filename
-    await message.answer_document(document=file_bytes, caption="WireGuard config")
-    await message.answer(texts.VPN_TEXT.format(config=config_text))
-    await message.answer(texts.VPN_WARNING)
+async def _sync_peer(
+    user_id: int,
+    telegram_id: int,
+    config_id: int,
+    ip_address: str,
+    public_key: str,
+    preshared_key: str,
+    mikrotik_service: MikroTikService,
+    logs_repo: LogsRepository,
+    existing_peer_id: str | None = None,
+) -> str | None:
+    if not mikrotik_service.settings.mikrotik_enabled:
+        return None
+    return await _ensure_peer(
+        user_id=user_id,
+        telegram_id=telegram_id,
+        config_id=config_id,
+        ip_address=ip_address,
+        public_key=public_key,
+        preshared_key=preshared_key,
+        mikrotik_service=mikrotik_service,
+        logs_repo=logs_repo,
+        existing_peer_id=existing_peer_id,
+    )
+
+
+def _peer_failed(peer_id: str | None, mikrotik_service: MikroTikService) -> bool:
+    settings = mikrotik_service.settings
+    return settings.mikrotik_enabled and peer_id is None and not settings.mikrotik_dry_run
+
+
+async def _resolve_access(
+    telegram_id: int,
+    session: SessionInfo | None,
+    users_repo: UsersRepository,
+) -> tuple[int, str] | None:
+    """Return (user_id, access_status), preferring the session snapshot over a DB read."""
+
+    if session is not None and session.user_id is not None and session.access_status is not None:
+        return session.user_id, session.access_status
+    user = await users_repo.get_by_telegram_id(telegram_id)
+    if user is None:
+        return None
+    return user.id, user.access_status
+
+
+async def _send_qr(
+    message: Message,
+    wg_repo: WireGuardConfigsRepository,
+    qr_service: QrService,
+    *,
+    config_id: int,
+    telegram_id: int,
+    config_text: str,
+    file_id: str | None,
+    caption: str,
+) -> bool:
+    """Send the config as a QR photo; False if the config does not fit into a QR code."""
+
+    key = qr_service.key(config_text)
+    file_id = file_id or qr_service.cached_file_id(key)
+    if file_id is not None:
+        try:
+            await message.answer_photo(photo=file_id, caption=caption)
+        except TelegramBadRequest:
+            logger.warning("Cached QR file_id rejected, uploading again", config_id=config_id)
+        else:
+            metrics.inc("config_qr_sent_total", source="file_id")
+            return True
+
+    image = await qr_service.image(config_text)
+    if image is None:
+        logger.warning("Config does not fit into a QR code", config_id=config_id)
+        return False
+    sent = await message.answer_photo(
+        photo=BufferedInputFile(image, filename=f"wg_{telegram_id}_{config_id}.png"),
+        caption=caption,
+    )
+    metrics.inc("config_qr_sent_total", source="upload")
+    if sent.photo:
+        uploaded_id = sent.photo[-1].file_id
+        qr_service.remember_file_id(key, uploaded_id)
+        await wg_repo.set_qr_file_id(config_id, uploaded_id)
+    return True
+
+
+async def _send_config(
+    message: Message,
+    wg_repo: WireGuardConfigsRepository,
+    *,
+    config_id: int,
+    telegram_id: int,
+    config_text: str,
+    file_id: str | None,
+    lead: str | None = None,
+    qr_service: QrService | None = None,
+    qr_file_id: str | None = None,
+) -> None:
+    """Deliver a config as one document plus one text message (or QR photo).
+
+    The first upload stores Telegram's file_id on the config row; repeat deliveries
+    send that id instead of uploading the file again. With QR codes enabled the
+    config text goes into the QR photo caption when it fits, so the number of sends
+    stays the same.
+    """
+
+    caption = "\n\n".join(part for part in (lead, texts.VPN_FILE_READY, texts.VPN_WARNING) if part)
+    if file_id is not None:
+        try:
+            await message.answer_document(document=file_id, caption=caption)
+        except TelegramBadRequest:
+            logger.warning("Cached config file_id rejected, uploading again", config_id=config_id)
+            file_id = None
+        else:
+            metrics.inc("config_documents_sent_total", source="file_id")
+
+    if file_id is None:
+        sent = await message.answer_document(
+            document=BufferedInputFile(config_text.encode("utf-8"), filename=f"wg_{telegram_id}_{config_id}.conf"),
+            caption=caption,
+        )
+        metrics.inc("config_documents_sent_total", source="upload")
+        if sent.document is not None:
+            await wg_repo.set_document_file_id(config_id, sent.document.file_id)
+
+    config_message = texts.VPN_TEXT.format(config=config_text)
+    if qr_service is not None:
+        qr_caption = f"{texts.VPN_QR}\n\n{config_message}"
+        text_in_caption = len(qr_caption) <= _CAPTION_LIMIT
+        sent_qr = await _send_qr(
+            message,
+            wg_repo,
+            qr_service,
+            config_id=config_id,
+            telegram_id=telegram_id,
+            config_text=config_text,
+            file_id=qr_file_id,
+            caption=qr_caption if text_in_caption else texts.VPN_QR,
+        )
+        if sent_qr and text_in_caption:
+            return
+
+    await message.answer(config_message)
 
 
 @router.message(Command("new_connection"))
 @router.message(F.text == BTN_VPN_REQUEST)
+@rate_limited("new_connection")
+@handler_priority("low")
+@admission("provisioning")
 async def cmd_new_connection(
     message: Message,
     users_repo: UsersRepository,
@@ -76,78 +228,118 @@ async def cmd_new_connection(
     wg_repo: WireGuardConfigsRepository,
     wg_service: WireGuardService,
     mikrotik_service: MikroTikService,
+    single_flight: SingleFlight,
+    subscriptions_repo: SubscriptionsRepository,
+    session: SessionInfo | None = None,
+    qr_service: QrService | None = None,
 ) -> None:
     if message.from_user is None:
         return
 
     telegram_id = message.from_user.id
-    user = await users_repo.get_by_telegram_id(telegram_id)
-    if user is None or user.access_status != "approved":
+    access = await _resolve_access(telegram_id, session, users_repo)
+    if access is None or access[1] != "approved":
         await message.answer(texts.PIN_PENDING)
         return
-
-    existing = await wg_repo.get_active_for_user(user.id)
-    if existing is not None:
-        await message.answer(texts.VPN_ALREADY_EXISTS)
-        await _send_config(message, telegram_id, str(existing["config_text"]))
+    user_id = access[0]
+    if subscription_lapsed(await subscriptions_repo.get_latest(user_id)):
+        await message.answer(texts.SUBSCRIPTION_EXPIRED)
         return
 
-    await message.answer(texts.VPN_PREPARE)
-
-    profile_cache: dict[str, WireGuardCredentials] = {}
+    async def provision() -> dict[str, Any]:
+        existing = await wg_repo.get_active_for_user(user_id)
+        if existing is not None and existing["origin"] == "imported":
+            return {"created": False, "imported": True}
+        if existing is not None:
+            return {
+                "created": False,
+                "config_id": int(existing["id"]),
+                "config_text": str(existing["config_text"]),
+                "file_id": existing["document_file_id"],
+                "qr_file_id": existing["qr_file_id"],
+                "peer_failed": False,
+            }
+
+        await message.answer(texts.VPN_PREPARE)
+
+        def build_profile(ip_address: str) -> tuple[str, str, str, str]:
+            creds = wg_service.generate_profile(ip_address=ip_address)
+            return creds.private_key, creds.public_key, creds.preshared_key, wg_service.render_config(creds)
 
-    def build_profile(ip_address: str) -> tuple[str, str, str, str]:
-        creds = wg_service.generate_profile(ip_address=ip_address)
-        profile_cache[ip_address] = creds
-        return creds.private_key, creds.public_key, creds.preshared_key, wg_service.render_config(creds)
-
-    try:
         config_id, ip_address, config_text, public_key, preshared_key = await wg_repo.allocate_and_create(
-            user_id=user.id,
+            user_id=user_id,
             telegram_id=telegram_id,
             network_cidr=wg_service.settings.wg_network_cidr,
             profile_builder=build_profile,
         )
+        peer_id = await _sync_peer(
+            user_id, telegram_id, config_id, ip_address, public_key, preshared_key, mikrotik_service, logs_repo
+        )
+        await wg_repo.attach_mikrotik_peer(config_id, peer_id)
+        return {
+            "created": True,
+            "config_id": config_id,
+            "config_text": config_text,
+            "file_id": None,
+            "qr_file_id": None,
+            "peer_failed": _peer_failed(peer_id, mikrotik_service),
+        }
+
+    try:
+        result, shared = await single_flight.run(f"new_connection:{telegram_id}", provision)
     except DuplicateIPAddressError:
         await message.answer("Не удалось выделить уникальный IP. Попробуйте снова.")
         return
+    except SingleFlightBusy:
+        await message.answer(texts.REQUEST_IN_PROGRESS)
+        return
 
-    peer_id = None
-    if mikrotik_service.settings.mikrotik_enabled:
-        peer_id = await _ensure_peer(
-            user_id=user.id,
-            telegram_id=telegram_id,
-            config_id=config_id,
-            ip_address=ip_address,
-            public_key=public_key,
-            preshared_key=preshared_key,
-            mikrotik_service=mikrotik_service,
-            logs_repo=logs_repo,
-        )
-    await wg_repo.attach_mikrotik_peer(config_id, peer_id)
-
-    if mikrotik_service.settings.mikrotik_enabled and peer_id is None and not mikrotik_service.settings.mikrotik_dry_run:
-        await message.answer(texts.MIKROTIK_FAIL)
-
-    await _send_config(message, telegram_id, config_text)
+    if shared:
+        await message.answer(texts.REQUEST_ALREADY_DONE)
+        return
+    if result.get("imported"):
+        await message.answer(texts.VPN_IMPORTED)
+        return
+    lead = None
+    if not result["created"]:
+        lead = texts.VPN_ALREADY_EXISTS
+    elif result["peer_failed"]:
+        lead = texts.MIKROTIK_FAIL
+    await _send_config(
+        message,
+        wg_repo,
+        config_id=result["config_id"],
+        telegram_id=telegram_id,
+        config_text=result["config_text"],
+        file_id=result["file_id"],
+        lead=lead,
+        qr_service=qr_service,
+        qr_file_id=result.get("qr_file_id"),
+    )
 
 
 @router.message(Command("my_connections"))
 @router.message(F.text == BTN_STATUS)
-async def my_status(message: Message, users_repo: UsersRepository, wg_repo: WireGuardConfigsRepository) -> None:
+async def my_status(
+    message: Message,
+    users_repo: UsersRepository,
+    wg_repo: WireGuardConfigsRepository,
+    session: SessionInfo | None = None,
+) -> None:
     if message.from_user is None:
         return
 
-    user = await users_repo.get_by_telegram_id(message.from_user.id)
-    if user is None:
+    access = await _resolve_access(message.from_user.id, session, users_repo)
+    if access is None:
         await message.answer("Пользователь не найден. Выполните /start")
         return
+    user_id, access_status = access
 
-    cfg = await wg_repo.get_active_for_user(user.id)
+    cfg = await wg_repo.get_active_for_user(user_id)
     vpn = "выдан" if cfg else "не выдан"
     last = str(cfg["created_at"]) if cfg else "—"
     await message.answer(
-        f"📄 Твой статус: {user.access_status.upper()}\n🔐 VPN: {vpn}\n🕒 Последняя выдача: {last}\n"
+        f"📄 Твой статус: {access_status.upper()}\n🔐 VPN: {vpn}\n🕒 Последняя выдача: {last}\n"
         "🧩 Устройство: можно подключать только на одно (через этот бот)"
     )
 
@@ -165,6 +357,9 @@ async def cancel_reissue(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "reissue:confirm")
+@rate_limited("reissue")
+@handler_priority("low")
+@admission("provisioning")
 async def confirm_reissue(
     callback: CallbackQuery,
     users_repo: UsersRepository,
@@ -172,42 +367,72 @@ async def confirm_reissue(
     wg_service: WireGuardService,
     logs_repo: LogsRepository,
     mikrotik_service: MikroTikService,
+    single_flight: SingleFlight,
+    subscriptions_repo: SubscriptionsRepository,
+    session: SessionInfo | None = None,
+    qr_service: QrService | None = None,
 ) -> None:
     if callback.from_user is None or callback.message is None:
         return
 
-    user = await users_repo.get_by_telegram_id(callback.from_user.id)
-    if user is None or user.access_status != "approved":
+    access = await _resolve_access(callback.from_user.id, session, users_repo)
+    if access is None or access[1] != "approved":
         await callback.message.answer(texts.PIN_PENDING)
         await callback.answer()
         return
+    user_id = access[0]
+    if subscription_lapsed(await subscriptions_repo.get_latest(user_id)):
+        await callback.message.answer(texts.SUBSCRIPTION_EXPIRED)
+        await callback.answer()
+        return
+    telegram_id = callback.from_user.id
 
-    def build_profile(ip_address: str) -> tuple[str, str, str, str]:
-        creds = wg_service.generate_profile(ip_address=ip_address)
-        return creds.private_key, creds.public_key, creds.preshared_key, wg_service.render_config(creds)
-
-    config_id, ip, config_text, public_key, psk, _ = await wg_repo.reissue_for_user(
-        user.id,
-        callback.from_user.id,
-        build_profile,
-    )
+    async def reissue() -> dict[str, Any]:
+        def build_profile(ip_address: str) -> tuple[str, str, str, str]:
+            creds = wg_service.generate_profile(ip_address=ip_address)
+            return creds.private_key, creds.public_key, creds.preshared_key, wg_service.render_config(creds)
 
-    peer_id = None
-    if mikrotik_service.settings.mikrotik_enabled:
-        peer_id = await _ensure_peer(
-            user_id=user.id,
-            telegram_id=callback.from_user.id,
-            config_id=config_id,
-            ip_address=ip,
-            public_key=public_key,
-            preshared_key=psk,
-            mikrotik_service=mikrotik_service,
-            logs_repo=logs_repo,
+        config_id, ip, config_text, public_key, psk, old_peer_id = await wg_repo.reissue_for_user(
+            user_id,
+            telegram_id,
+            build_profile,
+        )
+        # Update the peer bound to this address (bot-made or adopted by /import_peers) with the new key.
+        peer_id = await _sync_peer(
+            user_id,
+            telegram_id,
+            config_id,
+            ip,
+            public_key,
+            psk,
+            mikrotik_service,
+            logs_repo,
+            existing_peer_id=old_peer_id,
         )
-    await wg_repo.attach_mikrotik_peer(config_id, peer_id)
+        # A failed sync leaves the old peer on the router holding this address: keep it bound
+        # so a later block, expiry or GC still removes it before the address is freed.
+        await wg_repo.attach_mikrotik_peer(config_id, peer_id or old_peer_id)
+        return {"config_id": config_id, "config_text": config_text}
 
-    await callback.message.answer(texts.REISSUE_DONE)
-    await _send_config(callback.message, callback.from_user.id, config_text)
+    try:
+        result, shared = await single_flight.run(f"reissue:{telegram_id}", reissue)
+    except SingleFlightBusy:
+        await callback.answer(texts.REQUEST_IN_PROGRESS, show_alert=True)
+        return
+
+    if shared:
+        await callback.answer(texts.REQUEST_ALREADY_DONE)
+        return
+    await _send_config(
+        callback.message,
+        wg_repo,
+        config_id=result["config_id"],
+        telegram_id=telegram_id,
+        config_text=result["config_text"],
+        file_id=None,
+        lead=texts.REISSUE_DONE,
+        qr_service=qr_service,
+    )
     await callback.answer()
 
 
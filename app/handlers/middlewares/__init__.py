@@ -1,5 +1,17 @@
 """Middlewares package exports."""
 
+from app.handlers.middlewares.admission import AdmissionMiddleware
 from app.handlers.middlewares.auth_required import AuthRequiredMiddleware
+from app.handlers.middlewares.dedup import UpdateDedupMiddleware
+from app.handlers.middlewares.rate_limit import RateLimitMiddleware
+from app.handlers.middlewares.scheduler import UpdateScheduler
+from app.handlers.middlewares.throttling import ThrottlingMiddleware
 
-__all__ = ["AuthRequiredMiddleware"]
+__all__ = [
+    "AdmissionMiddleware",
+    "AuthRequiredMiddleware",
+    "RateLimitMiddleware",
+    "ThrottlingMiddleware",
+    "UpdateDedupMiddleware",
+    "UpdateScheduler",
+]
@@ -0,0 +1,51 @@
+"""Middleware putting flagged handlers behind an admission queue."""
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from app.ui import texts
+from app.utils.admission import AdmissionController, AdmissionRejected
+
+
+class AdmissionMiddleware(BaseMiddleware):
+    """Admit handlers flagged ``admission=<queue>`` through the matching controller.
+
+    Registered after auth/rate-limit middlewares and before UpdateScheduler.admit,
+    so queued jobs do not hold a global handler slot while they wait. Users are
+    told their queue position and ETA; when the queue is full the request is shed
+    with a retry hint.
+    """
+
+    def __init__(self, controllers: dict[str, AdmissionController]) -> None:
+        self._controllers = controllers
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        controller = self._controllers.get(get_flag(data, "admission", default=""))
+        if controller is None or not isinstance(event, (Message, CallbackQuery)):
+            return await handler(event, data)
+
+        async def notify_queued(position: int, eta_seconds: int) -> None:
+            reply = texts.PROVISIONING_QUEUED.format(position=position, seconds=eta_seconds)
+            target = event.message if isinstance(event, CallbackQuery) else event
+            if target is not None:
+                await target.answer(reply)
+
+        try:
+            async with controller.slot(on_queued=notify_queued):
+                return await handler(event, data)
+        except AdmissionRejected as exc:
+            reply = texts.PROVISIONING_OVERLOADED.format(seconds=exc.retry_after_seconds)
+            if isinstance(event, CallbackQuery):
+                await event.answer(reply, show_alert=True)
+            else:
+                await event.answer(reply)
+            return None
@@ -6,14 +6,16 @@ from typing import Any
 from aiogram import BaseMiddleware
 from aiogram.types import CallbackQuery, Message, TelegramObject
 
+from app.services.last_seen import LastSeenTracker
 from app.utils.session import SessionManager
 
 
 class AuthRequiredMiddleware(BaseMiddleware):
     """Populate session role when available without blocking menu UX."""
 
-    def __init__(self, session_manager: SessionManager) -> None:
+    def __init__(self, session_manager: SessionManager, last_seen_tracker: LastSeenTracker | None = None) -> None:
         self._session_manager = session_manager
+        self._last_seen_tracker = last_seen_tracker
 
     async def __call__(
         self,
@@ -24,6 +26,9 @@ class AuthRequiredMiddleware(BaseMiddleware):
         if not isinstance(event, (Message, CallbackQuery)) or event.from_user is None:
             return await handler(event, data)
 
-        role = await self._session_manager.get_role(event.from_user.id)
-        data["session_role"] = role
+        if self._last_seen_tracker is not None:
+            self._last_seen_tracker.touch(event.from_user.id)
+        session = await self._session_manager.get_session(event.from_user.id)
+        data["session"] = session
+        data["session_role"] = session.role if session is not None else None
         return await handler(event, data)
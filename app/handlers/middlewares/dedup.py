@@ -0,0 +1,49 @@
+"""Drop Telegram updates that were already delivered once."""
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+from redis.asyncio import Redis
+
+from app.utils.logging_compat import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+class UpdateDedupMiddleware(BaseMiddleware):
+    """Outer ``dp.update`` middleware claiming each ``update_id`` with ``SET NX``.
+
+    Webhook redeliveries and restarts mid-batch can hand the same update to the
+    bot twice, possibly on another replica; only the first claim is processed.
+    Redis errors fail open.
+    """
+
+    def __init__(self, redis: Redis, ttl_seconds: int = 600, prefix: str = "upd") -> None:
+        self._redis = redis
+        self._ttl_seconds = ttl_seconds
+        self._prefix = prefix
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        bot = data.get("bot")
+        key = f"{self._prefix}:{bot.id if bot is not None else 0}:{event.update_id}"
+        try:
+            claimed = await self._redis.set(key, b"1", nx=True, ex=self._ttl_seconds)
+        except Exception:  # noqa: BLE001
+            logger.warning("Update dedup store unavailable, processing update", update_id=event.update_id)
+            return await handler(event, data)
+
+        if not claimed:
+            metrics.inc("duplicate_updates_total")
+            return None
+        return await handler(event, data)
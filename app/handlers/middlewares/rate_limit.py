@@ -0,0 +1,53 @@
+"""Middleware enforcing per-action rate limits declared with handler flags."""
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from app.ui import texts
+from app.utils.logging_compat import get_logger
+from app.utils.metrics import metrics
+from app.utils.rate_limit import RateLimiter
+
+logger = get_logger(__name__)
+
+
+class RateLimitMiddleware(BaseMiddleware):
+    """Reject handlers flagged with ``rate_limit`` once the user's bucket is empty.
+
+    Must run after AuthRequiredMiddleware so per-role rules see ``session_role``.
+    Redis errors fail open: the update is processed without limiting.
+    """
+
+    def __init__(self, limiter: RateLimiter) -> None:
+        self._limiter = limiter
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        action = get_flag(data, "rate_limit")
+        if action is None or not isinstance(event, (Message, CallbackQuery)) or event.from_user is None:
+            return await handler(event, data)
+
+        try:
+            decision = await self._limiter.hit(action, event.from_user.id, data.get("session_role"))
+        except Exception:  # noqa: BLE001
+            logger.warning("Rate limiter unavailable, allowing request", action=action)
+            return await handler(event, data)
+
+        if decision.allowed:
+            return await handler(event, data)
+
+        metrics.inc("rate_limited_total", action=action)
+        reply = texts.RATE_LIMITED.format(seconds=decision.retry_after_seconds)
+        if isinstance(event, CallbackQuery):
+            await event.answer(reply, show_alert=True)
+        else:
+            await event.answer(reply)
+        return None
@@ -0,0 +1,89 @@
+"""Bounded update processing with per-user ordering and handler priorities."""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+from aiogram import Dispatcher, Router
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import TelegramObject, Update, User
+
+from app.utils.concurrency import PRIORITIES, PrioritySemaphore
+from app.utils.metrics import metrics
+
+_PRIORITY_NAMES = {value: name for name, value in PRIORITIES.items()}
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+class _UserSlot:
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class UpdateScheduler:
+    """Serialize updates per telegram_id and cap concurrent handlers globally.
+
+    ``order`` runs as an outer ``dp.update`` middleware and holds a per-user FIFO
+    lock, so one user's updates are handled in arrival order while different users
+    run in parallel. ``admit`` runs as the last inner message/callback middleware of
+    each router, where handler flags are known, and takes a slot from a priority
+    semaphore: handlers flagged ``priority="low"`` (provisioning) queue behind
+    menus, and admins always get ``high``.
+    """
+
+    def __init__(self, limit: int, low_priority_limit: int, admin_ids: set[int] | None = None) -> None:
+        self._semaphore = PrioritySemaphore(limit, low_limit=low_priority_limit)
+        self._admin_ids = admin_ids or set()
+        self._users: dict[int, _UserSlot] = {}
+
+    def setup(self, dp: Dispatcher, routers: Iterable[Router]) -> None:
+        """Register ``order`` on the dispatcher and ``admit`` last on each router."""
+
+        dp.update.outer_middleware(self.order)
+        for router in routers:
+            router.message.middleware(self.admit)
+            router.callback_query.middleware(self.admit)
+
+    async def order(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        user: User | None = data.get("event_from_user")
+        if not isinstance(event, Update) or user is None:
+            return await handler(event, data)
+
+        slot = self._users.get(user.id)
+        if slot is None:
+            slot = self._users[user.id] = _UserSlot()
+        slot.users += 1
+        try:
+            async with slot.lock:
+                return await handler(event, data)
+        finally:
+            slot.users -= 1
+            if slot.users == 0:
+                del self._users[user.id]
+
+    def priority_for(self, data: dict[str, Any]) -> int:
+        user: User | None = data.get("event_from_user")
+        if user is not None and user.id in self._admin_ids:
+            return PRIORITIES["high"]
+        return PRIORITIES.get(get_flag(data, "priority", default="normal"), PRIORITIES["normal"])
+
+    async def admit(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        priority = self.priority_for(data)
+        queued_at = time.monotonic()
+        await self._semaphore.acquire(priority)
+        metrics.observe("update_queue_wait_seconds", time.monotonic() - queued_at, priority=_PRIORITY_NAMES[priority])
+        self._report()
+        try:
+            return await handler(event, data)
+        finally:
+            self._semaphore.release(priority)
+            self._report()
+
+    def _report(self) -> None:
+        metrics.set_gauge("update_handlers_active", self._semaphore.active)
+        metrics.set_gauge("update_handlers_waiting", self._semaphore.waiting)
@@ -0,0 +1,67 @@
+"""Global per-user anti-flood middleware."""
+
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from app.utils.metrics import metrics
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Leaky bucket per telegram_id kept in process memory.
+
+    Each update adds one unit; the bucket drains at ``rate_per_second``. Updates that
+    would overflow ``burst`` are dropped silently and counted. Exempt ids (admins)
+    are never throttled.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: int,
+        exempt_ids: set[int] | None = None,
+        *,
+        max_tracked: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._rate = rate_per_second
+        self._burst = burst
+        self._exempt_ids = exempt_ids or set()
+        self._max_tracked = max_tracked
+        self._clock = clock
+        self._buckets: dict[int, tuple[float, float]] = {}
+
+    def allow(self, telegram_id: int) -> bool:
+        now = self._clock()
+        level, updated_at = self._buckets.get(telegram_id, (0.0, now))
+        level = max(0.0, level - (now - updated_at) * self._rate)
+        if level + 1 > self._burst:
+            self._buckets[telegram_id] = (level, now)
+            return False
+        self._buckets[telegram_id] = (level + 1, now)
+        if len(self._buckets) > self._max_tracked:
+            self._prune(now)
+        return True
+
+    def _prune(self, now: float) -> None:
+        self._buckets = {
+            telegram_id: (level, updated_at)
+            for telegram_id, (level, updated_at) in self._buckets.items()
+            if level - (now - updated_at) * self._rate > 0
+        }
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        if user is None or user.id in self._exempt_ids or self.allow(user.id):
+            return await handler(event, data)
+
+        metrics.inc("throttled_updates_total", event=type(event).__name__)
+        return None
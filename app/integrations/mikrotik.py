@@ -49,8 +49,13 @@ class MikroTikClient:
         allowed_address: str,
         preshared_key: str | None,
         comment: str,
+        peer_id: str | None = None,
     ) -> tuple[str, str | None]:
-        """Ensure peer exists and return action + peer id."""
+        """Ensure peer exists and return action + peer id.
+
+        ``peer_id`` is the peer previously bound to this address (reissue): it is
+        updated in place with the new key, name and comment.
+        """
 
         IPv4Address(allowed_address.split("/")[0])
 
@@ -66,7 +71,9 @@ class MikroTikClient:
 
         self._logger.info("Adding peer on MikroTik", interface=interface, name=name, allowed_address=allowed_address)
 
-        existing = await self.find_peer(interface=interface, comment=comment)
+        existing = await self.find_peer(interface=interface, peer_id=peer_id) if peer_id else None
+        if existing is None:
+            existing = await self.find_peer(interface=interface, comment=comment)
         if existing is not None:
             await self._update_peer_if_needed(existing=existing, payload=payload)
             return "updated", existing.get(".id")
@@ -97,11 +104,14 @@ class MikroTikClient:
         comment: str | None = None,
         public_key: str | None = None,
         allowed_address: str | None = None,
+        peer_id: str | None = None,
     ) -> dict[str, str] | None:
-        """Find single peer by comment/public key/allowed address."""
+        """Find single peer by RouterOS id/comment/public key/allowed address."""
 
         peers = await self.list_wireguard_peers(interface)
         for peer in peers:
+            if peer_id and peer.get(".id") == peer_id:
+                return peer
             if comment and peer.get("comment") == comment:
                 return peer
             if public_key and peer.get("public-key") == public_key:
@@ -118,6 +128,20 @@ class MikroTikClient:
             return
         await self._run_api("remove_peer", peer_id=peer_id)
 
+    async def remove_wireguard_peers(self, peer_ids: list[str]) -> list[str]:
+        """Remove many peers over one API connection; return the ids actually removed.
+
+        Ids already gone from the router are skipped so one stale id does not fail the batch.
+        """
+
+        if not peer_ids:
+            return []
+        if self.dry_run:
+            self._logger.info("Dry-run enabled: skip peers remove", count=len(peer_ids))
+            return []
+        removed = await self._run_api("remove_peers", peer_ids=",".join(peer_ids))
+        return list(removed)
+
     async def list_wireguard_peers(self, interface: str) -> list[dict[str, str]]:
         """Return peers list for selected WireGuard interface."""
 
@@ -136,6 +160,7 @@ class MikroTikClient:
             or existing.get("public-key") != payload["public-key"]
             or (payload.get("preshared-key") and existing.get("preshared-key") != payload.get("preshared-key"))
             or existing.get("name") != payload["name"]
+            or existing.get("comment") != payload["comment"]
         )
 
         if not needs_update:
@@ -217,6 +242,13 @@ class MikroTikClient:
                 peers_path.remove(**{".id": params["peer_id"]})
                 return None
 
+            if operation == "remove_peers":
+                existing = {item.get(".id") for item in peers_path.select(".id")}
+                peer_ids = [peer_id for peer_id in params["peer_ids"].split(",") if peer_id in existing]
+                if peer_ids:
+                    peers_path.remove(*peer_ids)
+                return peer_ids
+
             if operation == "list_peers":
                 interface = params["interface"]
                 return [
@@ -229,6 +261,7 @@ class MikroTikClient:
                         "allowed-address",
                         "preshared-key",
                         "comment",
+                        "last-handshake",
                     )
                     if item.get("interface") == interface
                 ]
@@ -2,6 +2,7 @@
 
 import asyncio
 import os
+from dataclasses import dataclass
 
 import structlog
 from aiogram import Bot, Dispatcher
@@ -10,15 +11,47 @@ from aiogram.enums import ParseMode
 from aiogram.types import BotCommand
 from redis.asyncio import Redis
 
-from app.config import get_settings
+from app.config import Settings, get_settings
 from app.database.connection import Database
-from app.database.repositories import LogsRepository, UsersRepository, WireGuardConfigsRepository
+from app.database.repositories import (
+    BroadcastsRepository,
+    ExportsRepository,
+    LogsRepository,
+    PeerImportRepository,
+    SubscriptionsRepository,
+    WireGuardConfigsRepository,
+)
 from app.handlers import register_routers
+from app.handlers.middlewares import (
+    AdmissionMiddleware,
+    ThrottlingMiddleware,
+    UpdateDedupMiddleware,
+    UpdateScheduler,
+)
+from app.services.access_admin import AccessAdminService
 from app.services.auth_service import AuthService
+from app.services.broadcast import BroadcastService
+from app.services.config_archive import ConfigArchiver
+from app.services.export import ExportService
+from app.services.last_seen import LastSeenTracker
 from app.services.mikrotik_service import MikroTikService
+from app.services.peer_gc import IdlePeerCollector
+from app.services.peer_import import PeerImportService
+from app.services.qr_service import QrService
+from app.services.subscriptions import SubscriptionExpiryService
+from app.services.user_cache import CachedUsersRepository
 from app.services.wireguard_service import WireGuardService
+from app.utils.admission import AdmissionController
+from app.utils.cpu_pool import CpuPool
+from app.utils.fsm_storage import build_fsm_storage
+from app.utils.idempotency import SingleFlight
+from app.utils.jobs import CronSchedule, Job, JobScheduler, LeaderLease
 from app.utils.logger import setup_logging
 from app.utils.logging_compat import get_logger
+from app.utils.outbound import OutboundThrottle, drain_background
+from app.utils.qr import qr_available
+from app.utils.rate_limit import RateLimiter, build_rate_limit_rules
+from app.utils.security import PinHasher
 from app.utils.session import SessionManager
 
 
@@ -33,78 +66,307 @@ async def set_bot_commands(bot: Bot) -> None:
             BotCommand(command="new_connection", description="Создать WireGuard подключение"),
             BotCommand(command="my_connections", description="Мои подключения"),
             BotCommand(command="mt_test", description="[admin] Проверка MikroTik API"),
+            BotCommand(command="metrics", description="[admin] Метрики бота"),
+            BotCommand(command="export", description="[admin] Выгрузка пользователей, конфигов, журнала"),
+            BotCommand(command="sub", description="[admin] Подписка пользователя"),
+            BotCommand(command="import_peers", description="[superadmin] Импорт пиров с MikroTik"),
         ]
     )
 
 
-async def main() -> None:
-    """Bootstrap app services and start long-polling."""
+@dataclass(slots=True)
+class BotRuntime:
+    """Bot, dispatcher and the resources that must be started/closed with them."""
 
-    settings = get_settings()
-    setup_logging(settings.log_level, settings.log_file_path)
-    logger = get_logger(__name__)
-    logger = structlog.get_logger(__name__)
+    bot: Bot
+    dp: Dispatcher
+    database: Database
+    redis: Redis
+    cpu_pool: CpuPool
+    users_repo: CachedUsersRepository
+    last_seen_tracker: LastSeenTracker
+    broadcast_service: BroadcastService
+    scheduler: JobScheduler
 
-    raw_database_dsn = os.getenv("DATABASE_DSN", "")
-    if raw_database_dsn.upper().startswith("DATABASE_DSN="):
-        logger.warning("DATABASE_DSN had duplicated prefix and was normalized")
+    def start_background(self) -> None:
+        self.users_repo.start()
+        self.scheduler.start()
 
-    logger.info(
-        "MikroTik runtime settings",
-        enabled=settings.mikrotik_enabled,
-        host=settings.mikrotik_host,
-        port=settings.mikrotik_port,
-        tls=settings.mikrotik_use_tls,
-        dry_run=settings.mikrotik_dry_run,
-        interface=settings.wg_interface_name,
-    )
+    async def close(self) -> None:
+        await self.scheduler.stop()
+        await self.broadcast_service.stop()
+        await drain_background()
+        await self.users_repo.stop()
+        await self.last_seen_tracker.stop()
+        await self.redis.aclose()
+        await self.database.disconnect()
+        self.cpu_pool.shutdown()
+        await self.bot.session.close()
+
+
+async def build_runtime(settings: Settings) -> BotRuntime:
+    """Create bot, dispatcher, repositories and services and wire routers."""
 
     bot = Bot(token=settings.bot_token, default=DefaultBotProperties(parse_mode=ParseMode(settings.bot_parse_mode)))
-    dp = Dispatcher()
+    bot.session.middleware(
+        OutboundThrottle(
+            global_rate=settings.outbound_global_per_second,
+            chat_rate=settings.outbound_chat_per_second,
+            chat_burst=settings.outbound_chat_burst,
+            group_rate=settings.outbound_group_per_minute / 60,
+            max_retries=settings.outbound_max_retries,
+        )
+    )
 
     database = Database(settings.database_dsn)
     await database.connect()
     await database.init_schema()
 
     redis = Redis.from_url(settings.redis_dsn, decode_responses=False)
-    sessions = SessionManager(redis=redis, ttl_seconds=settings.session_ttl_seconds)
+    storage, events_isolation = build_fsm_storage(redis, settings)
+    dp = Dispatcher(storage=storage, events_isolation=events_isolation)
+    sessions = SessionManager(
+        redis=redis,
+        ttl_seconds=settings.session_ttl_seconds,
+        local_ttl_seconds=settings.session_local_cache_seconds,
+    )
 
-    users_repo = UsersRepository(database.pool)
+    users_repo = CachedUsersRepository(
+        database.pool,
+        redis,
+        ttl_seconds=settings.user_cache_ttl_seconds,
+        max_entries=settings.user_cache_max_entries,
+    )
     logs_repo = LogsRepository(database.pool)
     wg_repo = WireGuardConfigsRepository(database.pool)
+    broadcasts_repo = BroadcastsRepository(database.pool)
+    broadcast_service = BroadcastService(
+        repo=broadcasts_repo,
+        bot=bot,
+        concurrency=settings.broadcast_concurrency,
+        batch_size=settings.broadcast_batch_size,
+        lease_seconds=settings.broadcast_lease_seconds,
+    )
 
+    cpu_pool = CpuPool("cpu", workers=settings.cpu_pool_workers, kind=settings.cpu_pool_kind)
     auth_service = AuthService(
         users_repo=users_repo,
         logs_repo=logs_repo,
         sessions=sessions,
-        pin_bcrypt_rounds=settings.pin_bcrypt_rounds,
+        pin_hasher=PinHasher(cpu_pool, rounds=settings.pin_bcrypt_rounds),
         admin_ids=settings.admin_ids,
         superadmin_ids=settings.superadmin_ids,
         global_pin=settings.global_pin,
     )
+    await auth_service.warm_up_pin_hash()
+    last_seen_tracker = LastSeenTracker(users_repo=users_repo)
     wg_service = WireGuardService(settings=settings)
     mikrotik_service = MikroTikService(settings=settings)
 
     dp["settings"] = settings
+    dp["cpu_pool"] = cpu_pool
     dp["db"] = database
     dp["redis"] = redis
     dp["session_manager"] = sessions
     dp["users_repo"] = users_repo
     dp["logs_repo"] = logs_repo
     dp["wg_repo"] = wg_repo
+    dp["broadcasts_repo"] = broadcasts_repo
+    dp["broadcast_service"] = broadcast_service
+    dp["export_service"] = ExportService(ExportsRepository(database.pool), tmp_dir=settings.export_tmp_dir)
     dp["auth_service"] = auth_service
+    dp["last_seen_tracker"] = last_seen_tracker
+    dp["single_flight"] = SingleFlight(
+        redis,
+        lock_ttl_seconds=settings.idempotency_lock_ttl_seconds,
+        result_ttl_seconds=settings.idempotency_result_ttl_seconds,
+        wait_seconds=settings.idempotency_wait_seconds,
+    )
     dp["wg_service"] = wg_service
     dp["mikrotik_service"] = mikrotik_service
+    access_admin_service = AccessAdminService(
+        users_repo=users_repo,
+        wg_repo=wg_repo,
+        logs_repo=logs_repo,
+        sessions=sessions,
+        mikrotik_service=mikrotik_service,
+        protected_ids=frozenset(settings.admin_ids | settings.superadmin_ids),
+    )
+    subscriptions_repo = SubscriptionsRepository(database.pool)
+    subscription_service = SubscriptionExpiryService(
+        repo=subscriptions_repo,
+        access_admin=access_admin_service,
+        bot=bot,
+        batch_size=settings.subscription_batch_size,
+        horizon_seconds=settings.subscription_horizon_seconds,
+        reminder_before_seconds=settings.subscription_reminder_hours * 3600,
+    )
+    dp["access_admin_service"] = access_admin_service
+    dp["subscriptions_repo"] = subscriptions_repo
+    dp["subscription_service"] = subscription_service
+    dp["peer_import_service"] = PeerImportService(PeerImportRepository(database.pool), mikrotik_service)
+    dp["qr_service"] = None
+    if settings.config_qr_enabled:
+        if qr_available():
+            dp["qr_service"] = QrService(
+                cpu_pool, scale=settings.config_qr_scale, max_entries=settings.config_qr_cache_entries
+            )
+        else:
+            get_logger(__name__).warning("CONFIG_QR_ENABLED is set but segno is not installed, QR codes are disabled")
+
+    scheduler = JobScheduler(
+        lease=LeaderLease(redis, "scheduler:leader", ttl_seconds=settings.scheduler_lease_ttl_seconds)
+    )
+    scheduler.add(
+        Job(
+            "last-seen-flush",
+            last_seen_tracker.flush,
+            interval_seconds=settings.last_seen_flush_interval_seconds,
+            jitter_seconds=settings.last_seen_flush_interval_seconds / 10,
+        )
+    )
+    scheduler.add(
+        Job(
+            "subscription-expiry",
+            subscription_service.run_once,
+            interval_seconds=settings.subscription_check_interval_seconds,
+            jitter_seconds=settings.subscription_check_interval_seconds / 10,
+            singleton=True,
+        )
+    )
+    scheduler.add(
+        Job(
+            "broadcast-resume",
+            broadcast_service.resume_unfinished,
+            interval_seconds=settings.broadcast_resume_interval_seconds,
+            jitter_seconds=settings.broadcast_resume_interval_seconds / 10,
+            singleton=True,
+        )
+    )
+    scheduler.add(
+        Job(
+            "revocation-retry",
+            access_admin_service.retry_revocations,
+            interval_seconds=settings.revocation_retry_interval_seconds,
+            jitter_seconds=settings.revocation_retry_interval_seconds / 10,
+            singleton=True,
+        )
+    )
+    config_archiver = ConfigArchiver(
+        wg_repo=wg_repo,
+        archive_after_seconds=settings.config_archive_after_days * 86400,
+        batch_size=settings.config_archive_batch_size,
+    )
+    scheduler.add(
+        Job(
+            "config-archive",
+            config_archiver.run_once,
+            cron=CronSchedule(settings.config_archive_cron),
+            jitter_seconds=60,
+            singleton=True,
+        )
+    )
+    if settings.peer_gc_enabled:
+        idle_peer_collector = IdlePeerCollector(
+            wg_repo=wg_repo,
+            logs_repo=logs_repo,
+            access_admin=access_admin_service,
+            mikrotik_service=mikrotik_service,
+            bot=bot,
+            idle_after_seconds=settings.peer_gc_idle_days * 86400,
+            batch_size=settings.peer_gc_batch_size,
+        )
+        scheduler.add(
+            Job(
+                "idle-peer-gc",
+                idle_peer_collector.run_once,
+                interval_seconds=settings.peer_gc_interval_seconds,
+                jitter_seconds=settings.peer_gc_interval_seconds / 10,
+                singleton=True,
+            )
+        )
+    dp["scheduler"] = scheduler
+
+    register_routers(
+        dp,
+        session_manager=sessions,
+        last_seen_tracker=last_seen_tracker,
+        rate_limiter=RateLimiter(redis, rules=build_rate_limit_rules(settings)),
+        throttling=ThrottlingMiddleware(
+            rate_per_second=settings.flood_rate_per_second,
+            burst=settings.flood_burst,
+            exempt_ids=settings.admin_ids | settings.superadmin_ids,
+        ),
+        update_dedup=UpdateDedupMiddleware(redis, ttl_seconds=settings.update_dedup_ttl_seconds),
+        scheduler=UpdateScheduler(
+            limit=settings.update_concurrency_limit,
+            low_priority_limit=settings.update_low_priority_limit,
+            admin_ids=settings.admin_ids | settings.superadmin_ids,
+        ),
+        admission=AdmissionMiddleware(
+            {
+                "provisioning": AdmissionController(
+                    "provisioning",
+                    concurrency=settings.provisioning_concurrency,
+                    max_queue=settings.provisioning_queue_size,
+                ),
+            }
+        ),
+    )
+
+    return BotRuntime(
+        bot=bot,
+        dp=dp,
+        database=database,
+        redis=redis,
+        cpu_pool=cpu_pool,
+        users_repo=users_repo,
+        last_seen_tracker=last_seen_tracker,
+        broadcast_service=broadcast_service,
+        scheduler=scheduler,
+    )
+
+
+async def main() -> None:
+    """Bootstrap app services and start long-polling or the webhook server."""
+
+    settings = get_settings()
+    setup_logging(settings.log_level, settings.log_file_path)
+    logger = get_logger(__name__)
+    logger = structlog.get_logger(__name__)
+
+    raw_database_dsn = os.getenv("DATABASE_DSN", "")
+    if raw_database_dsn.upper().startswith("DATABASE_DSN="):
+        logger.warning("DATABASE_DSN had duplicated prefix and was normalized")
+
+    logger.info(
+        "MikroTik runtime settings",
+        enabled=settings.mikrotik_enabled,
+        host=settings.mikrotik_host,
+        port=settings.mikrotik_port,
+        tls=settings.mikrotik_use_tls,
+        dry_run=settings.mikrotik_dry_run,
+        interface=settings.wg_interface_name,
+    )
+
+    if settings.bot_mode == "webhook":
+        from app.webhook import serve_webhook
+
+        await serve_webhook(settings)
+        return
+
+    if settings.horizontal_scaling:
+        logger.warning("HORIZONTAL_SCALING with polling: only one replica may poll, use BOT_MODE=webhook for several")
 
-    register_routers(dp, session_manager=sessions)
-    await set_bot_commands(bot)
+    runtime = await build_runtime(settings)
+    await set_bot_commands(runtime.bot)
+    await runtime.bot.delete_webhook(drop_pending_updates=False)
 
+    runtime.start_background()
     try:
-        await dp.start_polling(bot)
+        await runtime.dp.start_polling(runtime.bot)
     finally:
-        await redis.aclose()
-        await database.disconnect()
-        await bot.session.close()
+        await runtime.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,162 @@
+"""Bulk approve/block of users with batched config and peer revocation."""
+
+from dataclasses import dataclass, field
+
+from aiogram import Bot
+
+from app.database.repositories import LogsRepository, UsersRepository, WireGuardConfigsRepository
+from app.services.mikrotik_service import MikroTikClientError, MikroTikService
+from app.ui import texts
+from app.utils.logging_compat import get_logger
+from app.utils.outbound import fire_and_forget
+from app.utils.session import SessionManager
+
+ACCESS_ACTIONS = {"approve": "approved", "block": "blocked"}
+
+
+@dataclass(slots=True)
+class BulkAccessResult:
+    status: str
+    changed: list[int] = field(default_factory=list)
+    unchanged: list[int] = field(default_factory=list)
+    unknown: list[int] = field(default_factory=list)
+    protected: list[int] = field(default_factory=list)
+    configs_deactivated: int = 0
+    peers_removed: int = 0
+    peers_failed: int = 0
+
+
+@dataclass(slots=True)
+class AccessAdminService:
+    """Apply an access status to many users with a fixed number of round trips.
+
+    One UPDATE for the users, one for their configs, one router call for the peers
+    and one Redis pipeline for the sessions, however many targets are given.
+    """
+
+    users_repo: UsersRepository
+    wg_repo: WireGuardConfigsRepository
+    logs_repo: LogsRepository
+    sessions: SessionManager
+    mikrotik_service: MikroTikService
+    protected_ids: frozenset[int] = frozenset()
+
+    async def apply(
+        self,
+        actor_id: int,
+        telegram_ids: list[int],
+        status: str,
+        *,
+        bot: Bot | None = None,
+    ) -> BulkAccessResult:
+        targets = list(dict.fromkeys(telegram_ids))
+        result = BulkAccessResult(status=status)
+        if status == "blocked":
+            result.protected = [telegram_id for telegram_id in targets if telegram_id in self.protected_ids]
+            targets = [telegram_id for telegram_id in targets if telegram_id not in self.protected_ids]
+        if not targets:
+            return result
+
+        result.changed, result.unchanged = await self.users_repo.set_access_status_many(targets, status)
+        known = {*result.changed, *result.unchanged}
+        result.unknown = [telegram_id for telegram_id in targets if telegram_id not in known]
+
+        if status == "blocked":
+            await self.sessions.destroy_sessions(sorted(known))
+            await self._revoke(result, sorted(known))
+        else:
+            await self.sessions.update_access_status_many(result.changed, status)
+
+        await self.logs_repo.add(
+            event_type=f"access_bulk_{status}",
+            details={
+                "actor_id": actor_id,
+                "changed": result.changed,
+                "configs_deactivated": result.configs_deactivated,
+                "peers_removed": result.peers_removed,
+                "peers_failed": result.peers_failed,
+            },
+        )
+        if bot is not None:
+            notice = texts.PIN_APPROVED if status == "approved" else texts.ACCESS_BLOCKED
+            for telegram_id in result.changed:
+                fire_and_forget(bot.send_message(telegram_id, notice), f"{status}-notice:{telegram_id}")
+        return result
+
+    async def _revoke(self, result: BulkAccessResult, telegram_ids: list[int]) -> None:
+        # Unchanged (already blocked) users are included: older blocks left configs active.
+        result.configs_deactivated, result.peers_removed, result.peers_failed = await self.revoke_configs(telegram_ids)
+
+    async def revoke_configs(self, telegram_ids: list[int]) -> tuple[int, int, int]:
+        """Remove the users' router peers in one batch, then deactivate their configs.
+
+        A config whose peer could not be removed stays active so its address is not
+        reused; ``retry_revocations`` picks it up later. Returns (configs deactivated,
+        peers removed, peers that failed to be removed).
+        """
+
+        removal = self.peer_removal()
+        deactivated, _ = await self.wg_repo.revoke_for_telegram_ids(telegram_ids, removal)
+        return len(deactivated), removal.removed, removal.failed
+
+    async def retry_revocations(self, limit: int = 500) -> int:
+        """Revoke configs still held by blocked or lapsed users; return the number deactivated."""
+
+        telegram_ids = await self.wg_repo.list_pending_revocation(limit)
+        if not telegram_ids:
+            return 0
+        configs, removed, failed = await self.revoke_configs(telegram_ids)
+        get_logger(__name__).info(
+            "Pending revocations retried",
+            users=len(telegram_ids),
+            configs=configs,
+            peers_removed=removed,
+            peers_failed=failed,
+        )
+        return configs
+
+    def peer_removal(self) -> "PeerRemoval":
+        return PeerRemoval(self)
+
+    async def remove_peers(self, peer_ids: list[str]) -> tuple[int, int]:
+        """Remove router peers in one call; return (removed, failed). Failures are logged, not raised."""
+
+        if not peer_ids or not self.mikrotik_service.settings.mikrotik_enabled:
+            return 0, 0
+        try:
+            removed = await self.mikrotik_service.remove_wireguard_peers(peer_ids)
+        except MikroTikClientError:
+            get_logger(__name__).exception("Batched peer removal failed", count=len(peer_ids))
+            await self.logs_repo.add(event_type="mikrotik_peer_remove_failed", details={"peer_ids": peer_ids})
+            return 0, len(peer_ids)
+        return len(removed), 0
+
+
+@dataclass(slots=True)
+class PeerRemoval:
+    """``remove_peers`` callback for the configs repository that tallies the outcome."""
+
+    service: AccessAdminService
+    removed: int = 0
+    failed: int = 0
+
+    async def __call__(self, peer_ids: list[str]) -> bool:
+        removed, failed = await self.service.remove_peers(peer_ids)
+        self.removed, self.failed = self.removed + removed, self.failed + failed
+        return not failed
+
+
+def format_bulk_result(result: BulkAccessResult) -> str:
+    title = "✅ Одобрено" if result.status == "approved" else "⛔ Заблокировано"
+    lines = [f"{title}: {len(result.changed)}"]
+    if result.unchanged:
+        lines.append(f"Без изменений: {len(result.unchanged)}")
+    if result.unknown:
+        lines.append(f"Не найдены: {', '.join(map(str, result.unknown))}")
+    if result.protected:
+        lines.append(f"Администраторов не блокирую: {', '.join(map(str, result.protected))}")
+    if result.status == "blocked":
+        lines.append(f"Отключено конфигов: {result.configs_deactivated}, удалено пиров: {result.peers_removed}")
+        if result.peers_failed:
+            lines.append(f"⚠️ Не удалось удалить пиров: {result.peers_failed} (см. журнал)")
+    return "\n".join(lines)
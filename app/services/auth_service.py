@@ -1,9 +1,10 @@
 """Authentication and session workflows."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 
 from app.database.repositories import LogsRepository, User, UsersRepository
-from app.utils.security import hash_pin
+from app.utils.security import PinHasher
 from app.utils.session import SessionManager
 
 
@@ -14,7 +15,7 @@ class AuthService:
     users_repo: UsersRepository
     logs_repo: LogsRepository
     sessions: SessionManager
-    pin_bcrypt_rounds: int
+    pin_hasher: PinHasher = field(repr=False)
     admin_ids: set[int]
     superadmin_ids: set[int]
     global_pin: str
@@ -26,48 +27,68 @@ class AuthService:
             return "admin"
         return "user"
 
-    async def register_if_absent(self, telegram_id: int, username: str | None, full_name: str | None) -> User:
-        user = await self.users_repo.get_by_telegram_id(telegram_id)
-        if user is not None:
-            return user
+    async def _pin_hash_for_new_user(self) -> str:
+        return await self.pin_hasher.shared_hash(self.global_pin)
+
+    async def warm_up_pin_hash(self) -> None:
+        """Reuse a stored global PIN hash when the PIN and bcrypt cost have not changed since it was made."""
+
+        stored_hash = await self.users_repo.get_latest_pin_hash()
+        if stored_hash is not None and await self.pin_hasher.adopt(self.global_pin, stored_hash):
+            return
+        await self.pin_hasher.shared_hash(self.global_pin)
+
+    async def register_or_refresh(self, telegram_id: int, username: str | None, full_name: str | None) -> User:
+        """Register user or sync their role with one upsert query.
+
+        last_seen of existing users is left to the write-behind tracker.
+        """
 
         role = self.resolve_role(telegram_id)
         access_status = "approved" if role in {"admin", "superadmin"} else "pending"
-        user = await self.users_repo.create(
+        result = await self.users_repo.upsert_seen(
             telegram_id=telegram_id,
             username=username,
             full_name=full_name,
             role=role,
-            pin_hash=hash_pin(self.global_pin, rounds=self.pin_bcrypt_rounds),
+            pin_hash=await self._pin_hash_for_new_user(),
             access_status=access_status,
+            last_seen=datetime.now(timezone.utc),
         )
-        await self.logs_repo.add("register_success", {"telegram_id": telegram_id, "role": role}, user.id)
-        return user
-
-    async def sync_user_role(self, user: User) -> User:
-        expected_role = self.resolve_role(user.telegram_id)
-        if expected_role != user.role:
-            await self.users_repo.set_role(user.telegram_id, expected_role)
+        user = result.user
+        if result.created:
+            await self.logs_repo.add("register_success", {"telegram_id": telegram_id, "role": role}, user.id)
+        elif result.role_changed:
             await self.logs_repo.add(
                 "role_synced",
-                {"telegram_id": user.telegram_id, "old_role": user.role, "new_role": expected_role},
+                {"telegram_id": telegram_id, "old_role": result.previous_role, "new_role": user.role},
                 user.id,
             )
-            refreshed = await self.users_repo.get_by_telegram_id(user.telegram_id)
-            if refreshed is not None:
-                return refreshed
         return user
 
     async def check_pin(self, telegram_id: int, pin: str) -> tuple[bool, User | None]:
         user = await self.users_repo.get_by_telegram_id(telegram_id)
         if user is None:
             return False, None
+        return await self.check_user_pin(user, pin), user
+
+    async def check_user_pin(self, user: User, pin: str) -> bool:
+        """Validate PIN for an already loaded user without re-reading it."""
+
         ok = pin == self.global_pin
-        await self.logs_repo.add("pin_check", {"telegram_id": telegram_id, "ok": ok}, user.id)
-        return ok, user
+        await self.logs_repo.add("pin_check", {"telegram_id": user.telegram_id, "ok": ok}, user.id)
+        return ok
+
+    async def start_session(self, user: User) -> None:
+        await self.sessions.create_session(
+            telegram_id=user.telegram_id,
+            role=user.role,
+            user_id=user.id,
+            access_status=user.access_status,
+            pin_verified=True,
+        )
 
     async def login_approved(self, user: User) -> None:
         await self.users_repo.mark_pin_verified(user.telegram_id, True)
-        await self.users_repo.touch_last_seen(user.telegram_id)
-        await self.sessions.create_session(telegram_id=user.telegram_id, role=user.role)
+        await self.start_session(user)
         await self.logs_repo.add("login_success", {"telegram_id": user.telegram_id, "role": user.role}, user.id)
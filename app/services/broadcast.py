@@ -0,0 +1,169 @@
+"""Background broadcast runner: stream recipients, send concurrently, checkpoint progress."""
+
+import asyncio
+import contextlib
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+
+from app.database.repositories import BroadcastJob, BroadcastsRepository
+from app.utils.logging_compat import get_logger
+from app.utils.metrics import metrics
+
+
+def classify_failure(exc: Exception) -> str:
+    """Map a send error to a stable failure reason stored per recipient."""
+
+    message = str(exc).lower()
+    if isinstance(exc, TelegramForbiddenError):
+        if "deactivated" in message:
+            return "deactivated"
+        if "blocked" in message:
+            return "blocked"
+        return "forbidden"
+    if isinstance(exc, TelegramBadRequest) and "chat not found" in message:
+        return "not_found"
+    if isinstance(exc, TelegramRetryAfter):
+        return "flood"
+    return "error"
+
+
+@dataclass(slots=True)
+class BroadcastService:
+    """Runs broadcast jobs as background tasks, one task per job.
+
+    Recipients are read in keyset batches of ``batch_size``; each batch is sent with
+    up to ``concurrency`` requests in flight (the bot session's OutboundThrottle keeps
+    them within Telegram limits) and then checkpointed together with its failures.
+    A job is resumed from the last checkpoint after a restart, possibly by another
+    instance once the lease expires.
+    """
+
+    repo: BroadcastsRepository
+    bot: Bot
+    concurrency: int = 20
+    batch_size: int = 200
+    lease_seconds: int = 120
+    instance_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    _tasks: dict[int, asyncio.Task] = field(default_factory=dict, init=False, repr=False)
+    _logger: Any = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._logger = get_logger(__name__)
+
+    async def start(self, created_by: int, audience: str, message_text: str) -> BroadcastJob:
+        job = await self.repo.create(created_by, audience, message_text)
+        self._spawn(job.id)
+        return job
+
+    async def resume_unfinished(self) -> None:
+        """Pick up jobs left pending/running by a previous process or a lost lease.
+
+        Runs periodically as a singleton scheduler job; jobs already leased elsewhere
+        fail the claim in ``run`` and are left alone.
+        """
+
+        for job_id in await self.repo.list_unfinished_ids():
+            self._spawn(job_id)
+
+    async def cancel(self, job_id: int) -> bool:
+        """Mark the job cancelled; its runner stops at the next checkpoint."""
+
+        return await self.repo.cancel(job_id)
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    def _spawn(self, job_id: int) -> None:
+        if job_id in self._tasks:
+            return
+        task = asyncio.create_task(self._run_guarded(job_id), name=f"broadcast-{job_id}")
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def _run_guarded(self, job_id: int) -> None:
+        try:
+            await self.run(job_id)
+        except asyncio.CancelledError:
+            with contextlib.suppress(Exception):
+                await self.repo.release(job_id, self.instance_id)
+            raise
+        except Exception:  # noqa: BLE001
+            self._logger.exception("Broadcast job crashed, it will be resumed later", job_id=job_id)
+
+    async def run(self, job_id: int) -> BroadcastJob | None:
+        """Process a job until done, cancelled or its lease is lost."""
+
+        job = await self.repo.claim(job_id, self.instance_id, self.lease_seconds)
+        if job is None:
+            return None
+        self._logger.info("Broadcast job running", job_id=job_id, cursor=job.cursor_telegram_id)
+
+        cursor = job.cursor_telegram_id
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def deliver(telegram_id: int) -> tuple[int, str, str] | None:
+            async with semaphore:
+                try:
+                    await self.bot.send_message(telegram_id, job.message_text, parse_mode=None)
+                except TelegramAPIError as exc:
+                    reason = classify_failure(exc)
+                    metrics.inc("broadcast_failed_total", reason=reason)
+                    return telegram_id, reason, str(exc)[:500]
+            metrics.inc("broadcast_sent_total")
+            return None
+
+        while True:
+            recipients = await self.repo.next_recipients(job.audience, cursor, self.batch_size)
+            if not recipients:
+                break
+            results = await asyncio.gather(*(deliver(telegram_id) for telegram_id in recipients))
+            failures = [failure for failure in results if failure is not None]
+            cursor = recipients[-1]
+            status = await self.repo.save_progress(
+                job_id,
+                self.instance_id,
+                self.lease_seconds,
+                cursor,
+                sent=len(recipients) - len(failures),
+                failures=failures,
+            )
+            if status is None:
+                self._logger.warning("Broadcast lease lost", job_id=job_id)
+                return None
+            if status == "cancelled":
+                break
+
+        finished = await self.repo.finish(job_id, self.instance_id)
+        if finished is not None:
+            self._logger.info(
+                "Broadcast job finished",
+                job_id=job_id,
+                status=finished.status,
+                sent=finished.sent_count,
+                failed=finished.failed_count,
+            )
+            await self._report(finished)
+        return finished
+
+    async def _report(self, job: BroadcastJob) -> None:
+        summary = await self.repo.failure_summary(job.id)
+        reasons = ", ".join(f"{reason}: {count}" for reason, count in summary.items()) or "—"
+        title = "отменена" if job.status == "cancelled" else "завершена"
+        try:
+            await self.bot.send_message(
+                job.created_by,
+                f"📣 Рассылка #{job.id} {title}.\n"
+                f"✅ Доставлено: {job.sent_count}\n"
+                f"⚠️ Ошибок: {job.failed_count} ({reasons})",
+            )
+        except TelegramAPIError:
+            self._logger.warning("Failed to report broadcast result", job_id=job.id)
@@ -0,0 +1,46 @@
+"""Archival of superseded wireguard_configs rows."""
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from app.database.repositories import WireGuardConfigsRepository
+from app.utils.logging_compat import get_logger
+from app.utils.metrics import metrics
+
+
+@dataclass(slots=True)
+class ConfigArchiver:
+    """Move configs inactive for ``archive_after_seconds`` out of the hot table.
+
+    Every reissue leaves the previous row behind with its private key and
+    ``config_text``. Age is counted from ``deactivated_at``, so a long-lived config
+    that was just replaced stays around for the full retention. Batches of
+    ``batch_size`` are moved into ``wireguard_configs_archive`` without key
+    material, so the hot table and its indexes only grow with active users.
+    """
+
+    wg_repo: WireGuardConfigsRepository
+    archive_after_seconds: float
+    batch_size: int = 1000
+    clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)
+    _logger: Any = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._logger = get_logger(__name__)
+
+    async def run_once(self) -> int:
+        """Archive everything that is due; return the number of rows moved."""
+
+        deactivated_before = self.clock() - timedelta(seconds=self.archive_after_seconds)
+        total = 0
+        while True:
+            moved = await self.wg_repo.archive_inactive(deactivated_before, self.batch_size)
+            total += moved
+            if moved < self.batch_size:
+                break
+        if total:
+            metrics.inc("configs_archived_total", total)
+            self._logger.info("Inactive configs archived", rows=total)
+        return total
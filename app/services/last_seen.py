@@ -0,0 +1,58 @@
+"""Write-behind tracker coalescing users.last_seen updates."""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from app.database.repositories import UsersRepository
+from app.utils.logging_compat import get_logger
+
+
+@dataclass(slots=True)
+class LastSeenTracker:
+    """Collect last-seen timestamps in memory and flush them as one batched UPDATE.
+
+    ``flush`` runs as a per-replica scheduler job (the buffer is local to the process).
+    """
+
+    users_repo: UsersRepository
+    _pending: dict[int, datetime] = field(default_factory=dict, init=False, repr=False)
+    _logger: Any = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._logger = get_logger(__name__)
+
+    def touch(self, telegram_id: int, seen_at: datetime | None = None) -> None:
+        """Record activity; only the latest timestamp per user is kept until flush."""
+
+        seen_at = seen_at or datetime.now(timezone.utc)
+        current = self._pending.get(telegram_id)
+        if current is None or current < seen_at:
+            self._pending[telegram_id] = seen_at
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """Write pending timestamps in a single statement and return users count."""
+
+        if not self._pending:
+            return 0
+
+        batch, self._pending = self._pending, {}
+        try:
+            await self.users_repo.touch_last_seen_many(list(batch.keys()), list(batch.values()))
+        except Exception:
+            for telegram_id, seen_at in batch.items():
+                self.touch(telegram_id, seen_at)
+            raise
+        return len(batch)
+
+    async def stop(self) -> None:
+        """Write what is still buffered; called after the scheduler has stopped."""
+
+        try:
+            await self.flush()
+        except Exception:  # noqa: BLE001
+            self._logger.exception("Failed to flush last_seen on shutdown", pending=self.pending_count)
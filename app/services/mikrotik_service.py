@@ -38,8 +38,9 @@ class MikroTikService:
         public_key: str,
         ip_address: str,
         preshared_key: str | None,
+        peer_id: str | None = None,
     ) -> tuple[str, str | None]:
-        """Ensure peer exists and return action + peer id."""
+        """Ensure peer exists and return action + peer id; ``peer_id`` is updated in place if given."""
 
         peer_name = f"peer-{config_id}"
         comment = f"tg:{telegram_id}:profile:{config_id}"
@@ -50,6 +51,7 @@ class MikroTikService:
             allowed_address=f"{ip_address}/32",
             preshared_key=preshared_key,
             comment=comment,
+            peer_id=peer_id,
         )
 
     async def test_connection(self) -> tuple[str, int]:
@@ -59,10 +61,20 @@ class MikroTikService:
         peers = await self._client.list_wireguard_peers(self.settings.wg_interface_name)
         return identity, len(peers)
 
+    async def list_wireguard_peers(self) -> list[dict[str, str]]:
+        """Return the whole peer table of the configured interface in one API call."""
+
+        return await self._client.list_wireguard_peers(self.settings.wg_interface_name)
+
     async def remove_wireguard_peer(self, peer_id: str) -> None:
         """Delete peer by RouterOS internal ID."""
 
         await self._client.remove_wireguard_peer(peer_id)
 
+    async def remove_wireguard_peers(self, peer_ids: list[str]) -> list[str]:
+        """Delete many peers in one router round trip; return the removed ids."""
+
+        return await self._client.remove_wireguard_peers(peer_ids)
+
 
 __all__ = ["MikroTikService", "MikroTikClientError"]
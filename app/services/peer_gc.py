@@ -0,0 +1,105 @@
+"""Garbage collection of router peers whose clients stopped connecting."""
+
+import re
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from aiogram import Bot
+
+from app.database.repositories import LogsRepository, WireGuardConfigsRepository
+from app.services.access_admin import AccessAdminService
+from app.services.mikrotik_service import MikroTikService
+from app.ui import texts
+from app.utils.logging_compat import get_logger
+from app.utils.metrics import metrics
+from app.utils.outbound import fire_and_forget
+
+_DURATION_RE = re.compile(r"(?:\d+(?:ms|w|d|h|m|s))+")
+_DURATION_PART_RE = re.compile(r"(\d+)(ms|w|d|h|m|s)")
+_CLOCK_RE = re.compile(r"(?:(\d+)d)?(\d+):(\d{2}):(\d{2})")
+_UNIT_SECONDS = {"w": 604800.0, "d": 86400.0, "h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_routeros_duration(raw: str | None) -> float | None:
+    """Seconds in a RouterOS duration such as ``1w2d3h4m5s`` or ``1d02:03:04``; None if unset."""
+
+    value = (raw or "").strip()
+    if _DURATION_RE.fullmatch(value):
+        return sum(int(amount) * _UNIT_SECONDS[unit] for amount, unit in _DURATION_PART_RE.findall(value))
+    match = _CLOCK_RE.fullmatch(value)
+    if match:
+        days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+        return days * 86400.0 + hours * 3600.0 + minutes * 60.0 + seconds
+    return None
+
+
+def idle_peer_ids(peers: list[dict[str, str]], idle_after_seconds: float) -> list[str]:
+    """Ids of peers whose last handshake is older than the threshold or that never shook hands."""
+
+    idle: list[str] = []
+    for peer in peers:
+        peer_id = peer.get(".id")
+        if not peer_id:
+            continue
+        age = parse_routeros_duration(peer.get("last-handshake"))
+        if age is None or age >= idle_after_seconds:
+            idle.append(peer_id)
+    return idle
+
+
+@dataclass(slots=True)
+class IdlePeerCollector:
+    """Deactivate configs whose router peer has been idle for ``idle_after_seconds``.
+
+    The peer table is read once per run; candidates are removed from the router
+    ``batch_size`` at a time and their configs deactivated once the peers are gone,
+    so a failed batch is simply retried on the next run. Only bot-issued configs
+    older than the threshold are touched, so a fresh reissue or a hand-made peer
+    survives. Users are told they can get a new config straight away.
+    """
+
+    wg_repo: WireGuardConfigsRepository
+    logs_repo: LogsRepository
+    access_admin: AccessAdminService
+    mikrotik_service: MikroTikService
+    bot: Bot
+    idle_after_seconds: float
+    batch_size: int = 200
+    clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)
+    _logger: Any = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._logger = get_logger(__name__)
+
+    async def run_once(self) -> int:
+        """Collect idle peers; return the number of configs deactivated."""
+
+        if not self.mikrotik_service.settings.mikrotik_enabled:
+            return 0
+        peers = await self.mikrotik_service.list_wireguard_peers()
+        candidates = idle_peer_ids(peers, self.idle_after_seconds)
+        issued_before = self.clock() - timedelta(seconds=self.idle_after_seconds)
+        days = int(self.idle_after_seconds // 86400)
+
+        removal = self.access_admin.peer_removal()
+        total = 0
+        for start in range(0, len(candidates), self.batch_size):
+            deactivated, _ = await self.wg_repo.revoke_idle_peers(
+                candidates[start : start + self.batch_size], issued_before, removal
+            )
+            total += len(deactivated)
+            for telegram_id, _ in deactivated:
+                notice = self.bot.send_message(telegram_id, texts.PEER_IDLE_REVOKED.format(days=days))
+                fire_and_forget(notice, f"peer-idle:{telegram_id}")
+
+        if total:
+            metrics.inc("idle_peers_collected_total", total)
+            removed, failed = removal.removed, removal.failed
+            self._logger.info("Idle peers collected", configs=total, peers_removed=removed, peers_failed=failed)
+            await self.logs_repo.add(
+                event_type="idle_peers_collected",
+                details={"configs": total, "peers_removed": removed, "peers_failed": failed, "idle_days": days},
+            )
+        return total
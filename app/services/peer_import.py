@@ -0,0 +1,78 @@
+"""Adopt peers created on the router by hand into the bot's database."""
+
+import re
+from dataclasses import dataclass
+from ipaddress import IPv4Address, IPv4Network, ip_interface
+
+from app.database.repositories import ImportedPeer, PeerImportRepository, PeerImportSummary
+from app.services.mikrotik_service import MikroTikService
+from app.utils.logging_compat import get_logger
+
+# Bot-created peers use "tg:<telegram_id>:profile:<config_id>"; hand-made ones "tg:<telegram_id>".
+_COMMENT_RE = re.compile(r"^tg:(\d+)(?::|$)")
+
+
+def _peer_ip(allowed_address: str, network: IPv4Network) -> str | None:
+    for entry in allowed_address.split(","):
+        try:
+            interface = ip_interface(entry.strip())
+        except ValueError:
+            continue
+        if isinstance(interface.ip, IPv4Address) and interface.network.prefixlen == 32 and interface.ip in network:
+            return str(interface.ip)
+    return None
+
+
+def parse_router_peers(peers: list[dict[str, str]], network_cidr: str) -> tuple[list[ImportedPeer], int]:
+    """Turn raw RouterOS peers into import records; return them and the number skipped.
+
+    Peers without a single /32 address inside the bot network cannot collide with
+    the allocator and are skipped, as are later peers repeating an address.
+    """
+
+    network = IPv4Network(network_cidr)
+    records: list[ImportedPeer] = []
+    seen_ips: set[str] = set()
+    skipped = 0
+    for peer in peers:
+        ip_address = _peer_ip(peer.get("allowed-address", ""), network)
+        if ip_address is None or ip_address in seen_ips or not peer.get(".id") or not peer.get("public-key"):
+            skipped += 1
+            continue
+        seen_ips.add(ip_address)
+        comment = peer.get("comment", "")
+        match = _COMMENT_RE.match(comment)
+        records.append(
+            ImportedPeer(
+                peer_id=peer[".id"],
+                public_key=peer["public-key"],
+                ip_address=ip_address,
+                telegram_id=int(match.group(1)) if match else None,
+                comment=comment,
+            )
+        )
+    return records, skipped
+
+
+@dataclass(slots=True)
+class PeerImportService:
+    """Pull the router peer table once and reconcile it in a single transaction."""
+
+    repo: PeerImportRepository
+    mikrotik_service: MikroTikService
+
+    async def run(self, *, apply: bool) -> PeerImportSummary:
+        raw_peers = await self.mikrotik_service.list_wireguard_peers()
+        records, skipped = parse_router_peers(raw_peers, self.mikrotik_service.settings.wg_network_cidr)
+        summary = await self.repo.import_peers(records, apply=apply)
+        summary.skipped = skipped
+        get_logger(__name__).info(
+            "Router peers reconciled",
+            peers=summary.peers,
+            adopted=summary.adopted,
+            reserved=summary.reserved,
+            released=summary.released,
+            skipped=skipped,
+            applied=apply,
+        )
+        return summary
@@ -0,0 +1,68 @@
+"""Content-addressed QR images for configs, encoded in the CPU pool."""
+
+import asyncio
+
+from app.utils.cache import TTLCache
+from app.utils.cpu_pool import CpuPool
+from app.utils.metrics import metrics
+from app.utils.qr import QrFormat, content_key, render_qr
+
+_CACHE_TTL_SECONDS = 24 * 3600
+
+
+class QrService:
+    """Encode each distinct config at most once per process and upload it at most once.
+
+    Encoded images and Telegram file_ids are kept in LRU caches keyed by the SHA-256
+    of the config text; concurrent requests for the same key share one encode.
+    """
+
+    def __init__(self, cpu_pool: CpuPool, *, scale: int = 6, max_entries: int = 256, kind: QrFormat = "png") -> None:
+        self._cpu_pool = cpu_pool
+        self._scale = scale
+        self._kind = kind
+        self._images: TTLCache[str, bytes] = TTLCache(maxsize=max_entries, ttl_seconds=_CACHE_TTL_SECONDS)
+        self._file_ids: TTLCache[str, str] = TTLCache(maxsize=max_entries * 4, ttl_seconds=_CACHE_TTL_SECONDS)
+        self._inflight: dict[str, asyncio.Future[bytes | None]] = {}
+
+    @staticmethod
+    def key(config_text: str) -> str:
+        return content_key(config_text)
+
+    def cached_file_id(self, key: str) -> str | None:
+        return self._file_ids.get(key)
+
+    def remember_file_id(self, key: str, file_id: str) -> None:
+        self._file_ids.set(key, file_id)
+        # Once Telegram has the image, the bytes are no longer needed.
+        self._images.pop(key)
+
+    async def image(self, config_text: str) -> bytes | None:
+        """Return the encoded QR image or None when the config does not fit a QR code."""
+
+        key = self.key(config_text)
+        cached = self._images.get(key)
+        if cached is not None:
+            metrics.inc("qr_cache_hits_total")
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future: asyncio.Future[bytes | None] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            metrics.inc("qr_encodes_total")
+            image = await self._cpu_pool.run(render_qr, config_text, self._kind, self._scale)
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        future.set_result(image)
+        if image is not None:
+            self._images.set(key, image)
+        return image
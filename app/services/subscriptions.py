@@ -0,0 +1,133 @@
+"""Subscription expiry engine: heap-gated sweeps, batched revocation, reminders."""
+
+import heapq
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from aiogram import Bot
+
+from app.database.repositories import Subscription, SubscriptionsRepository
+from app.services.access_admin import AccessAdminService
+from app.ui import texts
+from app.utils.logging_compat import get_logger
+from app.utils.metrics import metrics
+from app.utils.outbound import fire_and_forget
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def subscription_lapsed(subscription: Subscription | None, now: datetime | None = None) -> bool:
+    """True if the user had a subscription and it is over; users never subscribed are not gated."""
+
+    if subscription is None:
+        return False
+    return subscription.status != "active" or subscription.expires_at <= (now or _utcnow())
+
+
+@dataclass(slots=True)
+class SubscriptionExpiryService:
+    """Sweep lapsed subscriptions only when the next known expiration is due.
+
+    ``run_once`` is a cheap periodic tick (a singleton scheduler job). A min-heap
+    holds (expires_at, id) for active subscriptions expiring within
+    ``horizon_seconds``; it is reloaded from the ``(status, expires_at)`` index once
+    per horizon and fed by ``schedule`` when an admin grants time. The heap only
+    decides *when* to hit the database: the sweep itself claims due rows there, so
+    each wake-up costs work proportional to the expiring set and a stale heap entry
+    (e.g. a subscription that was extended) just causes an empty sweep.
+    """
+
+    repo: SubscriptionsRepository
+    access_admin: AccessAdminService
+    bot: Bot
+    batch_size: int = 500
+    horizon_seconds: float = 3600.0
+    reminder_before_seconds: float = 72 * 3600.0
+    reminder_interval_seconds: float = 600.0
+    clock: Callable[[], datetime] = _utcnow
+    _heap: list[tuple[datetime, int]] = field(default_factory=list, init=False, repr=False)
+    _loaded_until: datetime | None = field(default=None, init=False, repr=False)
+    _next_reminders: datetime | None = field(default=None, init=False, repr=False)
+    _logger: Any = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._logger = get_logger(__name__)
+
+    def schedule(self, subscription: Subscription) -> None:
+        """Track a new or extended subscription if it falls inside the loaded horizon."""
+
+        if self._loaded_until is not None and subscription.expires_at <= self._loaded_until:
+            heapq.heappush(self._heap, (subscription.expires_at, subscription.id))
+
+    async def refresh(self) -> None:
+        now = self.clock()
+        until = now + timedelta(seconds=self.horizon_seconds)
+        upcoming = await self.repo.upcoming(until, self.batch_size)
+        if len(upcoming) == self.batch_size:
+            # More are due within the horizon than we load: come back after the last one.
+            until = upcoming[-1][0]
+        self._heap = upcoming
+        heapq.heapify(self._heap)
+        self._loaded_until = until
+        metrics.set_gauge("subscriptions_scheduled", len(self._heap))
+
+    async def sweep(self) -> int:
+        """Expire everything that is due in batches; return the number expired."""
+
+        now = self.clock()
+        while self._heap and self._heap[0][0] <= now:
+            heapq.heappop(self._heap)
+
+        total = 0
+        while True:
+            expired = await self.repo.claim_expired(self.batch_size)
+            if not expired:
+                break
+            total += len(expired)
+            telegram_ids = [subscription.telegram_id for subscription in expired]
+            configs, peers_removed, peers_failed = await self.access_admin.revoke_configs(telegram_ids)
+            self._logger.info(
+                "Subscriptions expired",
+                count=len(expired),
+                configs=configs,
+                peers_removed=peers_removed,
+                peers_failed=peers_failed,
+            )
+            for telegram_id in telegram_ids:
+                notice = self.bot.send_message(telegram_id, texts.SUBSCRIPTION_EXPIRED)
+                fire_and_forget(notice, f"sub-expired:{telegram_id}")
+            if len(expired) < self.batch_size:
+                break
+        if total:
+            metrics.inc("subscriptions_expired_total", total)
+        return total
+
+    async def send_reminders(self) -> int:
+        now = self.clock()
+        self._next_reminders = now + timedelta(seconds=self.reminder_interval_seconds)
+        until = now + timedelta(seconds=self.reminder_before_seconds)
+        total = 0
+        while True:
+            due = await self.repo.claim_reminders(until, self.batch_size)
+            for subscription in due:
+                text = texts.SUBSCRIPTION_REMINDER.format(date=subscription.expires_at.strftime("%d.%m.%Y %H:%M UTC"))
+                fire_and_forget(self.bot.send_message(subscription.telegram_id, text), f"sub-reminder:{subscription.id}")
+            total += len(due)
+            if len(due) < self.batch_size:
+                break
+        if total:
+            metrics.inc("subscription_reminders_total", total)
+        return total
+
+    async def run_once(self) -> None:
+        now = self.clock()
+        if self._loaded_until is None or now >= self._loaded_until:
+            await self.refresh()
+        if self._heap and self._heap[0][0] <= now:
+            await self.sweep()
+        if self._next_reminders is None or now >= self._next_reminders:
+            await self.send_reminders()
@@ -0,0 +1,208 @@
+"""Read-through cache for users with cross-instance invalidation."""
+
+import asyncio
+import contextlib
+import uuid
+from datetime import datetime
+
+import asyncpg
+from redis.asyncio import Redis
+
+from app.database.repositories import User, UsersRepository, UserUpsertResult
+from app.utils.cache import TTLCache
+from app.utils.logging_compat import get_logger
+from app.utils.metrics import metrics
+
+_INVALIDATION_CHANNEL = "users:invalidate"
+_BOOL_FIELDS = {"pin_verified", "is_active"}
+_INT_FIELDS = {"id", "telegram_id"}
+
+
+def _encode_user(user: User) -> dict[str, str]:
+    payload: dict[str, str] = {}
+    for name in User.__slots__:
+        value = getattr(user, name)
+        if value is None:
+            continue
+        if name in _BOOL_FIELDS:
+            payload[name] = "1" if value else "0"
+        else:
+            payload[name] = str(value)
+    return payload
+
+
+def _decode_user(raw: dict[bytes, bytes]) -> User | None:
+    fields = {key.decode("utf-8"): value.decode("utf-8") for key, value in raw.items()}
+    values: dict[str, object] = {}
+    try:
+        for name in User.__slots__:
+            if name in _INT_FIELDS:
+                values[name] = int(fields[name])
+            elif name in _BOOL_FIELDS:
+                values[name] = fields[name] == "1"
+            else:
+                values[name] = fields.get(name)
+    except (KeyError, ValueError):
+        return None
+    return User(**values)
+
+
+class CachedUsersRepository(UsersRepository):
+    """UsersRepository with a local TTL/LRU layer backed by Redis hashes.
+
+    Writes drop the entry locally and in Redis, then publish the telegram_id on a
+    pub/sub channel so other bot instances evict their local copies too.
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        redis: Redis,
+        *,
+        ttl_seconds: int = 60,
+        max_entries: int = 10000,
+    ) -> None:
+        super().__init__(pool)
+        self._redis = redis
+        self._ttl_seconds = ttl_seconds
+        self._local: TTLCache[int, User] = TTLCache(maxsize=max_entries, ttl_seconds=ttl_seconds)
+        self._instance_id = uuid.uuid4().hex
+        self._listener: asyncio.Task | None = None
+        self._logger = get_logger(__name__)
+
+    @staticmethod
+    def _cache_key(telegram_id: int) -> str:
+        return f"user:{telegram_id}"
+
+    async def get_by_telegram_id(self, telegram_id: int) -> User | None:
+        user = self._local.get(telegram_id)
+        if user is not None:
+            metrics.inc("user_cache_hits_total", layer="local")
+            return user
+
+        try:
+            raw = await self._redis.hgetall(self._cache_key(telegram_id))
+        except Exception:  # noqa: BLE001
+            self._logger.warning("User cache read failed", telegram_id=telegram_id)
+            raw = {}
+        user = _decode_user(raw) if raw else None
+        if user is not None:
+            metrics.inc("user_cache_hits_total", layer="redis")
+            self._local.set(telegram_id, user)
+            return user
+
+        metrics.inc("user_cache_misses_total")
+        user = await super().get_by_telegram_id(telegram_id)
+        if user is not None:
+            await self._remember(user)
+        return user
+
+    async def _remember(self, user: User) -> None:
+        self._local.set(user.telegram_id, user)
+        key = self._cache_key(user.telegram_id)
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                pipe.hset(key, mapping=_encode_user(user))
+                pipe.expire(key, self._ttl_seconds)
+                await pipe.execute()
+        except Exception:  # noqa: BLE001
+            self._logger.warning("User cache write failed", telegram_id=user.telegram_id)
+
+    async def invalidate(self, *telegram_ids: int) -> None:
+        """Evict users locally, in Redis, and on other instances."""
+
+        if not telegram_ids:
+            return
+        for telegram_id in telegram_ids:
+            self._local.pop(telegram_id)
+        metrics.inc("user_cache_invalidations_total", len(telegram_ids))
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.delete(*(self._cache_key(telegram_id) for telegram_id in telegram_ids))
+                pipe.publish(
+                    _INVALIDATION_CHANNEL,
+                    f"{self._instance_id}:{','.join(str(telegram_id) for telegram_id in telegram_ids)}",
+                )
+                await pipe.execute()
+        except Exception:  # noqa: BLE001
+            self._logger.warning("User cache invalidation publish failed", count=len(telegram_ids))
+
+    async def create(self, *args, **kwargs) -> User:
+        user = await super().create(*args, **kwargs)
+        await self.invalidate(user.telegram_id)
+        return user
+
+    async def upsert_seen(
+        self,
+        telegram_id: int,
+        username: str | None,
+        full_name: str | None,
+        role: str,
+        pin_hash: str,
+        access_status: str,
+        last_seen: datetime,
+    ) -> UserUpsertResult:
+        result = await super().upsert_seen(telegram_id, username, full_name, role, pin_hash, access_status, last_seen)
+        if result.created or result.role_changed:
+            await self.invalidate(telegram_id)
+        else:
+            self._local.set(telegram_id, result.user)
+        return result
+
+    async def mark_pin_verified(self, telegram_id: int, verified: bool = True) -> None:
+        await super().mark_pin_verified(telegram_id, verified)
+        await self.invalidate(telegram_id)
+
+    async def set_role(self, telegram_id: int, role: str) -> None:
+        await super().set_role(telegram_id, role)
+        await self.invalidate(telegram_id)
+
+    async def set_access_status(self, telegram_id: int, access_status: str) -> None:
+        await super().set_access_status(telegram_id, access_status)
+        await self.invalidate(telegram_id)
+
+    async def set_access_status_many(self, telegram_ids: list[int], access_status: str) -> tuple[list[int], list[int]]:
+        changed, unchanged = await super().set_access_status_many(telegram_ids, access_status)
+        await self.invalidate(*changed)
+        return changed, unchanged
+
+    def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(), name="user-cache-invalidation")
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+
+    def _apply_invalidation(self, payload: bytes) -> None:
+        origin, _, raw_ids = payload.decode("utf-8").partition(":")
+        if origin == self._instance_id:
+            return
+        for raw_id in raw_ids.split(","):
+            if raw_id.isdigit():
+                self._local.pop(int(raw_id))
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(_INVALIDATION_CHANNEL)
+                # Messages may have been missed while disconnected.
+                self._local.clear()
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=30.0)
+                    if message is not None and message.get("type") == "message":
+                        self._apply_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # noqa: BLE001
+                self._logger.warning("User cache invalidation listener disconnected, retrying")
+                self._local.clear()
+                await asyncio.sleep(1)
+            finally:
+                with contextlib.suppress(Exception):
+                    await pubsub.aclose()
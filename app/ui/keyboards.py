@@ -4,6 +4,7 @@ from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, KeyboardBu
 
 from app.ui.labels import (
     BTN_AUDIT,
+    BTN_BROADCAST,
     BTN_HELP,
     BTN_INSTALL,
     BTN_MIKROTIK,
@@ -29,6 +30,7 @@ def _admin_rows() -> list[list[KeyboardButton]]:
     return [
         [KeyboardButton(text=BTN_REQUESTS), KeyboardButton(text=BTN_USERS)],
         [KeyboardButton(text=BTN_MIKROTIK), KeyboardButton(text=BTN_AUDIT)],
+        [KeyboardButton(text=BTN_BROADCAST)],
     ]
 
 
@@ -52,3 +54,47 @@ def reissue_confirm_keyboard() -> InlineKeyboardMarkup:
             [InlineKeyboardButton(text="❌ Отмена", callback_data="reissue:cancel")],
         ]
     )
+
+
+def pager_keyboard(
+    section: str,
+    prev_cursor: str | None,
+    next_cursor: str | None,
+    rows: list[list[InlineKeyboardButton]] | None = None,
+) -> InlineKeyboardMarkup | None:
+    """Append Prev/Next navigation for keyset-paginated admin lists; None hides a button."""
+
+    keyboard = list(rows or [])
+    nav: list[InlineKeyboardButton] = []
+    if prev_cursor is not None:
+        nav.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"page:{section}:prev:{prev_cursor}"))
+    if next_cursor is not None:
+        nav.append(InlineKeyboardButton(text="Вперёд ➡️", callback_data=f"page:{section}:next:{next_cursor}"))
+    if nav:
+        keyboard.append(nav)
+    if not keyboard:
+        return None
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+def broadcast_audience_keyboard(counts: dict[str, int]) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text=f"👥 Всем активным ({counts['all']})", callback_data="broadcast:send:all")],
+            [
+                InlineKeyboardButton(
+                    text=f"✅ Только одобренным ({counts['approved']})",
+                    callback_data="broadcast:send:approved",
+                )
+            ],
+            [InlineKeyboardButton(text="❌ Отмена", callback_data="broadcast:abort")],
+        ]
+    )
+
+
+def broadcast_jobs_keyboard(running_job_ids: list[int]) -> InlineKeyboardMarkup | None:
+    rows = [
+        [InlineKeyboardButton(text=f"⛔ Остановить #{job_id}", callback_data=f"broadcast:stop:{job_id}")]
+        for job_id in running_job_ids
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=rows) if rows else None
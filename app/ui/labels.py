@@ -10,5 +10,6 @@ BTN_MIKROTIK = "🔧 MikroTik"
 BTN_AUDIT = "🧾 Журнал действий"
 BTN_REQUESTS = "🧑‍💼 Заявки"
 BTN_USERS = "👥 Пользователи"
+BTN_BROADCAST = "📣 Рассылка"
 BTN_SETTINGS = "⚙️ Настройки"
 BTN_LOGIN = "🔐 Войти (PIN)"
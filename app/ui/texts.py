@@ -12,7 +12,12 @@ PIN_BLOCKED = "⛔ Доступ запрещён.\nЕсли считаешь, ч
 VPN_PREPARE = "Готовлю твой VPN… ⏳\nЭто займёт пару секунд."
 VPN_FILE_READY = "✅ Готово! Я отправил тебе конфиг файлом.\nТеперь открой приложение и импортируй файл."
 VPN_TEXT = "📄 Текст конфигурации (если нужно скопировать вручную):\n\n<pre>{config}</pre>"
+VPN_QR = "📷 QR-код конфигурации: отсканируй его в приложении WireGuard на телефоне."
 VPN_WARNING = "⚠️ Не пересылай этот файл другим людям. Он персональный."
+VPN_IMPORTED = (
+    "ℹ️ Твой VPN был настроен администратором вручную, поэтому у бота нет файла конфигурации.\n"
+    "Нажми «🔄 Переустановить VPN», чтобы получить новый конфиг с тем же адресом."
+)
 VPN_ALREADY_EXISTS = (
     "ℹ️ У тебя уже есть VPN.\n"
     "Нажми «✅ Получить VPN», чтобы получить конфиг ещё раз,\n"
@@ -24,6 +29,11 @@ MIKROTIK_FAIL = (
     "⚠️ Сейчас не могу создать подключение (ошибка связи с сервером VPN).\n"
     "Администратор уже видит проблему. Попробуй позже."
 )
+RATE_LIMITED = "⏳ Слишком часто. Попробуй снова через {seconds} с."
+REQUEST_ALREADY_DONE = "✅ Этот запрос уже выполнен — конфиг отправлен выше."
+REQUEST_IN_PROGRESS = "⏳ Запрос уже выполняется, подожди немного."
+PROVISIONING_QUEUED = "⏳ Сейчас много запросов. Ты в очереди: {position}-й, примерно {seconds} с."
+PROVISIONING_OVERLOADED = "🚦 Сервис сейчас перегружен. Попробуй снова через {seconds} с."
 
 HELP_TEXT = "❓ Помощь\nИспользуй кнопки меню ниже: «🧩 Как установить» или «🛠 Если не работает»."
 TROUBLESHOOT_TEXT = (
@@ -42,3 +52,10 @@ INSTALL_TEXTS = {
     "macos": "🍏 macOS:\n1) Установи WireGuard\n2) Import tunnel(s) from file\n3) Activate",
     "linux": "🐧 Ubuntu/Linux:\nGUI: импортируй файл\nCLI: sudo wg-quick up wg0",
 }
+ACCESS_BLOCKED = "⛔ Доступ к VPN заблокирован администратором."
+SUBSCRIPTION_REMINDER = "⏳ Твоя подписка на VPN заканчивается {date}. Обратись к администратору, чтобы продлить её."
+SUBSCRIPTION_EXPIRED = "⌛ Подписка на VPN закончилась, подключение отключено. Обратись к администратору для продления."
+PEER_IDLE_REVOKED = (
+    "🔌 Твоим VPN не пользовались больше {days} дн., поэтому подключение отключено.\n"
+    "Нажми «✅ Получить VPN», чтобы сразу получить новый конфиг."
+)
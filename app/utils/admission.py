@@ -0,0 +1,132 @@
+"""Admission control: bounded queue in front of a fixed number of work slots."""
+
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+
+from aiogram import flags
+from aiogram.dispatcher.flags import FlagDecorator
+
+from app.utils.logging_compat import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+QueuedCallback = Callable[[int, int], Awaitable[None]]
+
+
+class AdmissionRejected(Exception):
+    """Raised when the queue is full; carries a retry hint in seconds."""
+
+    def __init__(self, retry_after_seconds: int) -> None:
+        super().__init__(f"admission queue is full, retry in {retry_after_seconds}s")
+        self.retry_after_seconds = retry_after_seconds
+
+
+class AdmissionController:
+    """Run at most ``concurrency`` jobs; queue up to ``max_queue`` more FIFO, shed the rest.
+
+    The ETA for a queued job is its position divided by the concurrency times an
+    exponential moving average of recent job durations.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        max_queue: int,
+        *,
+        initial_service_seconds: float = 3.0,
+        smoothing: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self._concurrency = concurrency
+        self._max_queue = max_queue
+        self._avg_service = initial_service_seconds
+        self._smoothing = smoothing
+        self._clock = clock
+        self._active = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def estimate_wait(self, position: int) -> int:
+        """Seconds until a job at 1-based queue ``position`` starts."""
+
+        return math.ceil(math.ceil(position / self._concurrency) * self._avg_service)
+
+    @asynccontextmanager
+    async def slot(self, on_queued: QueuedCallback | None = None) -> AsyncIterator[None]:
+        """Hold one work slot; ``on_queued(position, eta_seconds)`` is awaited if the job has to wait."""
+
+        queued_at = self._clock()
+        if self._active < self._concurrency and not self._waiters:
+            self._active += 1
+        else:
+            await self._wait_in_queue(on_queued)
+        metrics.observe("admission_wait_seconds", self._clock() - queued_at, queue=self.name)
+        self._report()
+
+        started_at = self._clock()
+        try:
+            yield
+        finally:
+            elapsed = self._clock() - started_at
+            self._avg_service += (elapsed - self._avg_service) * self._smoothing
+            self._release()
+
+    async def _wait_in_queue(self, on_queued: QueuedCallback | None) -> None:
+        if len(self._waiters) >= self._max_queue:
+            metrics.inc("admission_rejected_total", queue=self.name)
+            raise AdmissionRejected(self.estimate_wait(len(self._waiters) + 1))
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        position = len(self._waiters)
+        self._report()
+        try:
+            if on_queued is not None:
+                try:
+                    await on_queued(position, self.estimate_wait(position))
+                except Exception:  # noqa: BLE001
+                    logger.warning("Admission queue notification failed", queue=self.name)
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            elif future in self._waiters:
+                # A release in the same loop step may already have popped the cancelled future.
+                self._waiters.remove(future)
+                self._report()
+            raise
+
+    def _release(self) -> None:
+        self._active -= 1
+        while self._waiters:
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self._active += 1
+            future.set_result(None)
+            break
+        self._report()
+
+    def _report(self) -> None:
+        metrics.set_gauge("admission_queue_length", len(self._waiters), queue=self.name)
+        metrics.set_gauge("admission_active", self._active, queue=self.name)
+
+
+def admission(queue: str) -> FlagDecorator:
+    """Route a handler through the named admission queue; enforced by AdmissionMiddleware."""
+
+    return flags.admission(queue)
@@ -0,0 +1,85 @@
+"""Concurrency primitives for bounding update processing."""
+
+import asyncio
+import heapq
+import itertools
+from typing import Literal
+
+from aiogram import flags
+from aiogram.dispatcher.flags import FlagDecorator
+
+PriorityName = Literal["high", "normal", "low"]
+
+PRIORITIES: dict[str, int] = {"high": 0, "normal": 1, "low": 2}
+LOWEST_PRIORITY = PRIORITIES["low"]
+
+
+class PrioritySemaphore:
+    """Semaphore granting free slots to the highest-priority waiter first.
+
+    Waiters of equal priority are served FIFO. Low-priority holders are also capped
+    at ``low_limit`` so slow background-style work can never take every slot.
+    """
+
+    def __init__(self, limit: int, low_limit: int | None = None) -> None:
+        self._limit = limit
+        self._low_limit = min(low_limit if low_limit is not None else limit, limit)
+        self._active = 0
+        self._active_low = 0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def _can_take(self, priority: int) -> bool:
+        if self._active >= self._limit:
+            return False
+        return priority < LOWEST_PRIORITY or self._active_low < self._low_limit
+
+    def _take(self, priority: int) -> None:
+        self._active += 1
+        if priority >= LOWEST_PRIORITY:
+            self._active_low += 1
+
+    async def acquire(self, priority: int = PRIORITIES["normal"]) -> None:
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted right before cancellation; hand it on.
+                self.release(priority)
+            raise
+
+    def release(self, priority: int = PRIORITIES["normal"]) -> None:
+        self._active -= 1
+        if priority >= LOWEST_PRIORITY:
+            self._active_low -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            # Heap order means no higher-priority waiter is queued behind the head.
+            if not self._can_take(priority):
+                return
+            heapq.heappop(self._waiters)
+            self._take(priority)
+            future.set_result(None)
+
+
+def handler_priority(level: PriorityName) -> FlagDecorator:
+    """Mark a handler's scheduling priority; enforced by UpdateScheduler."""
+
+    return flags.priority(level)
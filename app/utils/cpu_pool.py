@@ -0,0 +1,57 @@
+"""Dedicated executor for CPU-bound work kept off the event loop."""
+
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Literal, TypeVar
+
+from app.utils.metrics import metrics
+
+T = TypeVar("T")
+
+
+class CpuPool:
+    """Bounded thread/process pool reporting queue depth and task durations."""
+
+    def __init__(self, name: str, workers: int, kind: Literal["thread", "process"] = "thread") -> None:
+        self.name = name
+        self.workers = max(1, workers)
+        self.kind = kind
+        self._executor: Executor | None = None
+        self._inflight = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{self.name}-cpu")
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._inflight - self.workers)
+
+    def _report(self) -> None:
+        metrics.set_gauge("cpu_pool_inflight", self._inflight, pool=self.name)
+        metrics.set_gauge("cpu_pool_queue_depth", self.queue_depth, pool=self.name)
+
+    async def run(self, func: Callable[..., T], *args: object) -> T:
+        """Run ``func(*args)`` in the pool; for process pools it must be picklable."""
+
+        loop = asyncio.get_running_loop()
+        self._inflight += 1
+        self._report()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._inflight -= 1
+            self._report()
+            metrics.observe("cpu_pool_task_seconds", time.perf_counter() - started, pool=self.name)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
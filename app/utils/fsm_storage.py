@@ -0,0 +1,44 @@
+"""Redis FSM storage shared by all bot instances."""
+
+from aiogram.fsm.storage.base import BaseEventIsolation
+from aiogram.fsm.storage.memory import DisabledEventIsolation
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisEventIsolation, RedisStorage
+from redis.asyncio import Redis
+
+from app.config import Settings
+
+
+class SharedRedisStorage(RedisStorage):
+    """RedisStorage on a client owned by the application runtime.
+
+    aiogram closes FSM storage on dispatcher shutdown; the client is shared with
+    sessions and caches, so closing it is left to ``BotRuntime.close``.
+    """
+
+    async def close(self) -> None:
+        return None
+
+
+def build_fsm_storage(redis: Redis, settings: Settings) -> tuple[RedisStorage, BaseEventIsolation]:
+    """Create FSM storage and event isolation for ``Dispatcher``.
+
+    In horizontal-scaling mode updates of one chat are serialized across replicas
+    with a Redis lock; otherwise a single instance needs no cross-process lock.
+    """
+
+    key_builder = DefaultKeyBuilder(prefix=settings.fsm_key_prefix)
+    storage = SharedRedisStorage(
+        redis=redis,
+        key_builder=key_builder,
+        state_ttl=settings.fsm_state_ttl_seconds or None,
+        data_ttl=settings.fsm_data_ttl_seconds or None,
+    )
+    if settings.horizontal_scaling:
+        isolation: BaseEventIsolation = RedisEventIsolation(
+            redis=redis,
+            key_builder=key_builder,
+            lock_kwargs={"timeout": settings.fsm_lock_timeout_seconds},
+        )
+    else:
+        isolation = DisabledEventIsolation()
+    return storage, isolation
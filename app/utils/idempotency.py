@@ -0,0 +1,141 @@
+"""Idempotent execution of user actions across retries, taps and bot instances."""
+
+import asyncio
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from redis.asyncio import Redis
+
+from app.utils.logging_compat import get_logger
+from app.utils.metrics import metrics
+
+_PENDING = b"p:"
+_DONE = b"d:"
+
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+logger = get_logger(__name__)
+
+
+class SingleFlightBusy(Exception):
+    """Raised when another instance holds the action and did not finish in time."""
+
+
+class SingleFlight:
+    """Run one action per key at a time and share its result with duplicates.
+
+    The first caller claims ``{prefix}:{key}`` with ``SET NX`` and runs the action;
+    a bare completion marker replaces the claim for ``result_ttl_seconds``, so no
+    result (config text, keys) is ever written to Redis. Duplicates in the same
+    process await the leader's future and get its result; duplicates on other
+    instances poll the key for up to ``wait_seconds`` and get an empty result once
+    the marker appears. Redis errors fail open and run the action locally.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        prefix: str = "sf",
+        lock_ttl_seconds: int = 60,
+        result_ttl_seconds: int = 15,
+        wait_seconds: float = 5.0,
+        poll_interval_seconds: float = 0.2,
+    ) -> None:
+        self._redis = redis
+        self._release = redis.register_script(_RELEASE_LUA)
+        self._prefix = prefix
+        self._lock_ttl = lock_ttl_seconds
+        self._result_ttl = result_ttl_seconds
+        self._wait = wait_seconds
+        self._poll_interval = poll_interval_seconds
+        self._inflight: dict[str, asyncio.Future[dict[str, Any]]] = {}
+
+    async def run(
+        self,
+        key: str,
+        action: Callable[[], Awaitable[dict[str, Any]]],
+    ) -> tuple[dict[str, Any], bool]:
+        """Return ``(result, shared)``; ``shared`` is True when another call did the work.
+
+        The result is empty when the work was done on another instance.
+        """
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            result = await asyncio.shield(inflight)
+            metrics.inc("single_flight_shared_total", action=key.partition(":")[0])
+            return result, True
+
+        future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result, shared = await self._run_claimed(key, action)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Nobody may be awaiting the future; mark the exception as retrieved.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, shared
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _run_claimed(
+        self,
+        key: str,
+        action: Callable[[], Awaitable[dict[str, Any]]],
+    ) -> tuple[dict[str, Any], bool]:
+        redis_key = f"{self._prefix}:{key}"
+        token = _PENDING + uuid.uuid4().hex.encode()
+        # Followers give up early: they may be holding an admission slot while they wait.
+        deadline = time.monotonic() + self._wait
+        while True:
+            try:
+                claimed = await self._redis.set(redis_key, token, nx=True, ex=self._lock_ttl)
+                current = None if claimed else await self._redis.get(redis_key)
+            except Exception:  # noqa: BLE001
+                logger.warning("Single-flight store unavailable, running action", key=key)
+                return await action(), False
+
+            if claimed:
+                return await self._lead(redis_key, token, action), False
+            if current is not None and current.startswith(_DONE):
+                metrics.inc("single_flight_shared_total", action=key.partition(":")[0])
+                return {}, True
+            if time.monotonic() >= deadline:
+                raise SingleFlightBusy(key)
+            # Either pending on another instance or just released: look again shortly.
+            await asyncio.sleep(self._poll_interval)
+
+    async def _lead(
+        self,
+        redis_key: str,
+        token: bytes,
+        action: Callable[[], Awaitable[dict[str, Any]]],
+    ) -> dict[str, Any]:
+        try:
+            result = await action()
+        except BaseException:
+            try:
+                await self._release(keys=[redis_key], args=[token])
+            except Exception:  # noqa: BLE001
+                logger.warning("Single-flight claim release failed", key=redis_key)
+            raise
+
+        try:
+            await self._redis.set(redis_key, _DONE, ex=self._result_ttl)
+        except Exception:  # noqa: BLE001
+            logger.warning("Single-flight completion store failed", key=redis_key)
+        return result
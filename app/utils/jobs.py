@@ -0,0 +1,293 @@
+"""In-process periodic jobs with jitter, overlap prevention and Redis leader election."""
+
+import asyncio
+import contextlib
+import random
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from redis.asyncio import Redis
+
+from app.utils.logging_compat import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+_RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_CRON_FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 6))
+
+
+class CronSchedule:
+    """Five-field cron expression (minute hour day month weekday, UTC).
+
+    Supports ``*``, ``*/n``, ``a-b``, ``a-b/n`` and comma lists; weekday 0 is Sunday.
+    As in cron, when both day and weekday are restricted either one may match.
+    """
+
+    __slots__ = ("expression", "_values", "_day_any", "_weekday_any")
+
+    def __init__(self, expression: str) -> None:
+        parts = expression.split()
+        if len(parts) != len(_CRON_FIELDS):
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        self._values = [_parse_cron_field(part, low, high) for part, (_, low, high) in zip(parts, _CRON_FIELDS)]
+        self._day_any = parts[2] == "*"
+        self._weekday_any = parts[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self._values[2]
+        weekday_ok = (moment.isoweekday() % 7) in self._values[4]
+        if self._day_any or self._weekday_any:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        minutes, hours, _, months, _ = self._values
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in months:
+                year, month = (candidate.year + 1, 1) if candidate.month == 12 else (candidate.year, candidate.month + 1)
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+
+def _parse_cron_field(raw: str, low: int, high: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in raw.split(","):
+        base, _, step_raw = part.partition("/")
+        step = int(step_raw) if step_raw else 1
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start_raw, end_raw = base.split("-", 1)
+            start, end = int(start_raw), int(end_raw)
+        else:
+            start = int(base)
+            end = high if step_raw else start
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"Invalid cron field {raw!r}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+@dataclass(slots=True)
+class Job:
+    """A periodic coroutine: every ``interval_seconds`` or on a ``cron`` schedule.
+
+    ``singleton`` jobs run only on the replica holding the leader lease. A run that
+    is still going when the next one is due is not started twice; the tick is skipped.
+    """
+
+    name: str
+    func: Callable[[], Awaitable[object]]
+    interval_seconds: float | None = None
+    cron: CronSchedule | None = None
+    jitter_seconds: float = 0.0
+    singleton: bool = False
+    timeout_seconds: float | None = None
+    run_at_start: bool = False
+
+    def __post_init__(self) -> None:
+        if (self.interval_seconds is None) == (self.cron is None):
+            raise ValueError(f"Job {self.name} needs exactly one of interval_seconds or cron")
+
+    def delay_until_next(self, now: datetime) -> float:
+        if self.cron is not None:
+            delay = (self.cron.next_after(now) - now).total_seconds()
+        else:
+            delay = float(self.interval_seconds or 0.0)
+        if self.jitter_seconds:
+            delay += random.uniform(0, self.jitter_seconds)
+        return max(0.0, delay)
+
+
+class LeaderLease:
+    """Redis lease held by one replica at a time: ``SET NX PX`` plus owner-checked renewals.
+
+    Redis errors count as lost leadership, so singleton jobs stop rather than risk
+    running on two replicas.
+    """
+
+    def __init__(self, redis: Redis, key: str, *, ttl_seconds: float = 30.0, owner: str | None = None) -> None:
+        self._redis = redis
+        self._key = key
+        self._ttl_ms = int(ttl_seconds * 1000)
+        self.owner = owner or uuid.uuid4().hex
+        self._renew = redis.register_script(_RENEW_LUA)
+        self._release = redis.register_script(_RELEASE_LUA)
+        self.is_leader = False
+
+    @property
+    def renew_interval_seconds(self) -> float:
+        return self._ttl_ms / 3000
+
+    async def refresh(self) -> bool:
+        """Renew the lease if held, otherwise try to take it; return leadership."""
+
+        try:
+            if self.is_leader:
+                held = bool(await self._renew(keys=[self._key], args=[self.owner, self._ttl_ms]))
+            else:
+                held = bool(await self._redis.set(self._key, self.owner, nx=True, px=self._ttl_ms))
+        except Exception:  # noqa: BLE001
+            logger.warning("Leader lease refresh failed", key=self._key)
+            held = False
+        if held != self.is_leader:
+            logger.info("Leadership changed", key=self._key, leader=held, owner=self.owner)
+        self.is_leader = held
+        metrics.set_gauge("scheduler_leader", 1.0 if held else 0.0)
+        return held
+
+    async def release(self) -> None:
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        metrics.set_gauge("scheduler_leader", 0.0)
+        with contextlib.suppress(Exception):
+            await self._release(keys=[self._key], args=[self.owner])
+
+
+@dataclass(slots=True)
+class JobScheduler:
+    """Runs registered jobs, each in its own loop task, until ``stop``.
+
+    Durations are recorded as ``job_duration_seconds{job}``, outcomes as
+    ``job_runs_total{job,status}`` with status ok/error/timeout/overlap/not_leader.
+    """
+
+    lease: LeaderLease | None = None
+    clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)
+    _jobs: list[Job] = field(default_factory=list, init=False, repr=False)
+    _loops: list[asyncio.Task] = field(default_factory=list, init=False, repr=False)
+    _running: dict[str, asyncio.Task] = field(default_factory=dict, init=False, repr=False)
+
+    def add(self, job: Job) -> None:
+        if any(existing.name == job.name for existing in self._jobs):
+            raise ValueError(f"Job {job.name} is already registered")
+        if job.singleton and self.lease is None:
+            raise ValueError(f"Singleton job {job.name} needs a leader lease")
+        self._jobs.append(job)
+
+    @property
+    def jobs(self) -> list[Job]:
+        return list(self._jobs)
+
+    def start(self) -> None:
+        if self._loops:
+            return
+        if self.lease is not None and any(job.singleton for job in self._jobs):
+            self._loops.append(asyncio.create_task(self._lease_loop(), name="scheduler-lease"))
+        for job in self._jobs:
+            self._loops.append(asyncio.create_task(self._job_loop(job), name=f"job-{job.name}"))
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Stop scheduling, give running jobs ``timeout`` seconds to finish, release the lease."""
+
+        for task in self._loops:
+            task.cancel()
+        for task in self._loops:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._loops.clear()
+
+        running = list(self._running.values())
+        if running:
+            _, pending = await asyncio.wait(running, timeout=timeout)
+            for task in pending:
+                logger.warning("Cancelling job on shutdown", job=task.get_name())
+                task.cancel()
+            for task in pending:
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await task
+        if self.lease is not None:
+            await self.lease.release()
+
+    async def run_job(self, job: Job) -> str:
+        """Run one tick of ``job`` now and return its status."""
+
+        task = self._launch(job)
+        if isinstance(task, str):
+            return task
+        return await asyncio.shield(task)
+
+    def _launch(self, job: Job) -> asyncio.Task[str] | str:
+        if job.singleton and (self.lease is None or not self.lease.is_leader):
+            return self._record(job, "not_leader")
+        current = self._running.get(job.name)
+        if current is not None and not current.done():
+            logger.warning("Job still running, skipping tick", job=job.name)
+            return self._record(job, "overlap")
+
+        # A separate task from the job loop, so shutdown can let the run finish (see ``stop``).
+        task = asyncio.create_task(self._execute(job), name=f"job-run-{job.name}")
+        self._running[job.name] = task
+
+        def forget(done: asyncio.Task) -> None:
+            if self._running.get(job.name) is done:
+                del self._running[job.name]
+
+        task.add_done_callback(forget)
+        return task
+
+    async def _execute(self, job: Job) -> str:
+        started = time.perf_counter()
+        try:
+            if job.timeout_seconds is not None:
+                await asyncio.wait_for(job.func(), timeout=job.timeout_seconds)
+            else:
+                await job.func()
+        except asyncio.TimeoutError:
+            logger.error("Job timed out", job=job.name, timeout=job.timeout_seconds)
+            status = "timeout"
+        except Exception:  # noqa: BLE001
+            logger.exception("Job failed", job=job.name)
+            status = "error"
+        else:
+            status = "ok"
+        metrics.observe("job_duration_seconds", time.perf_counter() - started, job=job.name)
+        return self._record(job, status)
+
+    @staticmethod
+    def _record(job: Job, status: str) -> str:
+        metrics.inc("job_runs_total", job=job.name, status=status)
+        return status
+
+    async def _job_loop(self, job: Job) -> None:
+        if not job.run_at_start:
+            await asyncio.sleep(job.delay_until_next(self.clock()))
+        while True:
+            # Not awaited: a long run must not delay the next tick, which then reports overlap.
+            self._launch(job)
+            await asyncio.sleep(job.delay_until_next(self.clock()))
+
+    async def _lease_loop(self) -> None:
+        assert self.lease is not None
+        while True:
+            await self.lease.refresh()
+            await asyncio.sleep(self.lease.renew_interval_seconds)
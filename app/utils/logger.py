@@ -45,4 +45,3 @@ def setup_logging(level: str = "INFO", log_file_path: str = "") -> None:
         logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True,
     )
-PY
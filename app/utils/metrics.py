@@ -0,0 +1,66 @@
+"""Process-local metrics registry with Prometheus-style text rendering."""
+
+from collections import defaultdict
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class TimingStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+
+def _key(name: str, labels: dict[str, str]) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f'{label}="{value}"' for label, value in sorted(labels.items()))
+    return f"{name}{{{rendered}}}"
+
+
+class Metrics:
+    """Counters, gauges and timing summaries kept in memory."""
+
+    def __init__(self) -> None:
+        self._counters: dict[str, float] = defaultdict(float)
+        self._gauges: dict[str, float] = {}
+        self._timings: dict[str, TimingStats] = defaultdict(TimingStats)
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        self._counters[_key(name, labels)] += value
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        self._gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        stats = self._timings[_key(name, labels)]
+        stats.count += 1
+        stats.total += seconds
+        stats.max = max(stats.max, seconds)
+
+    def counter(self, name: str, **labels: str) -> float:
+        return self._counters.get(_key(name, labels), 0.0)
+
+    def gauge(self, name: str, **labels: str) -> float:
+        return self._gauges.get(_key(name, labels), 0.0)
+
+    def render_text(self) -> str:
+        """Render all metrics in Prometheus exposition-like text format."""
+
+        lines = [f"{key} {value:g}" for key, value in sorted(self._counters.items())]
+        lines.extend(f"{key} {value:g}" for key, value in sorted(self._gauges.items()))
+        for key, stats in sorted(self._timings.items()):
+            name, _, labels = key.partition("{")
+            suffix = "{" + labels if labels else ""
+            lines.append(f"{name}_count{suffix} {stats.count}")
+            lines.append(f"{name}_sum{suffix} {stats.total:.6f}")
+            lines.append(f"{name}_max{suffix} {stats.max:.6f}")
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        self._counters.clear()
+        self._gauges.clear()
+        self._timings.clear()
+
+
+metrics = Metrics()
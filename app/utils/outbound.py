@@ -0,0 +1,190 @@
+"""Outbound Telegram request throttling, retries and background sends."""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Coroutine, Hashable
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import (
+    TelegramEntityTooLarge,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+
+from app.utils.logging_compat import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+_LIMITED_PREFIXES = ("send", "copy", "forward", "edit")
+
+_background: set[asyncio.Task] = set()
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated_at", "blocked_until")
+
+    def __init__(self, tokens: float, now: float) -> None:
+        self.tokens = tokens
+        self.updated_at = now
+        self.blocked_until = 0.0
+
+    def refill(self, now: float, rate: float, burst: int) -> None:
+        self.tokens = min(float(burst), self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+
+    def wait_for_token(self, rate: float) -> float:
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / rate
+
+
+class OutboundThrottle(BaseRequestMiddleware):
+    """Bot session middleware pacing sends under Telegram's flood limits.
+
+    Send/copy/forward/edit requests take a token from a global bucket (~30 msg/s)
+    and from a bucket of the target chat (~1 msg/s for private chats, 20 msg/min
+    for groups). ``RetryAfter`` pauses that chat for the requested time and the
+    request is retried; network and 5xx errors are retried with exponential
+    backoff. Limits are per process.
+    """
+
+    def __init__(
+        self,
+        *,
+        global_rate: float = 30.0,
+        global_burst: int = 30,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        group_rate: float = 20 / 60,
+        group_burst: int = 5,
+        max_retries: int = 3,
+        backoff_seconds: float = 1.0,
+        max_tracked_chats: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ) -> None:
+        self._global_rate = global_rate
+        self._global_burst = global_burst
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._group_rate = group_rate
+        self._group_burst = group_burst
+        self._max_retries = max_retries
+        self._backoff_seconds = backoff_seconds
+        self._max_tracked_chats = max_tracked_chats
+        self._clock = clock
+        self._sleep = sleep
+        self._global = _Bucket(global_burst, clock())
+        self._chats: dict[Hashable, _Bucket] = {}
+
+    def _chat_limits(self, chat_id: Hashable) -> tuple[float, int]:
+        if isinstance(chat_id, int) and chat_id < 0:
+            return self._group_rate, self._group_burst
+        return self._chat_rate, self._chat_burst
+
+    def _chat_bucket(self, chat_id: Hashable, now: float) -> _Bucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self._max_tracked_chats:
+                self._prune(now)
+            bucket = self._chats[chat_id] = _Bucket(self._chat_limits(chat_id)[1], now)
+        return bucket
+
+    def _prune(self, now: float) -> None:
+        for chat_id, bucket in list(self._chats.items()):
+            rate, burst = self._chat_limits(chat_id)
+            bucket.refill(now, rate, burst)
+            if bucket.tokens >= burst and bucket.blocked_until <= now:
+                del self._chats[chat_id]
+
+    def reserve(self, chat_id: Hashable) -> float:
+        """Take tokens for one send to ``chat_id`` or return seconds to wait first."""
+
+        now = self._clock()
+        rate, burst = self._chat_limits(chat_id)
+        chat = self._chat_bucket(chat_id, now)
+        chat.refill(now, rate, burst)
+        self._global.refill(now, self._global_rate, self._global_burst)
+        wait = max(
+            chat.blocked_until - now,
+            chat.wait_for_token(rate),
+            self._global.wait_for_token(self._global_rate),
+        )
+        if wait > 0:
+            return wait
+        chat.tokens -= 1
+        self._global.tokens -= 1
+        return 0.0
+
+    def pause_chat(self, chat_id: Hashable, seconds: float) -> None:
+        now = self._clock()
+        bucket = self._chat_bucket(chat_id, now)
+        bucket.blocked_until = max(bucket.blocked_until, now + seconds)
+
+    async def _acquire(self, chat_id: Hashable) -> None:
+        waited = 0.0
+        while (wait := self.reserve(chat_id)) > 0:
+            waited += wait
+            await self._sleep(wait)
+        if waited:
+            metrics.observe("outbound_throttle_wait_seconds", waited)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None or not method.__api_method__.startswith(_LIMITED_PREFIXES):
+            return await make_request(bot, method)
+
+        attempt = 0
+        while True:
+            await self._acquire(chat_id)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as exc:
+                metrics.inc("outbound_retry_after_total")
+                if attempt >= self._max_retries:
+                    raise
+                logger.warning("Telegram flood control, pausing chat", chat_id=chat_id, retry_after=exc.retry_after)
+                self.pause_chat(chat_id, exc.retry_after)
+            except TelegramEntityTooLarge:
+                raise
+            except (TelegramNetworkError, TelegramServerError) as exc:
+                if attempt >= self._max_retries:
+                    raise
+                metrics.inc("outbound_retries_total", reason=type(exc).__name__)
+                await self._sleep(self._backoff_seconds * 2**attempt)
+            attempt += 1
+
+
+def fire_and_forget(coro: Coroutine[Any, Any, Any], description: str) -> asyncio.Task:
+    """Run a non-critical send in the background; failures are logged, not raised."""
+
+    async def run() -> None:
+        try:
+            await coro
+        except Exception:  # noqa: BLE001
+            metrics.inc("outbound_background_failures_total")
+            logger.warning("Background send failed", description=description)
+
+    task = asyncio.create_task(run(), name=f"send:{description}")
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+
+async def drain_background(timeout_seconds: float = 10.0) -> None:
+    """Wait for pending background sends before the bot session is closed."""
+
+    if not _background:
+        return
+    _, pending = await asyncio.wait(set(_background), timeout=timeout_seconds)
+    for task in pending:
+        task.cancel()
@@ -0,0 +1,39 @@
+"""QR code rendering for client configs with ``segno``."""
+
+import hashlib
+import io
+from typing import Literal
+
+try:
+    import segno
+except ImportError:  # pragma: no cover - broken or partial installs only
+    segno = None
+
+QrFormat = Literal["png", "svg"]
+
+
+def qr_available() -> bool:
+    return segno is not None
+
+
+def content_key(text: str) -> str:
+    """Content address of a config: identical text always maps to the same key."""
+
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def render_qr(text: str, kind: QrFormat = "png", scale: int = 6) -> bytes | None:
+    """Encode ``text`` as a QR image; None if it does not fit into a QR code.
+
+    Module-level and argument-only so it can run in a process pool.
+    """
+
+    if segno is None:
+        raise RuntimeError("QR rendering requires segno")
+    try:
+        code = segno.make_qr(text, error="m")
+    except segno.DataOverflowError:
+        return None
+    buffer = io.BytesIO()
+    code.save(buffer, kind=kind, scale=scale, border=2)
+    return buffer.getvalue()
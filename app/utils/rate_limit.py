@@ -0,0 +1,108 @@
+"""Redis token-bucket rate limiting for expensive user actions."""
+
+from dataclasses import dataclass
+
+from aiogram import flags
+from aiogram.dispatcher.flags import FlagDecorator
+from redis.asyncio import Redis
+
+from app.config import Settings
+
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local refill_ms = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now_raw = redis.call('TIME')
+local now = tonumber(now_raw[1]) * 1000 + math.floor(tonumber(now_raw[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) / refill_ms)
+local allowed = 0
+local retry_ms = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_ms = math.ceil((cost - tokens) * refill_ms)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * refill_ms) + 1000)
+return {allowed, retry_ms}
+"""
+
+DEFAULT_ROLE = "*"
+
+
+@dataclass(slots=True, frozen=True)
+class RateLimitRule:
+    """Bucket of ``capacity`` tokens refilled by one token every ``refill_seconds``."""
+
+    capacity: int
+    refill_seconds: float
+
+
+@dataclass(slots=True, frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    retry_after_seconds: int = 0
+
+
+class RateLimiter:
+    """Per-user token buckets stored in Redis and updated atomically by a Lua script.
+
+    ``rules`` maps action -> role -> rule; role ``"*"`` is the fallback and a ``None``
+    rule exempts the role from limiting.
+    """
+
+    def __init__(self, redis: Redis, rules: dict[str, dict[str, RateLimitRule | None]], prefix: str = "rl") -> None:
+        self._script = redis.register_script(_TOKEN_BUCKET_LUA)
+        self._rules = rules
+        self._prefix = prefix
+
+    def rule_for(self, action: str, role: str | None) -> RateLimitRule | None:
+        by_role = self._rules.get(action, {})
+        if role is not None and role in by_role:
+            return by_role[role]
+        return by_role.get(DEFAULT_ROLE)
+
+    async def hit(self, action: str, subject_id: int, role: str | None = None, cost: int = 1) -> RateLimitDecision:
+        rule = self.rule_for(action, role)
+        if rule is None:
+            return RateLimitDecision(allowed=True)
+
+        allowed, retry_ms = await self._script(
+            keys=[f"{self._prefix}:{action}:{subject_id}"],
+            args=[rule.capacity, int(rule.refill_seconds * 1000), cost],
+        )
+        return RateLimitDecision(allowed=bool(allowed), retry_after_seconds=-(-int(retry_ms) // 1000))
+
+
+def rate_limited(action: str) -> FlagDecorator:
+    """Mark a handler as limited under ``action``; enforced by RateLimitMiddleware."""
+
+    return flags.rate_limit(action)
+
+
+def build_rate_limit_rules(settings: Settings) -> dict[str, dict[str, RateLimitRule | None]]:
+    """Build per-action/per-role rules from application settings."""
+
+    rules: dict[str, dict[str, RateLimitRule | None]] = {
+        "reissue": {
+            DEFAULT_ROLE: RateLimitRule(
+                capacity=settings.rate_limit_reissue_burst,
+                refill_seconds=settings.rate_limit_reissue_seconds,
+            ),
+        },
+        "new_connection": {
+            DEFAULT_ROLE: RateLimitRule(
+                capacity=settings.rate_limit_new_connection_burst,
+                refill_seconds=settings.rate_limit_new_connection_seconds,
+            ),
+        },
+    }
+    if settings.rate_limit_admin_exempt:
+        for by_role in rules.values():
+            by_role["admin"] = None
+            by_role["superadmin"] = None
+    return rules
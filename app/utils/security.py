@@ -1,7 +1,11 @@
 """Security helpers for PIN hashing and verification."""
 
+import asyncio
+
 import bcrypt
 
+from app.utils.cpu_pool import CpuPool
+
 
 def hash_pin(pin: str, rounds: int = 12) -> str:
     """Hash a PIN with bcrypt."""
@@ -10,7 +14,67 @@ def hash_pin(pin: str, rounds: int = 12) -> str:
     return bcrypt.hashpw(pin.encode("utf-8"), salt).decode("utf-8")
 
 
+def hash_rounds(pin_hash: str) -> int | None:
+    """Return the bcrypt cost factor encoded in ``pin_hash`` (``$2b$<rounds>$...``)."""
+
+    parts = pin_hash.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
 def verify_pin(pin: str, pin_hash: str) -> bool:
     """Verify a PIN against bcrypt hash."""
 
     return bcrypt.checkpw(pin.encode("utf-8"), pin_hash.encode("utf-8"))
+
+
+class PinHasher:
+    """Async bcrypt facade running hashing in a CPU pool.
+
+    The global PIN hash is memoized per PIN value and concurrent callers share one
+    in-flight computation, so a burst of sign-ups costs a single bcrypt run.
+    """
+
+    def __init__(self, pool: CpuPool, rounds: int = 12) -> None:
+        self._pool = pool
+        self._rounds = rounds
+        self._shared: dict[str, asyncio.Future[str]] = {}
+
+    async def hash(self, pin: str) -> str:
+        return await self._pool.run(hash_pin, pin, self._rounds)
+
+    async def verify(self, pin: str, pin_hash: str) -> bool:
+        return await self._pool.run(verify_pin, pin, pin_hash)
+
+    async def shared_hash(self, pin: str) -> str:
+        """Return a hash for ``pin``, computing it at most once per process."""
+
+        future = self._shared.get(pin)
+        if future is None:
+            future = asyncio.ensure_future(self.hash(pin))
+            self._shared = {pin: future}
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            if self._shared.get(pin) is future:
+                self._shared.pop(pin, None)
+            raise
+
+    async def adopt(self, pin: str, pin_hash: str) -> bool:
+        """Reuse an existing hash (e.g. from the database) if it still matches ``pin``.
+
+        A hash made with a different cost factor is rejected so it gets recomputed.
+        """
+
+        if hash_rounds(pin_hash) != self._rounds:
+            return False
+        try:
+            matches = await self.verify(pin, pin_hash)
+        except ValueError:
+            return False
+        if matches:
+            future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+            future.set_result(pin_hash)
+            self._shared = {pin: future}
+        return matches
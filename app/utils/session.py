@@ -1,34 +1,162 @@
 """Redis-backed session manager."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from app.utils.cache import TTLCache
+
+_NO_SESSION = object()
+
+_UPDATE_ACCESS_STATUS_LUA = """
+if redis.call('TYPE', KEYS[1])['ok'] == 'hash' then
+    redis.call('HSET', KEYS[1], 'access_status', ARGV[1])
+    return 1
+end
+return 0
+"""
+
+
+@dataclass(slots=True, frozen=True)
+class SessionInfo:
+    """User snapshot stored in the session so handlers can skip DB reads."""
+
+    telegram_id: int
+    role: str
+    user_id: int | None = None
+    access_status: str | None = None
+    pin_verified: bool = False
 
 
 @dataclass(slots=True)
 class SessionManager:
-    """Simple session manager storing role by Telegram user id."""
+    """Session manager storing a small user snapshot by Telegram user id.
+
+    Sessions live in a Redis hash; lookups are fronted by a short-lived in-process
+    cache which is updated on ``create_session``/``destroy_session``. Other instances
+    may see a change up to ``local_ttl_seconds`` late.
+    """
 
     redis: Redis
     ttl_seconds: int
+    local_ttl_seconds: float = 5.0
+    local_max_entries: int = 10000
+    _local: TTLCache = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._local = TTLCache(maxsize=self.local_max_entries, ttl_seconds=self.local_ttl_seconds)
 
     def _session_key(self, telegram_id: int) -> str:
         return f"session:{telegram_id}"
 
-    async def create_session(self, telegram_id: int, role: str) -> None:
+    async def create_session(
+        self,
+        telegram_id: int,
+        role: str,
+        *,
+        user_id: int | None = None,
+        access_status: str | None = None,
+        pin_verified: bool = True,
+    ) -> None:
         """Create or refresh user session with fixed TTL."""
 
-        await self.redis.set(self._session_key(telegram_id), role, ex=self.ttl_seconds)
+        session = SessionInfo(
+            telegram_id=telegram_id,
+            role=role,
+            user_id=user_id,
+            access_status=access_status,
+            pin_verified=pin_verified,
+        )
+        mapping = {"role": role, "pin_verified": "1" if pin_verified else "0"}
+        if user_id is not None:
+            mapping["user_id"] = str(user_id)
+        if access_status is not None:
+            mapping["access_status"] = access_status
+
+        key = self._session_key(telegram_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, self.ttl_seconds)
+            await pipe.execute()
+        self._local.set(telegram_id, session)
+
+    async def get_session(self, telegram_id: int) -> SessionInfo | None:
+        """Return active session snapshot if it exists."""
+
+        cached = self._local.get(telegram_id)
+        if cached is _NO_SESSION:
+            return None
+        if cached is not None:
+            return cached
+
+        session = await self._load_session(telegram_id)
+        self._local.set(telegram_id, session if session is not None else _NO_SESSION)
+        return session
+
+    async def _load_session(self, telegram_id: int) -> SessionInfo | None:
+        key = self._session_key(telegram_id)
+        try:
+            raw = await self.redis.hgetall(key)
+        except ResponseError:
+            # Sessions created before the hash layout stored only the role string.
+            legacy_role = await self.redis.get(key)
+            if legacy_role is None:
+                return None
+            return SessionInfo(telegram_id=telegram_id, role=_decode(legacy_role), pin_verified=True)
+
+        if not raw:
+            return None
+        fields = {_decode(name): _decode(value) for name, value in raw.items()}
+        user_id = fields.get("user_id")
+        return SessionInfo(
+            telegram_id=telegram_id,
+            role=fields.get("role", "user"),
+            user_id=int(user_id) if user_id else None,
+            access_status=fields.get("access_status"),
+            pin_verified=fields.get("pin_verified") == "1",
+        )
 
     async def get_role(self, telegram_id: int) -> str | None:
         """Get active role if session exists."""
 
-        role = await self.redis.get(self._session_key(telegram_id))
-        if role is None:
-            return None
-        return role.decode("utf-8") if isinstance(role, bytes) else str(role)
+        session = await self.get_session(telegram_id)
+        return session.role if session is not None else None
+
+    async def update_access_status(self, telegram_id: int, access_status: str) -> None:
+        """Update access status of an existing session without creating one."""
+
+        await self.redis.eval(_UPDATE_ACCESS_STATUS_LUA, 1, self._session_key(telegram_id), access_status)
+        self._local.pop(telegram_id)
 
     async def destroy_session(self, telegram_id: int) -> None:
         """Delete session key."""
 
         await self.redis.delete(self._session_key(telegram_id))
+        self._local.set(telegram_id, _NO_SESSION)
+
+    async def update_access_status_many(self, telegram_ids: list[int], access_status: str) -> None:
+        """Bulk variant of ``update_access_status`` in one pipeline round trip."""
+
+        if not telegram_ids:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for telegram_id in telegram_ids:
+                pipe.eval(_UPDATE_ACCESS_STATUS_LUA, 1, self._session_key(telegram_id), access_status)
+            await pipe.execute()
+        for telegram_id in telegram_ids:
+            self._local.pop(telegram_id)
+
+    async def destroy_sessions(self, telegram_ids: list[int]) -> None:
+        """Delete many sessions with a single DEL."""
+
+        if not telegram_ids:
+            return
+        await self.redis.delete(*(self._session_key(telegram_id) for telegram_id in telegram_ids))
+        for telegram_id in telegram_ids:
+            self._local.set(telegram_id, _NO_SESSION)
+
+
+def _decode(value: bytes | str) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
@@ -0,0 +1,216 @@
+"""Webhook server mode with optional multi-process workers.
+
+With ``WEBHOOK_WORKERS=1`` a single process serves Telegram directly. With more
+workers the parent process becomes a thin front proxy: it verifies the secret
+token and forwards each update to worker ``user_id % N`` on a local port, so all
+updates of one user are handled by the same process and keep their order there.
+Worker 0 registers the webhook. If any worker dies the front process stops the
+others and exits non-zero, leaving restarts to the process supervisor.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import multiprocessing
+import signal
+from collections.abc import Awaitable
+from typing import Any
+
+import aiohttp
+from aiohttp import web
+from aiogram import Bot
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from app.config import Settings, get_settings
+from app.utils.logger import setup_logging
+from app.utils.logging_compat import get_logger
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+logger = get_logger(__name__)
+
+
+def shard_for_update(update: dict[str, Any], workers: int) -> int:
+    """Pick worker index for an update: by sender id, falling back to update_id."""
+
+    for value in update.values():
+        if not isinstance(value, dict):
+            continue
+        sender = value.get("from") or value.get("user")
+        if isinstance(sender, dict) and isinstance(sender.get("id"), int):
+            return sender["id"] % workers
+    return int(update.get("update_id", 0)) % workers
+
+
+def _validate(settings: Settings) -> None:
+    if not settings.webhook_base_url:
+        raise RuntimeError("WEBHOOK_BASE_URL is required when BOT_MODE=webhook")
+    if not settings.webhook_secret:
+        raise RuntimeError("WEBHOOK_SECRET is required when BOT_MODE=webhook")
+
+
+async def _wait_for_stop_signal() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+
+async def _watch_workers(processes: list[multiprocessing.process.BaseProcess], interval: float = 1.0) -> None:
+    """Return as soon as any worker process has exited."""
+
+    while True:
+        for process in processes:
+            if not process.is_alive():
+                logger.error("Webhook worker exited", worker=process.name, exitcode=process.exitcode)
+                return
+        await asyncio.sleep(interval)
+
+
+async def _serve(app: web.Application, host: str, port: int, *, until: Awaitable[None] | None = None) -> None:
+    """Serve ``app`` until SIGINT/SIGTERM or, if given, until ``until`` completes."""
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=host, port=port)
+    await site.start()
+    logger.info("Webhook server listening", host=host, port=port)
+    waiters = [asyncio.ensure_future(_wait_for_stop_signal())]
+    if until is not None:
+        waiters.append(asyncio.ensure_future(until))
+    try:
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+        await runner.cleanup()
+
+
+async def _register_webhook(bot: Bot, settings: Settings, allowed_updates: list[str]) -> None:
+    await bot.set_webhook(
+        url=settings.webhook_base_url.rstrip("/") + settings.webhook_path,
+        secret_token=settings.webhook_secret,
+        allowed_updates=allowed_updates,
+        max_connections=settings.webhook_max_connections,
+        drop_pending_updates=False,
+    )
+
+
+async def _run_dispatcher_server(settings: Settings, host: str, port: int, *, register: bool) -> None:
+    from app.main import build_runtime, set_bot_commands
+
+    runtime = await build_runtime(settings)
+    runtime.start_background()
+    try:
+        if register:
+            await set_bot_commands(runtime.bot)
+            await _register_webhook(runtime.bot, settings, runtime.dp.resolve_used_update_types())
+
+        app = web.Application()
+        SimpleRequestHandler(
+            dispatcher=runtime.dp,
+            bot=runtime.bot,
+            secret_token=settings.webhook_secret,
+        ).register(app, path=settings.webhook_path)
+        setup_application(app, runtime.dp, bot=runtime.bot)
+        await _serve(app, host, port)
+    finally:
+        await runtime.close()
+
+
+def _worker_entry(index: int) -> None:
+    settings = get_settings()
+    setup_logging(settings.log_level, settings.log_file_path)
+    asyncio.run(
+        _run_dispatcher_server(
+            settings,
+            "127.0.0.1",
+            settings.webhook_worker_base_port + index,
+            # Worker 0 owns a full dispatcher, so it registers the webhook with the
+            # update types the routers actually use.
+            register=index == 0,
+        )
+    )
+
+
+def _build_front_app(settings: Settings) -> web.Application:
+    workers = settings.webhook_workers
+    worker_urls = [
+        f"http://127.0.0.1:{settings.webhook_worker_base_port + index}{settings.webhook_path}" for index in range(workers)
+    ]
+    app = web.Application()
+
+    async def open_client(app: web.Application) -> None:
+        app["client"] = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=settings.webhook_forward_timeout_seconds))
+
+    async def close_client(app: web.Application) -> None:
+        await app["client"].close()
+
+    async def forward(request: web.Request) -> web.Response:
+        if request.headers.get(SECRET_HEADER) != settings.webhook_secret:
+            return web.Response(status=401)
+        body = await request.read()
+        try:
+            update = json.loads(body)
+        except ValueError:
+            return web.Response(status=400)
+
+        index = shard_for_update(update, workers)
+        try:
+            async with request.app["client"].post(
+                worker_urls[index],
+                data=body,
+                headers={SECRET_HEADER: settings.webhook_secret, "Content-Type": "application/json"},
+            ) as response:
+                return web.Response(status=response.status)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            logger.warning("Webhook worker unavailable", worker=index)
+            # Non-2xx makes Telegram redeliver the update later.
+            return web.Response(status=503)
+
+    app.on_startup.append(open_client)
+    app.on_cleanup.append(close_client)
+    app.router.add_post(settings.webhook_path, forward)
+    return app
+
+
+async def serve_webhook(settings: Settings) -> None:
+    """Run webhook mode in one process or as front proxy plus N workers."""
+
+    _validate(settings)
+    if settings.webhook_workers <= 1:
+        await _run_dispatcher_server(
+            settings,
+            settings.webhook_listen_host,
+            settings.webhook_listen_port,
+            register=True,
+        )
+        return
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_worker_entry, args=(index,), name=f"wg-bot-worker-{index}")
+        for index in range(settings.webhook_workers)
+    ]
+    for process in processes:
+        process.start()
+    logger.info("Started webhook workers", workers=len(processes))
+
+    watcher = asyncio.ensure_future(_watch_workers(processes))
+    try:
+        await _serve(
+            _build_front_app(settings),
+            settings.webhook_listen_host,
+            settings.webhook_listen_port,
+            until=watcher,
+        )
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=30)
+    if watcher.done() and not watcher.cancelled():
+        # Workers are not restarted in place: exit non-zero and let the supervisor restart everything.
+        raise SystemExit(1)
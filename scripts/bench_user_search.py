@@ -0,0 +1,139 @@
+"""Benchmark admin user search on a synthetic users table.
+
+Usage:
+    python -m scripts.bench_user_search [--rows 1000000] [--keep]
+
+Uses DATABASE_DSN from environment/.env. Data is loaded into a separate
+``users_search_bench`` table, so the real ``users`` table is never touched.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import asyncpg
+
+from app.config import get_settings
+
+BENCH_TABLE = "users_search_bench"
+
+LEGACY_QUERY = f"""
+SELECT telegram_id, username, full_name, role, access_status, last_seen
+FROM {BENCH_TABLE}
+WHERE CAST(telegram_id AS TEXT) ILIKE $1
+   OR COALESCE(username, '') ILIKE $1
+   OR COALESCE(full_name, '') ILIKE $1
+ORDER BY updated_at DESC
+LIMIT 20
+"""
+
+TRGM_QUERY = f"""
+SELECT telegram_id, username, full_name, role, access_status, last_seen
+FROM {BENCH_TABLE}
+WHERE username ILIKE $2
+   OR full_name ILIKE $2
+   OR username % $1
+   OR full_name % $1
+ORDER BY GREATEST(
+             similarity(COALESCE(username, ''), $1),
+             similarity(COALESCE(full_name, ''), $1)
+         ) DESC,
+         updated_at DESC
+LIMIT 20
+"""
+
+EXACT_QUERY = f"""
+SELECT telegram_id, username, full_name, role, access_status, last_seen
+FROM {BENCH_TABLE}
+WHERE telegram_id = $1
+"""
+
+TEXT_NEEDLES = ["ivan", "petrov_77", "alex", "user_4242", "smirn"]
+NUMERIC_NEEDLES = [100000042, 100500000, 100999999]
+
+
+async def _prepare(conn: asyncpg.Connection, rows: int) -> None:
+    await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    await conn.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+    await conn.execute(
+        f"""
+        CREATE TABLE {BENCH_TABLE} (
+            id BIGSERIAL PRIMARY KEY,
+            telegram_id BIGINT UNIQUE NOT NULL,
+            username TEXT,
+            full_name TEXT,
+            role TEXT NOT NULL DEFAULT 'user',
+            access_status TEXT NOT NULL DEFAULT 'pending',
+            last_seen TIMESTAMPTZ,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """
+    )
+    started = time.perf_counter()
+    await conn.execute(
+        f"""
+        INSERT INTO {BENCH_TABLE} (telegram_id, username, full_name, access_status, last_seen, updated_at)
+        SELECT 100000000 + g,
+               CASE WHEN g % 7 = 0 THEN NULL
+                    ELSE (ARRAY['ivan', 'petrov', 'alex', 'user', 'smirnov', 'kate', 'olga'])[1 + g % 7]
+                         || '_' || (g % 10000)::text
+               END,
+               (ARRAY['Иван', 'Алексей', 'Ольга', 'Екатерина', 'Дмитрий'])[1 + g % 5]
+                   || ' ' || (ARRAY['Петров', 'Смирнов', 'Иванова', 'Кузнецов'])[1 + g % 4],
+               (ARRAY['pending', 'approved', 'blocked'])[1 + g % 3],
+               NOW() - (g % 86400) * INTERVAL '1 second',
+               NOW() - (g % 86400) * INTERVAL '1 second'
+        FROM generate_series(1, $1) AS g
+        """,
+        rows,
+    )
+    print(f"loaded {rows} rows in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    await conn.execute(f"CREATE INDEX ON {BENCH_TABLE} USING GIN (username gin_trgm_ops)")
+    await conn.execute(f"CREATE INDEX ON {BENCH_TABLE} USING GIN (full_name gin_trgm_ops)")
+    await conn.execute(f"ANALYZE {BENCH_TABLE}")
+    print(f"built trigram indexes in {time.perf_counter() - started:.1f}s")
+
+
+async def _measure(conn: asyncpg.Connection, label: str, query: str, args_list: list[tuple], repeats: int) -> None:
+    timings: list[float] = []
+    for args in args_list:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            await conn.fetch(query, *args)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+    print(f"{label:<24} median={statistics.median(timings):8.2f}ms  p95={p95:8.2f}ms  n={len(timings)}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep benchmark table after run")
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(get_settings().database_dsn)
+    try:
+        await _prepare(conn, args.rows)
+
+        await _measure(conn, "legacy ILIKE (text)", LEGACY_QUERY, [(f"%{n}%",) for n in TEXT_NEEDLES], args.repeats)
+        await _measure(conn, "trigram (text)", TRGM_QUERY, [(n, f"%{n}%") for n in TEXT_NEEDLES], args.repeats)
+        await _measure(conn, "legacy ILIKE (numeric)", LEGACY_QUERY, [(f"%{n}%",) for n in NUMERIC_NEEDLES], args.repeats)
+        await _measure(conn, "exact telegram_id", EXACT_QUERY, [(n,) for n in NUMERIC_NEEDLES], args.repeats)
+
+        plan = await conn.fetch("EXPLAIN (ANALYZE, BUFFERS) " + TRGM_QUERY, TEXT_NEEDLES[0], f"%{TEXT_NEEDLES[0]}%")
+        print("\n".join(row[0] for row in plan))
+    finally:
+        if not args.keep:
+            await conn.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
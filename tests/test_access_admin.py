@@ -0,0 +1,138 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.handlers.auth import _parse_targets
+from app.services.access_admin import AccessAdminService, format_bulk_result
+from app.services.mikrotik_service import MikroTikClientError
+
+
+class FakeUsersRepository:
+    def __init__(self, statuses: dict[int, str]) -> None:
+        self.statuses = statuses
+        self.calls: list[list[int]] = []
+
+    async def set_access_status_many(self, telegram_ids: list[int], access_status: str):
+        self.calls.append(telegram_ids)
+        known = [telegram_id for telegram_id in telegram_ids if telegram_id in self.statuses]
+        changed = [telegram_id for telegram_id in known if self.statuses[telegram_id] != access_status]
+        for telegram_id in known:
+            self.statuses[telegram_id] = access_status
+        return changed, [telegram_id for telegram_id in known if telegram_id not in changed]
+
+
+class FakeConfigsRepository:
+    def __init__(self) -> None:
+        self.calls: list[list[int]] = []
+        self.active = {10: "*10", 11: "*11", 12: "*12"}
+
+    async def revoke_for_telegram_ids(self, telegram_ids: list[int], remove_peers):
+        self.calls.append(telegram_ids)
+        held = {telegram_id: self.active[telegram_id] for telegram_id in telegram_ids if telegram_id in self.active}
+        if not await remove_peers(list(held.values())):
+            return [], len(held)
+        for telegram_id in held:
+            del self.active[telegram_id]
+        return list(held.items()), 0
+
+    async def list_pending_revocation(self, limit: int) -> list[int]:
+        return sorted(self.active)[:limit]
+
+
+class FakeLogsRepository:
+    def __init__(self) -> None:
+        self.events: list[str] = []
+
+    async def add(self, event_type: str, details: dict, user_id: int | None = None) -> None:
+        self.events.append(event_type)
+
+
+class FakeSessions:
+    def __init__(self) -> None:
+        self.destroyed: list[list[int]] = []
+        self.updated: list[list[int]] = []
+
+    async def destroy_sessions(self, telegram_ids: list[int]) -> None:
+        self.destroyed.append(telegram_ids)
+
+    async def update_access_status_many(self, telegram_ids: list[int], access_status: str) -> None:
+        self.updated.append(telegram_ids)
+
+
+class FakeMikroTikService:
+    settings = SimpleNamespace(mikrotik_enabled=True)
+
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+        self.down = False
+
+    async def remove_wireguard_peers(self, peer_ids: list[str]) -> list[str]:
+        self.calls.append(peer_ids)
+        if self.down:
+            raise MikroTikClientError("router unreachable")
+        return peer_ids
+
+
+def _service(statuses: dict[int, str]):
+    fakes = SimpleNamespace(
+        users=FakeUsersRepository(statuses),
+        configs=FakeConfigsRepository(),
+        logs=FakeLogsRepository(),
+        sessions=FakeSessions(),
+        mikrotik=FakeMikroTikService(),
+    )
+    service = AccessAdminService(
+        users_repo=fakes.users,  # type: ignore[arg-type]
+        wg_repo=fakes.configs,  # type: ignore[arg-type]
+        logs_repo=fakes.logs,  # type: ignore[arg-type]
+        sessions=fakes.sessions,  # type: ignore[arg-type]
+        mikrotik_service=fakes.mikrotik,  # type: ignore[arg-type]
+        protected_ids=frozenset({1}),
+    )
+    return service, fakes
+
+
+def test_bulk_block_uses_one_call_per_layer_and_skips_admins() -> None:
+    service, fakes = _service({1: "approved", 10: "approved", 11: "blocked", 12: "pending"})
+
+    result = asyncio.run(service.apply(1, [10, 11, 12, 12, 13, 1], "blocked"))
+
+    assert fakes.users.calls == [[10, 11, 12, 13]]
+    assert (result.changed, result.unchanged, result.unknown, result.protected) == ([10, 12], [11], [13], [1])
+    assert fakes.sessions.destroyed == [[10, 11, 12]]
+    assert fakes.configs.calls == [[10, 11, 12]]
+    assert fakes.mikrotik.calls == [["*10", "*11", "*12"]]
+    assert result.peers_removed == 3
+    assert fakes.logs.events == ["access_bulk_blocked"]
+    assert "Отключено конфигов: 3, удалено пиров: 3" in format_bulk_result(result)
+
+
+def test_bulk_approve_updates_sessions_of_changed_users_only() -> None:
+    service, fakes = _service({10: "pending", 11: "approved"})
+
+    result = asyncio.run(service.apply(1, [10, 11], "approved"))
+
+    assert result.changed == [10]
+    assert fakes.sessions.updated == [[10]]
+    assert fakes.configs.calls == [] and fakes.mikrotik.calls == []
+
+
+def test_block_keeps_configs_active_until_their_peers_are_removed() -> None:
+    service, fakes = _service({10: "approved", 11: "approved"})
+    fakes.mikrotik.down = True
+
+    result = asyncio.run(service.apply(1, [10, 11], "blocked"))
+
+    assert (result.configs_deactivated, result.peers_removed, result.peers_failed) == (0, 0, 2)
+    assert fakes.configs.active == {10: "*10", 11: "*11", 12: "*12"}
+    assert fakes.logs.events == ["mikrotik_peer_remove_failed", "access_bulk_blocked"]
+
+    fakes.mikrotik.down = False
+    assert asyncio.run(service.retry_revocations()) == 3
+    assert fakes.configs.active == {}
+
+
+def test_parse_targets_rejects_non_ascii_and_out_of_range_ids() -> None:
+    assert _parse_targets("10, 11 12") == [10, 11, 12]
+    assert _parse_targets("10 ²") is None
+    assert _parse_targets(f"10 {2**63}") is None
+    assert _parse_targets("") is None
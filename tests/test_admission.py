@@ -0,0 +1,116 @@
+import asyncio
+
+from app.utils.admission import AdmissionController, AdmissionRejected
+from app.utils.metrics import metrics
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_queued_jobs_get_position_and_eta_and_overflow_is_shed() -> None:
+    metrics.reset()
+    controller = AdmissionController("provisioning", concurrency=1, max_queue=2, initial_service_seconds=4.0)
+    notices: list[tuple[int, int]] = []
+    order: list[str] = []
+    release = asyncio.Event()
+
+    async def job(name: str) -> None:
+        async def on_queued(position: int, eta: int) -> None:
+            notices.append((position, eta))
+
+        async with controller.slot(on_queued=on_queued):
+            order.append(name)
+            if name == "first":
+                await release.wait()
+
+    async def scenario() -> None:
+        tasks = [asyncio.create_task(job(name)) for name in ("first", "second", "third")]
+        await asyncio.sleep(0)
+        assert (controller.active, controller.queued) == (1, 2)
+        try:
+            async with controller.slot():
+                raise AssertionError("queue is full, job must be shed")
+        except AdmissionRejected as exc:
+            assert exc.retry_after_seconds == 12
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+    assert order == ["first", "second", "third"]
+    assert notices == [(1, 4), (2, 8)]
+    assert metrics.counter("admission_rejected_total", queue="provisioning") == 1
+    assert metrics.gauge("admission_queue_length", queue="provisioning") == 0
+    assert controller.active == 0
+
+
+def test_eta_follows_observed_service_time() -> None:
+    clock = FakeClock()
+    controller = AdmissionController(
+        "provisioning", concurrency=2, max_queue=10, initial_service_seconds=2.0, smoothing=0.5, clock=clock
+    )
+
+    async def slow_job() -> None:
+        async with controller.slot():
+            clock.now += 10.0
+
+    asyncio.run(slow_job())
+
+    assert controller.estimate_wait(1) == 6
+    assert controller.estimate_wait(3) == 12
+
+
+def test_cancelled_waiter_leaves_the_queue() -> None:
+    controller = AdmissionController("provisioning", concurrency=1, max_queue=5)
+
+    async def scenario() -> None:
+        hold = asyncio.Event()
+
+        async def holder() -> None:
+            async with controller.slot():
+                await hold.wait()
+
+        async def waiter() -> None:
+            async with controller.slot():
+                pass
+
+        first = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        second = asyncio.create_task(waiter())
+        await asyncio.sleep(0)
+        assert controller.queued == 1
+        second.cancel()
+        await asyncio.gather(second, return_exceptions=True)
+        assert controller.queued == 0
+        hold.set()
+        await first
+
+    asyncio.run(scenario())
+
+    assert controller.active == 0
+
+
+def test_waiter_cancelled_as_the_slot_is_released_stays_cancelled() -> None:
+    controller = AdmissionController("provisioning", concurrency=1, max_queue=5)
+
+    async def scenario() -> BaseException | None:
+        async def waiter() -> None:
+            async with controller.slot():
+                pass
+
+        async with controller.slot():
+            task = asyncio.create_task(waiter())
+            await asyncio.sleep(0)
+            assert controller.queued == 1
+            # The release below pops the already cancelled future before the waiter runs.
+            task.cancel()
+        (outcome,) = await asyncio.gather(task, return_exceptions=True)
+        return outcome
+
+    assert isinstance(asyncio.run(scenario()), asyncio.CancelledError)
+    assert (controller.active, controller.queued) == (0, 0)
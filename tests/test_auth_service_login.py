@@ -2,6 +2,10 @@ import asyncio
 from dataclasses import dataclass
 
 from app.services.auth_service import AuthService
+from app.utils.cpu_pool import CpuPool
+from app.utils.security import PinHasher
+
+CPU_POOL = CpuPool("test-pin", workers=1)
 
 
 @dataclass
@@ -57,9 +61,11 @@ class FakeLogsRepo:
 class FakeSessionManager:
     def __init__(self) -> None:
         self.created: list[tuple[int, str]] = []
+        self.snapshots: list[dict] = []
 
-    async def create_session(self, telegram_id: int, role: str) -> None:
+    async def create_session(self, telegram_id: int, role: str, **snapshot) -> None:
         self.created.append((telegram_id, role))
+        self.snapshots.append(snapshot)
 
 
 def test_pin_and_login_success() -> None:
@@ -71,7 +77,7 @@ def test_pin_and_login_success() -> None:
         users_repo=users,  # type: ignore[arg-type]
         logs_repo=logs,  # type: ignore[arg-type]
         sessions=sessions,  # type: ignore[arg-type]
-        pin_bcrypt_rounds=12,
+        pin_hasher=PinHasher(CPU_POOL, rounds=4),
         admin_ids={55},
         superadmin_ids={77},
         global_pin="1234",
@@ -83,8 +89,9 @@ def test_pin_and_login_success() -> None:
 
     asyncio.run(service.login_approved(user))
     assert sessions.created == [(123, "user")]
+    assert sessions.snapshots == [{"user_id": 10, "access_status": "approved", "pin_verified": True}]
     assert users.verified_calls == [(123, True)]
-    assert users.touch_calls == [123]
+    assert users.touch_calls == []
     assert any(event[0] == "login_success" for event in logs.events)
 
 
@@ -93,7 +100,7 @@ def test_resolve_role_superadmin_priority() -> None:
         users_repo=FakeUsersRepo(),  # type: ignore[arg-type]
         logs_repo=FakeLogsRepo(),  # type: ignore[arg-type]
         sessions=FakeSessionManager(),  # type: ignore[arg-type]
-        pin_bcrypt_rounds=12,
+        pin_hasher=PinHasher(CPU_POOL, rounds=4),
         admin_ids={1, 2},
         superadmin_ids={2, 3},
         global_pin="1234",
@@ -102,3 +109,41 @@ def test_resolve_role_superadmin_priority() -> None:
     assert service.resolve_role(2) == "superadmin"
     assert service.resolve_role(1) == "admin"
     assert service.resolve_role(100) == "user"
+
+
+class FakeUpsertUsersRepo(FakeUsersRepo):
+    def __init__(self, created: bool, previous_role: str | None) -> None:
+        super().__init__()
+        self.created = created
+        self.previous_role = previous_role
+        self.upsert_calls: list[dict] = []
+
+    async def upsert_seen(self, **kwargs):
+        from app.database.repositories.users import UserUpsertResult
+
+        self.upsert_calls.append(kwargs)
+        self.user.role = kwargs["role"]
+        return UserUpsertResult(user=self.user, created=self.created, previous_role=self.previous_role)
+
+
+def test_register_or_refresh_logs_role_sync_and_reuses_pin_hash() -> None:
+    users = FakeUpsertUsersRepo(created=False, previous_role="user")
+    logs = FakeLogsRepo()
+    service = AuthService(
+        users_repo=users,  # type: ignore[arg-type]
+        logs_repo=logs,  # type: ignore[arg-type]
+        sessions=FakeSessionManager(),  # type: ignore[arg-type]
+        pin_hasher=PinHasher(CPU_POOL, rounds=4),
+        admin_ids={123},
+        superadmin_ids=set(),
+        global_pin="1234",
+    )
+
+    user = asyncio.run(service.register_or_refresh(123, "u", "User"))
+    asyncio.run(service.register_or_refresh(123, "u", "User"))
+    CPU_POOL.shutdown()
+
+    assert user.role == "admin"
+    assert users.upsert_calls[0]["access_status"] == "approved"
+    assert users.upsert_calls[0]["pin_hash"] == users.upsert_calls[1]["pin_hash"]
+    assert [event[0] for event in logs.events] == ["role_synced", "role_synced"]
@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime, timezone
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.methods import SendMessage
+
+from app.database.repositories import BroadcastJob
+from app.services.broadcast import BroadcastService, classify_failure
+
+_METHOD = SendMessage(chat_id=1, text="x")
+
+
+class FakeBroadcastsRepository:
+    def __init__(self, recipients: list[int], cursor: int = 0, cancel_after_batches: int | None = None) -> None:
+        self.recipients = recipients
+        self.job = BroadcastJob(
+            id=1,
+            created_by=99,
+            audience="all",
+            message_text="Новый адрес сервера",
+            status="pending",
+            cursor_telegram_id=cursor,
+            sent_count=0,
+            failed_count=0,
+            created_at=datetime.now(timezone.utc),
+            started_at=None,
+            finished_at=None,
+        )
+        self.failures: list[tuple[int, str, str]] = []
+        self.checkpoints: list[int] = []
+        self.cancel_after_batches = cancel_after_batches
+
+    async def claim(self, job_id: int, owner: str, lease_seconds: int) -> BroadcastJob | None:
+        self.job.status = "running"
+        return self.job
+
+    async def next_recipients(self, audience: str, after_telegram_id: int, limit: int) -> list[int]:
+        return [telegram_id for telegram_id in self.recipients if telegram_id > after_telegram_id][:limit]
+
+    async def save_progress(self, job_id, owner, lease_seconds, cursor_telegram_id, sent, failures) -> str:
+        self.job.cursor_telegram_id = cursor_telegram_id
+        self.job.sent_count += sent
+        self.job.failed_count += len(failures)
+        self.failures.extend(failures)
+        self.checkpoints.append(cursor_telegram_id)
+        if self.cancel_after_batches is not None and len(self.checkpoints) >= self.cancel_after_batches:
+            self.job.status = "cancelled"
+        return self.job.status
+
+    async def finish(self, job_id: int, owner: str) -> BroadcastJob:
+        if self.job.status != "cancelled":
+            self.job.status = "done"
+        return self.job
+
+    async def failure_summary(self, job_id: int) -> dict[str, int]:
+        summary: dict[str, int] = {}
+        for _, reason, _ in self.failures:
+            summary[reason] = summary.get(reason, 0) + 1
+        return summary
+
+
+class FakeBot:
+    def __init__(self, errors: dict[int, Exception] | None = None) -> None:
+        self.errors = errors or {}
+        self.sent: list[int] = []
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        if chat_id in self.errors:
+            raise self.errors[chat_id]
+        self.sent.append(chat_id)
+
+
+def test_failures_are_classified() -> None:
+    assert classify_failure(TelegramForbiddenError(_METHOD, "Forbidden: bot was blocked by the user")) == "blocked"
+    assert classify_failure(TelegramForbiddenError(_METHOD, "Forbidden: user is deactivated")) == "deactivated"
+    assert classify_failure(TelegramBadRequest(_METHOD, "Bad Request: chat not found")) == "not_found"
+    assert classify_failure(TelegramBadRequest(_METHOD, "Bad Request: message is too long")) == "error"
+
+
+def test_job_resumes_from_cursor_records_failures_and_reports() -> None:
+    repo = FakeBroadcastsRepository(recipients=[10, 20, 30, 40, 50], cursor=20)
+    bot = FakeBot({40: TelegramForbiddenError(_METHOD, "Forbidden: bot was blocked by the user")})
+    service = BroadcastService(repo=repo, bot=bot, batch_size=2)  # type: ignore[arg-type]
+
+    job = asyncio.run(service.run(1))
+
+    assert job is not None and job.status == "done"
+    assert repo.checkpoints == [40, 50]
+    assert (job.sent_count, job.failed_count) == (2, 1)
+    assert [(telegram_id, reason) for telegram_id, reason, _ in repo.failures] == [(40, "blocked")]
+    # Recipients 30 and 50 plus the summary for the admin who started the job.
+    assert bot.sent == [30, 50, 99]
+
+
+def test_cancelled_job_stops_at_next_checkpoint() -> None:
+    repo = FakeBroadcastsRepository(recipients=list(range(1, 11)), cancel_after_batches=1)
+    bot = FakeBot()
+    service = BroadcastService(repo=repo, bot=bot, batch_size=3)  # type: ignore[arg-type]
+
+    job = asyncio.run(service.run(1))
+
+    assert job is not None and job.status == "cancelled"
+    assert repo.checkpoints == [3]
+    assert bot.sent == [1, 2, 3, 99]
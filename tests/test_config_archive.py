@@ -0,0 +1,39 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.services.config_archive import ConfigArchiver
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeWireGuardConfigsRepository:
+    def __init__(self, due: int) -> None:
+        self.due = due
+        self.calls: list[tuple[datetime, int]] = []
+
+    async def archive_inactive(self, deactivated_before: datetime, limit: int) -> int:
+        self.calls.append((deactivated_before, limit))
+        moved = min(self.due, limit)
+        self.due -= moved
+        return moved
+
+
+def test_archiver_moves_due_rows_in_batches_until_a_short_batch() -> None:
+    repo = FakeWireGuardConfigsRepository(due=5)
+    archiver = ConfigArchiver(
+        wg_repo=repo,  # type: ignore[arg-type]
+        archive_after_seconds=30 * 86400,
+        batch_size=2,
+        clock=lambda: NOW,
+    )
+
+    assert asyncio.run(archiver.run_once()) == 5
+    assert repo.calls == [(NOW - timedelta(days=30), 2)] * 3
+
+
+def test_archiver_stops_after_one_query_when_nothing_is_due() -> None:
+    repo = FakeWireGuardConfigsRepository(due=0)
+    archiver = ConfigArchiver(wg_repo=repo, archive_after_seconds=86400, batch_size=2)  # type: ignore[arg-type]
+
+    assert asyncio.run(archiver.run_once()) == 0
+    assert len(repo.calls) == 1
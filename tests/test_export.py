@@ -0,0 +1,59 @@
+import asyncio
+import gzip
+import json
+import zipfile
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.export import ExportError, ExportService
+
+
+class FakeExportsRepository:
+    def __init__(self, rows: int) -> None:
+        self.rows = rows
+
+    async def copy_csv(self, dataset: str, sink) -> int:
+        await sink(b"id,telegram_id\n")
+        for index in range(self.rows):
+            await sink(f"{index},{1000 + index}\n".encode())
+        return self.rows
+
+    async def stream(self, dataset: str):
+        for index in range(self.rows):
+            yield {"id": index, "details": '{"ip": "10.0.0.2"}', "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc)}
+
+    async def stream_config_files(self):
+        for index in range(self.rows):
+            yield {"id": index, "telegram_id": 1000 + index, "config_text": f"[Interface]\n# {index}\n"}
+
+
+def _export(tmp_path, dataset: str, fmt: str, rows: int = 3):
+    service = ExportService(FakeExportsRepository(rows), tmp_dir=str(tmp_path))  # type: ignore[arg-type]
+    return asyncio.run(service.export(dataset, fmt))
+
+
+def test_csv_and_jsonl_exports_are_gzipped_streams(tmp_path) -> None:
+    csv_result = _export(tmp_path, "users", "csv")
+    assert csv_result.filename.startswith("users_") and csv_result.filename.endswith(".csv.gz")
+    assert csv_result.rows == 3
+    assert gzip.decompress(csv_result.path.read_bytes()).decode().splitlines()[1] == "0,1000"
+
+    jsonl_result = _export(tmp_path, "audit", "jsonl")
+    lines = gzip.decompress(jsonl_result.path.read_bytes()).decode().splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[0]) == {"id": 0, "details": {"ip": "10.0.0.2"}, "created_at": "2024-01-01T00:00:00+00:00"}
+
+
+def test_config_zip_contains_one_conf_per_row(tmp_path) -> None:
+    result = _export(tmp_path, "configs", "zip")
+
+    with zipfile.ZipFile(result.path) as archive:
+        assert archive.namelist() == ["wg_1000_0.conf", "wg_1001_1.conf", "wg_1002_2.conf"]
+        assert archive.read("wg_1001_1.conf") == b"[Interface]\n# 1\n"
+
+
+def test_unsupported_combination_leaves_no_file(tmp_path) -> None:
+    with pytest.raises(ExportError):
+        _export(tmp_path, "users", "zip")
+    assert list(tmp_path.iterdir()) == []
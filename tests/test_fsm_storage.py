@@ -0,0 +1,53 @@
+import asyncio
+
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import DisabledEventIsolation
+from aiogram.fsm.storage.redis import RedisEventIsolation
+
+from app.config import Settings
+from app.utils.fsm_storage import build_fsm_storage
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, str] = {}
+        self.expiry: dict[str, int | None] = {}
+        self.closed = False
+
+    async def set(self, key: str, value: str, ex: int | None = None) -> None:
+        self.values[key] = value
+        self.expiry[key] = ex
+
+    async def get(self, key: str) -> str | None:
+        return self.values.get(key)
+
+    async def aclose(self, **kwargs) -> None:
+        self.closed = True
+
+
+def _settings(**overrides) -> Settings:
+    return Settings(_env_file=None, bot_token="1" * 30, **overrides)
+
+
+def test_state_is_stored_with_ttl_and_shared_client_stays_open() -> None:
+    redis = FakeRedis()
+    storage, isolation = build_fsm_storage(redis, _settings(fsm_state_ttl_seconds=600))
+    key = StorageKey(bot_id=1, chat_id=10, user_id=10)
+
+    async def scenario() -> str | None:
+        await storage.set_state(key, "AuthStates:waiting_for_pin")
+        await storage.close()
+        return await storage.get_state(key)
+
+    assert asyncio.run(scenario()) == "AuthStates:waiting_for_pin"
+    assert list(redis.expiry.values()) == [600]
+    assert next(iter(redis.values)).startswith("fsm:")
+    assert redis.closed is False
+    assert isinstance(isolation, DisabledEventIsolation)
+
+
+def test_horizontal_scaling_uses_redis_lock_isolation() -> None:
+    _, isolation = build_fsm_storage(FakeRedis(), _settings(horizontal_scaling=True, fsm_lock_timeout_seconds=30))
+
+    assert isinstance(isolation, RedisEventIsolation)
+    assert isolation.lock_kwargs == {"timeout": 30}
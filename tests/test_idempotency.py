@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiogram.types import Update
+
+from app.handlers.middlewares.dedup import UpdateDedupMiddleware
+from app.utils.idempotency import SingleFlight, SingleFlightBusy
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, bytes] = {}
+
+    async def set(self, key: str, value: bytes, nx: bool = False, ex: int | None = None) -> bool | None:
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def get(self, key: str) -> bytes | None:
+        return self.values.get(key)
+
+    def register_script(self, script: str):
+        async def release(keys: list[str], args: list) -> int:
+            if self.values.get(keys[0]) == args[0]:
+                del self.values[keys[0]]
+                return 1
+            return 0
+
+        return release
+
+
+def test_concurrent_duplicates_share_one_execution() -> None:
+    flight = SingleFlight(FakeRedis())  # type: ignore[arg-type]
+    calls = 0
+
+    async def action() -> dict:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"config_text": "cfg"}
+
+    async def scenario() -> list[tuple[dict, bool]]:
+        return await asyncio.gather(*(flight.run("reissue:1", action) for _ in range(3)))
+
+    results = asyncio.run(scenario())
+
+    assert calls == 1
+    assert [shared for _, shared in results] == [False, True, True]
+    assert all(result == {"config_text": "cfg"} for result, _ in results)
+
+
+def test_other_instance_sees_completion_marker_only_and_busy_times_out() -> None:
+    redis = FakeRedis()
+    first = SingleFlight(redis)  # type: ignore[arg-type]
+    second = SingleFlight(redis, wait_seconds=0, poll_interval_seconds=0)  # type: ignore[arg-type]
+
+    async def action() -> dict:
+        return {"config_text": "[Interface]\nPrivateKey = secret"}
+
+    async def never_called() -> dict:
+        raise AssertionError("duplicate must not run")
+
+    asyncio.run(first.run("reissue:1", action))
+    assert redis.values["sf:reissue:1"] == b"d:"
+    assert asyncio.run(second.run("reissue:1", never_called)) == ({}, True)
+
+    redis.values["sf:reissue:2"] = b"p:someone-else"
+    with pytest.raises(SingleFlightBusy):
+        asyncio.run(second.run("reissue:2", never_called))
+
+
+def test_failed_action_releases_claim() -> None:
+    redis = FakeRedis()
+    flight = SingleFlight(redis)  # type: ignore[arg-type]
+
+    async def failing() -> dict:
+        raise RuntimeError("router down")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(flight.run("new_connection:1", failing))
+    assert redis.values == {}
+
+
+def test_repeated_update_id_is_dropped() -> None:
+    middleware = UpdateDedupMiddleware(FakeRedis())  # type: ignore[arg-type]
+    handled: list[int] = []
+
+    async def handler(event: Update, data: dict) -> None:
+        handled.append(event.update_id)
+
+    async def scenario() -> None:
+        data = {"bot": SimpleNamespace(id=7)}
+        for update_id in (1, 1, 2):
+            await middleware(handler, Update(update_id=update_id), data)
+
+    asyncio.run(scenario())
+
+    assert handled == [1, 2]
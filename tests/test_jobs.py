@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime, timezone
+
+from app.utils.jobs import CronSchedule, Job, JobScheduler, LeaderLease
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, str] = {}
+
+    async def set(self, key: str, value: str, nx: bool = False, px: int | None = None) -> bool | None:
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def register_script(self, script: str):
+        async def run(keys: list[str], args: list) -> int:
+            key, owner = keys[0], args[0]
+            if self.values.get(key) != owner:
+                return 0
+            if "DEL" in script:
+                del self.values[key]
+            return 1
+
+        return run
+
+
+def test_cron_next_after_handles_steps_ranges_and_rollover() -> None:
+    every_quarter = CronSchedule("*/15 * * * *")
+    assert every_quarter.next_after(datetime(2026, 1, 1, 10, 7, 30, tzinfo=timezone.utc)) == datetime(
+        2026, 1, 1, 10, 15, tzinfo=timezone.utc
+    )
+
+    nightly = CronSchedule("30 3 * * 1-5")
+    # Friday evening -> Monday 03:30.
+    assert nightly.next_after(datetime(2026, 1, 2, 22, 0, tzinfo=timezone.utc)) == datetime(
+        2026, 1, 5, 3, 30, tzinfo=timezone.utc
+    )
+
+    yearly = CronSchedule("0 0 1 1 *")
+    assert yearly.next_after(datetime(2026, 6, 1, tzinfo=timezone.utc)) == datetime(2027, 1, 1, tzinfo=timezone.utc)
+
+
+def test_lease_is_exclusive_and_released_on_stop() -> None:
+    redis = FakeRedis()
+    first = LeaderLease(redis, "leader", owner="a")  # type: ignore[arg-type]
+    second = LeaderLease(redis, "leader", owner="b")  # type: ignore[arg-type]
+
+    async def scenario() -> None:
+        assert await first.refresh() is True
+        assert await second.refresh() is False
+        assert await first.refresh() is True
+        await first.release()
+        assert await second.refresh() is True
+
+    asyncio.run(scenario())
+
+    assert redis.values == {"leader": "b"}
+
+
+def test_singleton_job_skipped_without_leadership_and_overlap_skipped() -> None:
+    redis = FakeRedis()
+    lease = LeaderLease(redis, "leader", owner="a")  # type: ignore[arg-type]
+    scheduler = JobScheduler(lease=lease)
+    release = asyncio.Event()
+    runs: list[int] = []
+
+    async def work() -> None:
+        runs.append(1)
+        await release.wait()
+
+    job = Job("sweep", work, interval_seconds=60, singleton=True)
+    scheduler.add(job)
+
+    async def scenario() -> list[str]:
+        statuses = [await scheduler.run_job(job)]
+        await lease.refresh()
+        running = asyncio.create_task(scheduler.run_job(job))
+        await asyncio.sleep(0)
+        statuses.append(await scheduler.run_job(job))
+        release.set()
+        statuses.append(await running)
+        await scheduler.stop()
+        return statuses
+
+    statuses = asyncio.run(scenario())
+
+    assert statuses == ["not_leader", "overlap", "ok"]
+    assert runs == [1]
+    assert redis.values == {}
+
+
+def test_failing_and_slow_jobs_report_status() -> None:
+    scheduler = JobScheduler()
+
+    async def broken() -> None:
+        raise RuntimeError("boom")
+
+    async def slow() -> None:
+        await asyncio.sleep(1)
+
+    async def scenario() -> list[str]:
+        return [
+            await scheduler.run_job(Job("broken", broken, interval_seconds=1)),
+            await scheduler.run_job(Job("slow", slow, interval_seconds=1, timeout_seconds=0.01)),
+        ]
+
+    assert asyncio.run(scenario()) == ["error", "timeout"]
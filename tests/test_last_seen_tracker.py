@@ -0,0 +1,45 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.last_seen import LastSeenTracker
+
+
+class FakeUsersRepo:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.batches: list[tuple[list[int], list[datetime]]] = []
+
+    async def touch_last_seen_many(self, telegram_ids: list[int], seen_at: list[datetime]) -> None:
+        if self.fail:
+            raise RuntimeError("db down")
+        self.batches.append((telegram_ids, seen_at))
+
+
+def test_touches_are_coalesced_into_single_batch() -> None:
+    repo = FakeUsersRepo()
+    tracker = LastSeenTracker(users_repo=repo)  # type: ignore[arg-type]
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    tracker.touch(1, base)
+    tracker.touch(2, base)
+    tracker.touch(1, base + timedelta(seconds=5))
+    tracker.touch(1, base + timedelta(seconds=2))
+
+    assert asyncio.run(tracker.flush()) == 2
+    assert len(repo.batches) == 1
+    ids, stamps = repo.batches[0]
+    assert dict(zip(ids, stamps)) == {1: base + timedelta(seconds=5), 2: base}
+    assert asyncio.run(tracker.flush()) == 0
+
+
+def test_failed_flush_keeps_pending_timestamps() -> None:
+    repo = FakeUsersRepo(fail=True)
+    tracker = LastSeenTracker(users_repo=repo)  # type: ignore[arg-type]
+    tracker.touch(7)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(tracker.flush())
+
+    assert tracker.pending_count == 1
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter, TelegramServerError
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+
+from app.utils.outbound import OutboundThrottle, drain_background, fire_and_forget
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _throttle(clock: FakeClock, **overrides) -> OutboundThrottle:
+    return OutboundThrottle(clock=clock, sleep=clock.sleep, **overrides)
+
+
+def test_per_chat_bucket_paces_sends_after_burst() -> None:
+    clock = FakeClock()
+    throttle = _throttle(clock, chat_rate=1.0, chat_burst=2)
+    sent: list[float] = []
+
+    async def make_request(bot, method):
+        sent.append(clock.now)
+        return True
+
+    async def scenario() -> None:
+        for _ in range(3):
+            await throttle(make_request, None, SendMessage(chat_id=1, text="hi"))
+        await throttle(make_request, None, SendMessage(chat_id=2, text="hi"))
+        await throttle(make_request, None, AnswerCallbackQuery(callback_query_id="x"))
+
+    asyncio.run(scenario())
+
+    assert sent == [0.0, 0.0, 1.0, 1.0, 1.0]
+
+
+def test_retry_after_pauses_chat_and_retries() -> None:
+    clock = FakeClock()
+    throttle = _throttle(clock)
+    method = SendMessage(chat_id=1, text="hi")
+    attempts: list[float] = []
+
+    async def make_request(bot, method):
+        attempts.append(clock.now)
+        if len(attempts) == 1:
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=5)
+        if len(attempts) == 2:
+            raise TelegramServerError(method=method, message="Bad Gateway")
+        return True
+
+    assert asyncio.run(throttle(make_request, None, method)) is True
+    assert attempts == [0.0, 5.0, 7.0]
+
+
+def test_non_transient_errors_are_not_retried() -> None:
+    clock = FakeClock()
+    throttle = _throttle(clock)
+    method = SendMessage(chat_id=1, text="hi")
+    calls = 0
+
+    async def make_request(bot, method):
+        nonlocal calls
+        calls += 1
+        raise TelegramForbiddenError(method=method, message="bot was blocked by the user")
+
+    with pytest.raises(TelegramForbiddenError):
+        asyncio.run(throttle(make_request, None, method))
+    assert calls == 1
+
+
+def test_fire_and_forget_swallows_failures() -> None:
+    done: list[str] = []
+
+    async def failing() -> None:
+        raise RuntimeError("network down")
+
+    async def ok() -> None:
+        done.append("ok")
+
+    async def scenario() -> None:
+        fire_and_forget(failing(), "fail")
+        fire_and_forget(ok(), "ok")
+        await drain_background()
+
+    asyncio.run(scenario())
+
+    assert done == ["ok"]
@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.database.repositories.pagination import Page, PageCursor, fetch_keyset_page
+from app.handlers.admin_menu import _render_requests_page
+
+
+class FakeConn:
+    def __init__(self, rows: list[dict]) -> None:
+        self.rows = rows
+        self.calls: list[tuple[str, tuple]] = []
+
+    async def fetch(self, query: str, *args):
+        self.calls.append((query, args))
+        return self.rows[: args[-1]]
+
+
+class FakeAcquire:
+    def __init__(self, conn: FakeConn) -> None:
+        self._conn = conn
+
+    async def __aenter__(self) -> FakeConn:
+        return self._conn
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+class FakePool:
+    def __init__(self, conn: FakeConn) -> None:
+        self._conn = conn
+
+    def acquire(self) -> FakeAcquire:
+        return FakeAcquire(self._conn)
+
+
+def _rows(count: int) -> list[dict]:
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [{"id": i, "_page_sort": base - timedelta(minutes=i), "_page_key": i} for i in range(count)]
+
+
+def test_cursor_roundtrip_keeps_microseconds() -> None:
+    cursor = PageCursor(sort_value=datetime(2026, 3, 4, 5, 6, 7, 891011, tzinfo=timezone.utc), key=42)
+
+    raw = cursor.encode()
+
+    assert PageCursor.decode(raw) == cursor
+    assert len(f"page:requests:prev:{raw}") < 64
+
+
+def test_first_page_detects_next_page() -> None:
+    conn = FakeConn(_rows(4))
+
+    page = asyncio.run(
+        fetch_keyset_page(
+            FakePool(conn),  # type: ignore[arg-type]
+            columns="id",
+            table="logs",
+            sort_column="created_at",
+            key_column="id",
+            cursor=None,
+            limit=3,
+        )
+    )
+
+    assert [row["id"] for row in page.rows] == [0, 1, 2]
+    assert page.has_next is True
+    assert page.has_prev is False
+    assert page.last == PageCursor(sort_value=_rows(3)[2]["_page_sort"], key=2)
+    query, args = conn.calls[0]
+    assert "ORDER BY created_at DESC, id DESC" in query
+    assert args == (4,)
+
+
+def test_backward_page_is_returned_in_display_order() -> None:
+    rows = list(reversed(_rows(2)))
+    conn = FakeConn(rows)
+    cursor = PageCursor(sort_value=datetime(2025, 1, 1, tzinfo=timezone.utc), key=10)
+
+    page = asyncio.run(
+        fetch_keyset_page(
+            FakePool(conn),  # type: ignore[arg-type]
+            columns="id",
+            table="logs",
+            sort_column="created_at",
+            key_column="id",
+            cursor=cursor,
+            backward=True,
+            limit=3,
+        )
+    )
+
+    assert [row["id"] for row in page.rows] == [0, 1]
+    assert page.has_prev is False
+    assert page.has_next is True
+    query, args = conn.calls[0]
+    assert "(created_at, id) > ($1, $2)" in query
+    assert args == (cursor.sort_value, 10, 4)
+
+
+def test_bulk_request_buttons_carry_the_page_start_cursor() -> None:
+    first = PageCursor(sort_value=datetime(2026, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc), key=9_876_543_210)
+    rows = [
+        {"telegram_id": 9_876_543_210, "username": "a", "full_name": "A"},
+        {"telegram_id": 5, "username": None, "full_name": None},
+    ]
+    page = Page(rows=rows, first=first)  # type: ignore[arg-type]
+
+    _, keyboard = _render_requests_page(page, total=2)
+
+    assert keyboard is not None
+    approve, reject = keyboard.inline_keyboard[-1]
+    assert approve.callback_data == f"admin:bulk:approve:{first.encode()}"
+    assert reject.callback_data == f"admin:bulk:reject:{first.encode()}"
+    assert len(approve.callback_data.encode()) < 64
+    assert PageCursor.decode(approve.callback_data.split(":")[3]) == first
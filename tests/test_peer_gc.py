@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.services.access_admin import PeerRemoval
+from app.services.peer_gc import IdlePeerCollector, idle_peer_ids, parse_routeros_duration
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+DAY = 86400
+
+ROUTER_PEERS = [
+    {".id": "*1", "last-handshake": "15w2d"},
+    {".id": "*2", "last-handshake": "1m4s"},
+    {".id": "*3"},
+    {".id": "*4", "last-handshake": "100d00:00:01"},
+    {".id": "*5", "last-handshake": "12w5d23h59m59s"},
+]
+
+
+def test_parse_routeros_duration() -> None:
+    assert parse_routeros_duration("1w2d3h4m5s") == 7 * DAY + 2 * DAY + 3 * 3600 + 4 * 60 + 5
+    assert parse_routeros_duration("45s300ms") == 45.3
+    assert parse_routeros_duration("1d02:03:04") == DAY + 2 * 3600 + 3 * 60 + 4
+    assert parse_routeros_duration("00:00:09") == 9
+    assert parse_routeros_duration("") is None
+    assert parse_routeros_duration(None) is None
+    assert parse_routeros_duration("never") is None
+
+
+def test_idle_peer_ids_includes_peers_that_never_connected() -> None:
+    assert idle_peer_ids(ROUTER_PEERS, 90 * DAY) == ["*1", "*3", "*4"]
+
+
+class FakeWireGuardConfigsRepository:
+    def __init__(self) -> None:
+        self.calls: list[tuple[list[str], datetime]] = []
+
+    async def revoke_idle_peers(self, peer_ids: list[str], created_before: datetime, remove_peers):
+        self.calls.append((peer_ids, created_before))
+        # "*3" belongs to a config reissued recently, the repository keeps it.
+        owners = {"*1": 101, "*4": 104}
+        held = [(owners[peer_id], peer_id) for peer_id in peer_ids if peer_id in owners]
+        if not await remove_peers([peer_id for _, peer_id in held]):
+            return [], len(held)
+        return held, 0
+
+
+class FakeAccessAdmin:
+    def __init__(self) -> None:
+        self.removed: list[list[str]] = []
+
+    async def remove_peers(self, peer_ids: list[str]) -> tuple[int, int]:
+        self.removed.append(peer_ids)
+        return len(peer_ids), 0
+
+    def peer_removal(self) -> PeerRemoval:
+        return PeerRemoval(self)  # type: ignore[arg-type]
+
+
+class FakeLogsRepository:
+    def __init__(self) -> None:
+        self.events: list[tuple[str, dict]] = []
+
+    async def add(self, event_type: str, details: dict) -> None:
+        self.events.append((event_type, details))
+
+
+class FakeMikroTikService:
+    settings = SimpleNamespace(mikrotik_enabled=True)
+
+    async def list_wireguard_peers(self) -> list[dict[str, str]]:
+        return ROUTER_PEERS
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        self.sent.append((chat_id, text))
+
+
+def test_collector_deactivates_in_batches_and_notifies_users() -> None:
+    wg_repo, access_admin, logs_repo, bot = (
+        FakeWireGuardConfigsRepository(),
+        FakeAccessAdmin(),
+        FakeLogsRepository(),
+        FakeBot(),
+    )
+    collector = IdlePeerCollector(
+        wg_repo=wg_repo,  # type: ignore[arg-type]
+        logs_repo=logs_repo,  # type: ignore[arg-type]
+        access_admin=access_admin,  # type: ignore[arg-type]
+        mikrotik_service=FakeMikroTikService(),  # type: ignore[arg-type]
+        bot=bot,  # type: ignore[arg-type]
+        idle_after_seconds=90 * DAY,
+        batch_size=2,
+        clock=lambda: NOW,
+    )
+
+    async def scenario() -> int:
+        total = await collector.run_once()
+        await asyncio.sleep(0)
+        return total
+
+    assert asyncio.run(scenario()) == 2
+    assert wg_repo.calls == [(["*1", "*3"], NOW - timedelta(days=90)), (["*4"], NOW - timedelta(days=90))]
+    assert access_admin.removed == [["*1"], ["*4"]]
+    assert sorted(chat_id for chat_id, _ in bot.sent) == [101, 104]
+    assert "90" in bot.sent[0][1]
+    assert logs_repo.events == [
+        ("idle_peers_collected", {"configs": 2, "peers_removed": 2, "peers_failed": 0, "idle_days": 90})
+    ]
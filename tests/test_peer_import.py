@@ -0,0 +1,103 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.database.repositories import ImportedPeer, PeerImportSummary
+from app.integrations.mikrotik import MikroTikClient
+from app.services.peer_import import PeerImportService, parse_router_peers
+
+ROUTER_PEERS = [
+    {".id": "*1", "public-key": "pk1", "allowed-address": "10.0.0.5/32", "comment": "tg:1001"},
+    {".id": "*2", "public-key": "pk2", "allowed-address": "10.0.0.6/32,fd00::6/128", "comment": "tg:1002:profile:9"},
+    {".id": "*3", "public-key": "pk3", "allowed-address": "10.0.0.7/32", "comment": "office printer"},
+    {".id": "*4", "public-key": "pk4", "allowed-address": "192.168.88.0/24", "comment": "site-to-site"},
+    {".id": "*5", "public-key": "pk5", "allowed-address": "10.0.0.5/32", "comment": "tg:1005"},
+]
+
+
+def test_parse_router_peers_matches_comments_and_skips_foreign_addresses() -> None:
+    records, skipped = parse_router_peers(ROUTER_PEERS, "10.0.0.0/24")
+
+    assert records == [
+        ImportedPeer("*1", "pk1", "10.0.0.5", 1001, "tg:1001"),
+        ImportedPeer("*2", "pk2", "10.0.0.6", 1002, "tg:1002:profile:9"),
+        ImportedPeer("*3", "pk3", "10.0.0.7", None, "office printer"),
+    ]
+    assert skipped == 2
+
+
+class FakePeerImportRepository:
+    def __init__(self) -> None:
+        self.calls: list[tuple[list[ImportedPeer], bool]] = []
+
+    async def import_peers(self, peers: list[ImportedPeer], *, apply: bool) -> PeerImportSummary:
+        self.calls.append((peers, apply))
+        return PeerImportSummary(peers=len(peers), adopted=2, reserved=1, released=0, applied=apply)
+
+
+class FakeMikroTikService:
+    settings = SimpleNamespace(wg_network_cidr="10.0.0.0/24")
+
+    def __init__(self) -> None:
+        self.list_calls = 0
+
+    async def list_wireguard_peers(self) -> list[dict[str, str]]:
+        self.list_calls += 1
+        return ROUTER_PEERS
+
+
+def test_import_reads_router_once_and_passes_all_records_in_one_batch() -> None:
+    repo, mikrotik = FakePeerImportRepository(), FakeMikroTikService()
+    service = PeerImportService(repo, mikrotik)  # type: ignore[arg-type]
+
+    summary = asyncio.run(service.run(apply=False))
+
+    assert mikrotik.list_calls == 1
+    assert len(repo.calls) == 1 and len(repo.calls[0][0]) == 3 and repo.calls[0][1] is False
+    assert (summary.adopted, summary.reserved, summary.skipped, summary.applied) == (2, 1, 2, False)
+
+
+class FakeRouterClient(MikroTikClient):
+    """MikroTikClient with the RouterOS API replaced by an in-memory peer table."""
+
+    def __init__(self, peers: list[dict[str, str]]) -> None:
+        super().__init__(host="127.0.0.1", port=8728, username="u", password="p", use_tls=False)
+        self.peers = [dict(peer, interface="wg0") for peer in peers]
+        self.operations: list[str] = []
+
+    async def _run_api(self, operation: str, **params: str):
+        self.operations.append(operation)
+        if operation == "list_peers":
+            return [dict(peer) for peer in self.peers if peer["interface"] == params["interface"]]
+        if operation == "set_peer":
+            peer = next(peer for peer in self.peers if peer[".id"] == params.pop("peer_id"))
+            peer.update(params)
+            return None
+        if operation == "add_peer":
+            self.peers.append({".id": f"*{len(self.peers) + 1}", **params})
+            return None
+        raise AssertionError(f"unexpected operation {operation}")
+
+
+def test_reissue_of_adopted_peer_updates_it_in_place() -> None:
+    records, _ = parse_router_peers(ROUTER_PEERS, "10.0.0.0/24")
+    adopted = records[0]
+    client = FakeRouterClient(ROUTER_PEERS)
+
+    # Reissue keeps the address and passes the adopted peer id along (see confirm_reissue).
+    action, peer_id = asyncio.run(
+        client.add_wireguard_peer(
+            interface="wg0",
+            name="peer-42",
+            public_key="new-pk",
+            allowed_address=f"{adopted.ip_address}/32",
+            preshared_key="psk",
+            comment="tg:1001:profile:42",
+            peer_id=adopted.peer_id,
+        )
+    )
+
+    assert (action, peer_id) == ("updated", "*1")
+    assert "add_peer" not in client.operations
+    peer = client.peers[0]
+    assert (peer["public-key"], peer["comment"], peer["preshared-key"]) == ("new-pk", "tg:1001:profile:42", "psk")
+    assert len(client.peers) == len(ROUTER_PEERS)
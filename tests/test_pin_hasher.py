@@ -0,0 +1,63 @@
+import asyncio
+
+from app.utils.cpu_pool import CpuPool
+from app.utils.security import PinHasher, hash_pin, hash_rounds, verify_pin
+
+
+class CountingPool(CpuPool):
+    def __init__(self) -> None:
+        super().__init__("test", workers=2)
+        self.calls = 0
+
+    async def run(self, func, *args):
+        self.calls += 1
+        return await super().run(func, *args)
+
+
+def test_concurrent_shared_hash_runs_bcrypt_once() -> None:
+    pool = CountingPool()
+    hasher = PinHasher(pool, rounds=4)
+
+    async def scenario() -> list[str]:
+        return await asyncio.gather(*(hasher.shared_hash("1234") for _ in range(5)))
+
+    hashes = asyncio.run(scenario())
+    pool.shutdown()
+
+    assert len(set(hashes)) == 1
+    assert pool.calls == 1
+    assert verify_pin("1234", hashes[0])
+
+
+def test_adopt_reuses_matching_stored_hash_only() -> None:
+    pool = CountingPool()
+    hasher = PinHasher(pool, rounds=4)
+    stored = hash_pin("1234", rounds=4)
+
+    async def scenario() -> tuple[bool, bool, str]:
+        rejected = await hasher.adopt("9999", stored)
+        adopted = await hasher.adopt("1234", stored)
+        return rejected, adopted, await hasher.shared_hash("1234")
+
+    rejected, adopted, shared = asyncio.run(scenario())
+    pool.shutdown()
+
+    assert rejected is False
+    assert adopted is True
+    assert shared == stored
+
+
+def test_adopt_rejects_hash_with_different_cost() -> None:
+    pool = CountingPool()
+    hasher = PinHasher(pool, rounds=5)
+    stored = hash_pin("1234", rounds=4)
+
+    async def scenario() -> tuple[bool, str]:
+        return await hasher.adopt("1234", stored), await hasher.shared_hash("1234")
+
+    adopted, shared = asyncio.run(scenario())
+    pool.shutdown()
+
+    assert adopted is False
+    assert hash_rounds(shared) == 5
+    assert verify_pin("1234", shared)
@@ -0,0 +1,121 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiogram.types import BufferedInputFile
+
+from app.handlers.connections import _send_config
+from app.services.qr_service import QrService
+from app.ui import texts
+from app.utils.qr import render_qr
+
+
+class FakeCpuPool:
+    """Counts encodes instead of running segno."""
+
+    def __init__(self, result: bytes | None = b"png") -> None:
+        self.calls = 0
+        self.result = result
+
+    async def run(self, func, text, *args):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return self.result
+
+
+class FakeMessage:
+    def __init__(self) -> None:
+        self.photos: list[tuple[object, str | None]] = []
+        self.texts: list[str] = []
+
+    async def answer_document(self, document, caption: str | None = None):
+        return SimpleNamespace(document=SimpleNamespace(file_id="doc-1"))
+
+    async def answer_photo(self, photo, caption: str | None = None):
+        self.photos.append((photo, caption))
+        return SimpleNamespace(photo=[SimpleNamespace(file_id="small"), SimpleNamespace(file_id="qr-1")])
+
+    async def answer(self, text: str, **kwargs) -> None:
+        self.texts.append(text)
+
+
+class FakeConfigsRepository:
+    def __init__(self) -> None:
+        self.qr_stored: list[tuple[int, str]] = []
+
+    async def set_document_file_id(self, config_id: int, file_id: str) -> None:
+        return None
+
+    async def set_qr_file_id(self, config_id: int, file_id: str) -> None:
+        self.qr_stored.append((config_id, file_id))
+
+
+def test_concurrent_requests_for_same_config_encode_once() -> None:
+    pool = FakeCpuPool()
+    service = QrService(pool)  # type: ignore[arg-type]
+
+    async def scenario() -> list[bytes | None]:
+        first = await asyncio.gather(*(service.image("[Interface]") for _ in range(5)))
+        return [*first, await service.image("[Interface]")]
+
+    assert asyncio.run(scenario()) == [b"png"] * 6
+    assert pool.calls == 1
+
+
+def test_qr_photo_carries_config_text_and_is_uploaded_once() -> None:
+    pool = FakeCpuPool()
+    service = QrService(pool)  # type: ignore[arg-type]
+    repo = FakeConfigsRepository()
+
+    async def deliver(message: FakeMessage) -> None:
+        await _send_config(
+            message,  # type: ignore[arg-type]
+            repo,  # type: ignore[arg-type]
+            config_id=7,
+            telegram_id=42,
+            config_text="[Interface]",
+            file_id="doc-1",
+            qr_service=service,
+        )
+
+    first, second = FakeMessage(), FakeMessage()
+    asyncio.run(deliver(first))
+    asyncio.run(deliver(second))
+
+    photo, caption = first.photos[0]
+    assert isinstance(photo, BufferedInputFile)
+    assert caption is not None and caption.startswith(texts.VPN_QR) and "[Interface]" in caption
+    assert first.texts == []
+    assert repo.qr_stored == [(7, "qr-1")]
+    assert second.photos[0][0] == "qr-1"
+    assert pool.calls == 1
+
+
+def test_config_too_large_for_qr_falls_back_to_text() -> None:
+    service = QrService(FakeCpuPool(result=None))  # type: ignore[arg-type]
+    message, repo = FakeMessage(), FakeConfigsRepository()
+
+    asyncio.run(
+        _send_config(
+            message,  # type: ignore[arg-type]
+            repo,  # type: ignore[arg-type]
+            config_id=7,
+            telegram_id=42,
+            config_text="[Interface]",
+            file_id="doc-1",
+            qr_service=service,
+        )
+    )
+
+    assert message.photos == []
+    assert message.texts == [texts.VPN_TEXT.format(config="[Interface]")]
+
+
+def test_render_qr_encodes_config_and_rejects_oversized_text() -> None:
+    pytest.importorskip("segno")
+
+    image = render_qr("[Interface]\nPrivateKey = abc\nAddress = 10.0.0.2/32\n", kind="png", scale=2)
+    assert image is not None and image.startswith(b"\x89PNG")
+
+    # Version 40-M holds at most 2331 bytes.
+    assert render_qr("x" * 5000) is None
@@ -0,0 +1,48 @@
+import asyncio
+
+from app.config import Settings
+from app.utils.rate_limit import RateLimiter, RateLimitRule, build_rate_limit_rules
+
+
+class FakeRedis:
+    def __init__(self, result: list[int]) -> None:
+        self.result = result
+        self.calls: list[tuple[list[str], list]] = []
+
+    def register_script(self, script: str):
+        async def run(keys: list[str], args: list):
+            self.calls.append((keys, args))
+            return self.result
+
+        return run
+
+
+def _settings(**overrides) -> Settings:
+    return Settings(_env_file=None, bot_token="1" * 30, **overrides)
+
+
+def test_rules_exempt_admins_by_default() -> None:
+    limiter = RateLimiter(FakeRedis([1, 0]), rules=build_rate_limit_rules(_settings()))  # type: ignore[arg-type]
+
+    assert limiter.rule_for("reissue", "admin") is None
+    assert limiter.rule_for("reissue", "user") == RateLimitRule(capacity=1, refill_seconds=300)
+    assert limiter.rule_for("reissue", None) == RateLimitRule(capacity=1, refill_seconds=300)
+    assert limiter.rule_for("unknown", "user") is None
+
+
+def test_rules_apply_to_admins_when_exemption_disabled() -> None:
+    rules = build_rate_limit_rules(_settings(rate_limit_admin_exempt=False))
+
+    assert "admin" not in rules["new_connection"]
+    assert "superadmin" not in rules["reissue"]
+
+
+def test_hit_passes_bucket_parameters_and_rounds_retry_up() -> None:
+    redis = FakeRedis([0, 1500])
+    limiter = RateLimiter(redis, rules={"reissue": {"*": RateLimitRule(capacity=2, refill_seconds=2.5)}})  # type: ignore[arg-type]
+
+    decision = asyncio.run(limiter.hit("reissue", 42, "user"))
+
+    assert decision.allowed is False
+    assert decision.retry_after_seconds == 2
+    assert redis.calls == [(["rl:reissue:42"], [2, 2500, 1])]
@@ -0,0 +1,142 @@
+import asyncio
+from types import SimpleNamespace
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendDocument
+from aiogram.types import BufferedInputFile
+
+from app.handlers.connections import _send_config, confirm_reissue
+from app.services.mikrotik_service import MikroTikClientError
+from app.utils.session import SessionInfo
+
+
+class FakeMessage:
+    def __init__(self, reject_file_id: bool = False) -> None:
+        self.documents: list[object] = []
+        self.texts: list[str] = []
+        self.reject_file_id = reject_file_id
+
+    async def answer_document(self, document, caption: str | None = None):
+        if isinstance(document, str) and self.reject_file_id:
+            raise TelegramBadRequest(SendDocument(chat_id=1, document=document), "wrong file identifier")
+        self.documents.append(document)
+        return SimpleNamespace(document=SimpleNamespace(file_id="file-123"))
+
+    async def answer(self, text: str, **kwargs) -> None:
+        self.texts.append(text)
+
+
+class FakeConfigsRepository:
+    def __init__(self) -> None:
+        self.stored: list[tuple[int, str]] = []
+
+    async def set_document_file_id(self, config_id: int, file_id: str) -> None:
+        self.stored.append((config_id, file_id))
+
+
+def _deliver(message: FakeMessage, repo: FakeConfigsRepository, file_id: str | None) -> None:
+    asyncio.run(
+        _send_config(
+            message,  # type: ignore[arg-type]
+            repo,  # type: ignore[arg-type]
+            config_id=7,
+            telegram_id=42,
+            config_text="[Interface]",
+            file_id=file_id,
+        )
+    )
+
+
+def test_first_delivery_uploads_and_stores_file_id() -> None:
+    message, repo = FakeMessage(), FakeConfigsRepository()
+
+    _deliver(message, repo, file_id=None)
+
+    assert isinstance(message.documents[0], BufferedInputFile)
+    assert message.documents[0].filename == "wg_42_7.conf"
+    assert repo.stored == [(7, "file-123")]
+    assert len(message.texts) == 1
+
+
+def test_repeat_delivery_reuses_file_id_and_falls_back_when_rejected() -> None:
+    message, repo = FakeMessage(), FakeConfigsRepository()
+    _deliver(message, repo, file_id="file-123")
+    assert message.documents == ["file-123"]
+    assert repo.stored == []
+
+    rejected, repo = FakeMessage(reject_file_id=True), FakeConfigsRepository()
+    _deliver(rejected, repo, file_id="stale")
+    assert isinstance(rejected.documents[0], BufferedInputFile)
+    assert repo.stored == [(7, "file-123")]
+
+
+class FailingMikroTikService:
+    settings = SimpleNamespace(mikrotik_enabled=True, mikrotik_dry_run=False)
+
+    async def ensure_wireguard_peer(self, **kwargs) -> tuple[str, str]:
+        raise MikroTikClientError("router unreachable")
+
+
+class ReissueConfigsRepository(FakeConfigsRepository):
+    def __init__(self) -> None:
+        super().__init__()
+        self.attached: list[tuple[int, str | None]] = []
+
+    async def reissue_for_user(self, user_id: int, telegram_id: int, profile_builder):
+        _, public_key, psk, config_text = profile_builder("10.0.0.5")
+        return 8, "10.0.0.5", config_text, public_key, psk, "*1"
+
+    async def attach_mikrotik_peer(self, config_id: int, peer_id: str | None) -> None:
+        self.attached.append((config_id, peer_id))
+
+
+class FakeWireGuardService:
+    def generate_profile(self, ip_address: str):
+        return SimpleNamespace(private_key="priv", public_key="pub", preshared_key="psk")
+
+    def render_config(self, creds) -> str:
+        return "[Interface]"
+
+
+class FakeLogsRepository:
+    async def add(self, event_type: str, details: dict, user_id: int | None = None) -> None:
+        return None
+
+
+class FakeSubscriptionsRepository:
+    async def get_latest(self, user_id: int) -> None:
+        return None
+
+
+class FakeSingleFlight:
+    async def run(self, key: str, action):
+        return await action(), False
+
+
+class FakeCallback:
+    def __init__(self) -> None:
+        self.from_user = SimpleNamespace(id=42)
+        self.message = FakeMessage()
+
+    async def answer(self, text: str | None = None, **kwargs) -> None:
+        return None
+
+
+def test_failed_reissue_sync_keeps_the_old_peer_bound() -> None:
+    repo = ReissueConfigsRepository()
+
+    asyncio.run(
+        confirm_reissue(
+            FakeCallback(),  # type: ignore[arg-type]
+            users_repo=None,  # type: ignore[arg-type]
+            wg_repo=repo,  # type: ignore[arg-type]
+            wg_service=FakeWireGuardService(),  # type: ignore[arg-type]
+            logs_repo=FakeLogsRepository(),  # type: ignore[arg-type]
+            mikrotik_service=FailingMikroTikService(),  # type: ignore[arg-type]
+            single_flight=FakeSingleFlight(),  # type: ignore[arg-type]
+            subscriptions_repo=FakeSubscriptionsRepository(),  # type: ignore[arg-type]
+            session=SessionInfo(telegram_id=42, role="user", user_id=3, access_status="approved"),
+        )
+    )
+
+    assert repo.attached == [(8, "*1")]
@@ -0,0 +1,79 @@
+import asyncio
+
+from app.utils.session import SessionInfo, SessionManager
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self._redis = redis
+        self._ops: list[tuple] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    def delete(self, key: str) -> None:
+        self._ops.append(("delete", key))
+
+    def hset(self, key: str, mapping: dict[str, str]) -> None:
+        self._ops.append(("hset", key, mapping))
+
+    def expire(self, key: str, seconds: int) -> None:
+        self._ops.append(("expire", key, seconds))
+
+    async def execute(self) -> None:
+        for op in self._ops:
+            if op[0] == "delete":
+                self._redis.hashes.pop(op[1], None)
+            elif op[0] == "hset":
+                self._redis.hashes[op[1]] = {k.encode(): v.encode() for k, v in op[2].items()}
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+        self.reads = 0
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def hgetall(self, key: str) -> dict[bytes, bytes]:
+        self.reads += 1
+        return self.hashes.get(key, {})
+
+    async def delete(self, key: str) -> None:
+        self.hashes.pop(key, None)
+
+
+def test_session_snapshot_is_served_from_local_cache() -> None:
+    redis = FakeRedis()
+    sessions = SessionManager(redis=redis, ttl_seconds=60)  # type: ignore[arg-type]
+
+    async def scenario() -> tuple[SessionInfo | None, SessionInfo | None]:
+        await sessions.create_session(5, "admin", user_id=1, access_status="approved")
+        return await sessions.get_session(5), await sessions.get_session(5)
+
+    first, second = asyncio.run(scenario())
+
+    assert first == SessionInfo(telegram_id=5, role="admin", user_id=1, access_status="approved", pin_verified=True)
+    assert second == first
+    assert redis.reads == 0
+
+
+def test_session_loaded_from_redis_hash_and_destroy_is_cached() -> None:
+    redis = FakeRedis()
+    redis.hashes["session:7"] = {b"role": b"user", b"user_id": b"3", b"access_status": b"approved", b"pin_verified": b"1"}
+    sessions = SessionManager(redis=redis, ttl_seconds=60)  # type: ignore[arg-type]
+
+    async def scenario() -> tuple[str | None, SessionInfo | None]:
+        role = await sessions.get_role(7)
+        await sessions.destroy_session(7)
+        return role, await sessions.get_session(7)
+
+    role, after_destroy = asyncio.run(scenario())
+
+    assert role == "user"
+    assert after_destroy is None
+    assert redis.reads == 1
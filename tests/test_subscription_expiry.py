@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.database.repositories import Subscription
+from app.services.subscriptions import SubscriptionExpiryService, subscription_lapsed
+
+NOW = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _subscription(sub_id: int, telegram_id: int, expires_at: datetime, status: str = "active") -> Subscription:
+    return Subscription(
+        id=sub_id,
+        user_id=sub_id,
+        telegram_id=telegram_id,
+        plan_name="basic",
+        starts_at=NOW - timedelta(days=30),
+        expires_at=expires_at,
+        status=status,
+    )
+
+
+class FakeSubscriptionsRepository:
+    def __init__(self, subscriptions: list[Subscription], clock) -> None:
+        self.subscriptions = {subscription.id: subscription for subscription in subscriptions}
+        self.clock = clock
+        self.claim_calls = 0
+
+    async def upcoming(self, until: datetime, limit: int):
+        due = sorted(
+            (s.expires_at, s.id) for s in self.subscriptions.values() if s.status == "active" and s.expires_at <= until
+        )
+        return due[:limit]
+
+    async def claim_expired(self, limit: int):
+        self.claim_calls += 1
+        due = [s for s in self.subscriptions.values() if s.status == "active" and s.expires_at <= self.clock()][:limit]
+        for subscription in due:
+            subscription.status = "expired"
+        return due
+
+    async def claim_reminders(self, until: datetime, limit: int):
+        return []
+
+
+class FakeAccessAdmin:
+    def __init__(self) -> None:
+        self.revoked: list[list[int]] = []
+
+    async def revoke_configs(self, telegram_ids: list[int]):
+        self.revoked.append(telegram_ids)
+        return len(telegram_ids), len(telegram_ids), 0
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.sent: list[int] = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        self.sent.append(chat_id)
+
+
+def test_heap_gates_sweeps_until_next_expiration_and_sweeps_in_batches() -> None:
+    clock = SimpleNamespace(now=NOW)
+    subscriptions = [
+        _subscription(1, 101, NOW + timedelta(minutes=5)),
+        _subscription(2, 102, NOW + timedelta(minutes=5)),
+        _subscription(3, 103, NOW + timedelta(minutes=5)),
+        _subscription(4, 104, NOW + timedelta(days=10)),
+    ]
+    repo = FakeSubscriptionsRepository(subscriptions, lambda: clock.now)
+    access_admin, bot = FakeAccessAdmin(), FakeBot()
+    service = SubscriptionExpiryService(
+        repo=repo,  # type: ignore[arg-type]
+        access_admin=access_admin,  # type: ignore[arg-type]
+        bot=bot,  # type: ignore[arg-type]
+        batch_size=2,
+        horizon_seconds=3600,
+        reminder_interval_seconds=3600,
+        clock=lambda: clock.now,
+    )
+
+    async def scenario() -> None:
+        await service.run_once()
+        assert repo.claim_calls == 0
+
+        clock.now = NOW + timedelta(minutes=4)
+        await service.run_once()
+        assert repo.claim_calls == 0
+
+        clock.now = NOW + timedelta(minutes=5)
+        await service.run_once()
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+
+    assert access_admin.revoked == [[101, 102], [103]]
+    assert sorted(bot.sent) == [101, 102, 103]
+    assert repo.subscriptions[4].status == "active"
+
+
+def test_only_users_with_a_finished_subscription_are_gated() -> None:
+    assert subscription_lapsed(None) is False
+    assert subscription_lapsed(_subscription(1, 1, NOW + timedelta(days=1)), now=NOW) is False
+    assert subscription_lapsed(_subscription(1, 1, NOW - timedelta(seconds=1)), now=NOW) is True
+    assert subscription_lapsed(_subscription(1, 1, NOW + timedelta(days=1), status="expired"), now=NOW) is True
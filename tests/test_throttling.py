@@ -0,0 +1,43 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.handlers.middlewares.throttling import ThrottlingMiddleware
+from app.utils.metrics import metrics
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucket_allows_burst_then_drains() -> None:
+    clock = FakeClock()
+    throttling = ThrottlingMiddleware(rate_per_second=1.0, burst=3, clock=clock)
+
+    assert [throttling.allow(1) for _ in range(4)] == [True, True, True, False]
+    assert throttling.allow(2) is True
+
+    clock.now = 1.0
+    assert throttling.allow(1) is True
+    assert throttling.allow(1) is False
+
+
+def test_excess_updates_are_dropped_and_admins_exempt() -> None:
+    metrics.reset()
+    throttling = ThrottlingMiddleware(rate_per_second=0.0, burst=1, exempt_ids={99}, clock=FakeClock())
+    handled: list[int] = []
+
+    async def handler(event, data):
+        handled.append(data["event_from_user"].id)
+
+    async def scenario() -> None:
+        for user_id in (1, 1, 99, 99):
+            await throttling(handler, object(), {"event_from_user": SimpleNamespace(id=user_id)})
+
+    asyncio.run(scenario())
+
+    assert handled == [1, 99, 99]
+    assert metrics.counter("throttled_updates_total", event="object") == 1
@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+from aiogram.types import Update
+
+from app.handlers.middlewares.scheduler import UpdateScheduler
+from app.utils.concurrency import PRIORITIES, PrioritySemaphore
+
+
+def test_waiters_are_served_by_priority_and_low_priority_is_capped() -> None:
+    async def scenario() -> tuple[list[str], int]:
+        semaphore = PrioritySemaphore(2, low_limit=1)
+        order: list[str] = []
+
+        await semaphore.acquire(PRIORITIES["low"])
+        await semaphore.acquire(PRIORITIES["normal"])
+
+        async def waiter(name: str, priority: int) -> None:
+            await semaphore.acquire(priority)
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(waiter("low", PRIORITIES["low"])),
+            asyncio.create_task(waiter("normal", PRIORITIES["normal"])),
+            asyncio.create_task(waiter("high", PRIORITIES["high"])),
+        ]
+        await asyncio.sleep(0)
+        semaphore.release(PRIORITIES["normal"])
+        await asyncio.sleep(0)
+        semaphore.release(PRIORITIES["high"])
+        await asyncio.sleep(0)
+        # One low holder is still active, so the queued low waiter must keep waiting.
+        blocked_active = semaphore.active
+        semaphore.release(PRIORITIES["low"])
+        await asyncio.gather(*tasks)
+        return order, blocked_active
+
+    order, blocked_active = asyncio.run(scenario())
+
+    assert order == ["high", "normal", "low"]
+    assert blocked_active == 2
+
+
+def test_updates_of_one_user_run_in_order_and_users_run_in_parallel() -> None:
+    scheduler = UpdateScheduler(limit=4, low_priority_limit=2)
+    log: list[str] = []
+
+    async def handler(event: Update, data: dict) -> None:
+        user_id = data["event_from_user"].id
+        log.append(f"start {user_id}:{event.update_id}")
+        await asyncio.sleep(0.01 if event.update_id == 1 else 0)
+        log.append(f"end {user_id}:{event.update_id}")
+
+    async def scenario() -> None:
+        await asyncio.gather(
+            scheduler.order(handler, Update(update_id=1), {"event_from_user": SimpleNamespace(id=10)}),
+            scheduler.order(handler, Update(update_id=2), {"event_from_user": SimpleNamespace(id=10)}),
+            scheduler.order(handler, Update(update_id=3), {"event_from_user": SimpleNamespace(id=20)}),
+        )
+
+    asyncio.run(scenario())
+
+    assert log.index("end 10:1") < log.index("start 10:2")
+    assert log.index("end 20:3") < log.index("end 10:1")
+    assert scheduler._users == {}
+
+
+def test_admins_get_high_priority_and_flags_set_it_for_others() -> None:
+    scheduler = UpdateScheduler(limit=4, low_priority_limit=2, admin_ids={1})
+    low_handler = {"handler": SimpleNamespace(flags={"priority": "low"})}
+
+    assert scheduler.priority_for({"event_from_user": SimpleNamespace(id=1), **low_handler}) == PRIORITIES["high"]
+    assert scheduler.priority_for({"event_from_user": SimpleNamespace(id=2), **low_handler}) == PRIORITIES["low"]
+    assert scheduler.priority_for({"event_from_user": SimpleNamespace(id=2)}) == PRIORITIES["normal"]
@@ -0,0 +1,87 @@
+import asyncio
+
+from app.database.repositories.users import User
+from app.services.user_cache import CachedUsersRepository, _decode_user, _encode_user
+from app.utils.cache import TTLCache
+from app.utils.metrics import metrics
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+
+    async def hgetall(self, key: str) -> dict[bytes, bytes]:
+        return self.hashes.get(key, {})
+
+
+def _user(**overrides) -> User:
+    values = dict(
+        id=1,
+        telegram_id=123,
+        username=None,
+        full_name="Иван",
+        role="user",
+        pin_hash="hash",
+        pin_verified=True,
+        is_active=True,
+        access_status="approved",
+    )
+    values.update(overrides)
+    return User(**values)
+
+
+def test_ttl_cache_expires_and_evicts_lru() -> None:
+    clock = FakeClock()
+    cache: TTLCache[int, str] = TTLCache(maxsize=2, ttl_seconds=10, clock=clock)
+
+    cache.set(1, "a")
+    cache.set(2, "b")
+    assert cache.get(1) == "a"
+    cache.set(3, "c")
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+
+    clock.now = 11
+    assert cache.get(1) is None
+    assert len(cache) == 1
+
+
+def test_user_roundtrip_through_redis_hash() -> None:
+    user = _user()
+    raw = {key.encode(): value.encode() for key, value in _encode_user(user).items()}
+
+    assert _decode_user(raw) == user
+
+
+def test_redis_hit_populates_local_layer() -> None:
+    metrics.reset()
+    redis = FakeRedis()
+    user = _user()
+    redis.hashes["user:123"] = {key.encode(): value.encode() for key, value in _encode_user(user).items()}
+    repo = CachedUsersRepository(pool=None, redis=redis)  # type: ignore[arg-type]
+
+    assert asyncio.run(repo.get_by_telegram_id(123)) == user
+    assert asyncio.run(repo.get_by_telegram_id(123)) == user
+
+    assert metrics.counter("user_cache_hits_total", layer="redis") == 1
+    assert metrics.counter("user_cache_hits_total", layer="local") == 1
+    assert metrics.counter("user_cache_misses_total") == 0
+
+
+def test_foreign_invalidation_evicts_local_entry() -> None:
+    repo = CachedUsersRepository(pool=None, redis=FakeRedis())  # type: ignore[arg-type]
+    repo._local.set(123, _user())
+    repo._local.set(456, _user(telegram_id=456))
+
+    repo._apply_invalidation(b"other-instance:123")
+
+    assert repo._local.get(123) is None
+    assert repo._local.get(456) is not None
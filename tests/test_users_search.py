@@ -0,0 +1,81 @@
+import asyncio
+
+from app.database.repositories.users import UsersRepository, parse_telegram_id
+
+
+class FakeConn:
+    def __init__(self, exact_row: dict | None = None) -> None:
+        self.exact_row = exact_row
+        self.fetchrow_calls: list[tuple[str, tuple]] = []
+        self.fetch_calls: list[tuple[str, tuple]] = []
+
+    async def fetchrow(self, query: str, *args):
+        self.fetchrow_calls.append((query, args))
+        return self.exact_row
+
+    async def fetch(self, query: str, *args):
+        self.fetch_calls.append((query, args))
+        return []
+
+
+class FakeAcquire:
+    def __init__(self, conn: FakeConn) -> None:
+        self._conn = conn
+
+    async def __aenter__(self) -> FakeConn:
+        return self._conn
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+class FakePool:
+    def __init__(self, conn: FakeConn) -> None:
+        self._conn = conn
+
+    def acquire(self) -> FakeAcquire:
+        return FakeAcquire(self._conn)
+
+
+def test_numeric_query_uses_exact_telegram_id_lookup() -> None:
+    conn = FakeConn(exact_row={"telegram_id": 123456})
+    repo = UsersRepository(FakePool(conn))  # type: ignore[arg-type]
+
+    rows = asyncio.run(repo.search("123456"))
+
+    assert rows == [{"telegram_id": 123456}]
+    assert conn.fetchrow_calls[0][1] == (123456,)
+    assert conn.fetch_calls == []
+
+
+def test_numeric_query_falls_back_to_trigram_search_when_id_missing() -> None:
+    conn = FakeConn(exact_row=None)
+    repo = UsersRepository(FakePool(conn))  # type: ignore[arg-type]
+
+    asyncio.run(repo.search("777"))
+
+    assert len(conn.fetch_calls) == 1
+    assert conn.fetch_calls[0][1] == ("777", "%777%", 20)
+
+
+def test_text_query_escapes_like_wildcards_and_strips_at_sign() -> None:
+    conn = FakeConn()
+    repo = UsersRepository(FakePool(conn))  # type: ignore[arg-type]
+
+    asyncio.run(repo.search("@ivan_100%", limit=5))
+
+    query, args = conn.fetch_calls[0]
+    assert "similarity" in query
+    assert args == ("ivan_100%", "%ivan\\_100\\%%", 5)
+
+
+def test_non_ascii_and_out_of_range_digits_fall_back_to_trigram_search() -> None:
+    for needle in ("²", "١٢٣", str(2**63)):
+        conn = FakeConn(exact_row={"telegram_id": 1})
+        repo = UsersRepository(FakePool(conn))  # type: ignore[arg-type]
+
+        assert asyncio.run(repo.search(needle)) == []
+        assert conn.fetchrow_calls == []
+        assert conn.fetch_calls[0][1][0] == needle
+
+    assert parse_telegram_id(str(2**63 - 1)) == 2**63 - 1
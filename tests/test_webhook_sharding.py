@@ -0,0 +1,36 @@
+import asyncio
+
+from app.webhook import _watch_workers, shard_for_update
+
+
+def test_updates_of_same_user_go_to_same_worker() -> None:
+    message = {"update_id": 1, "message": {"message_id": 5, "from": {"id": 1001}, "text": "/start"}}
+    callback = {"update_id": 2, "callback_query": {"id": "x", "from": {"id": 1001}, "data": "reissue:confirm"}}
+
+    assert shard_for_update(message, 4) == shard_for_update(callback, 4) == 1001 % 4
+
+
+def test_update_without_sender_falls_back_to_update_id() -> None:
+    assert shard_for_update({"update_id": 7, "poll": {"id": "p"}}, 4) == 3
+
+
+class FakeProcess:
+    def __init__(self, name: str, alive_checks: int) -> None:
+        self.name = name
+        self.exitcode: int | None = None
+        self._alive_checks = alive_checks
+
+    def is_alive(self) -> bool:
+        if self._alive_checks <= 0:
+            self.exitcode = 1
+            return False
+        self._alive_checks -= 1
+        return True
+
+
+def test_watch_workers_returns_when_a_worker_dies() -> None:
+    processes = [FakeProcess("w0", alive_checks=100), FakeProcess("w1", alive_checks=2)]
+
+    asyncio.run(asyncio.wait_for(_watch_workers(processes, interval=0), timeout=1))  # type: ignore[arg-type]
+
+    assert processes[1].exitcode == 1